@@ -0,0 +1,1082 @@
+#!/usr/bin/env python3
+"""
+Fotod PDFiks jõudlustestid - töötlusetappide ja kogu töövoo mõõtmised
+
+Alamkäsud:
+- stages: mõõdab DocumentProcessor'i iga privaatse töötlusetapi ja avaliku
+  meetodi kestust eraldi, kasutades deterministlikke sünteetilisi dokumendifotosid
+  (vt synthetic_docs.py)
+- corpus: käivitab kogu käsurea töövoo pildikaustal iga optimeerimistasemega
+  (AI-ga ja ilma) ning mõõdab läbilaskevõimet, mälu, PDF-i suurust lehekülje
+  kohta ja kvaliteeti (SSIM ning OCR-i täpsus võrreldes tegeliku tekstiga);
+  --tune korral soovitab optimeerimistasemete seaded mõõtmistulemuste põhjal
+- router: hindab lehekülje tüübi tuvastuse täpsust märgendatud pildikaustal ja
+  mõõdab, kui palju aega säästab tüübile vastava töötluse valimine võrreldes
+  varasema failinime ja heleduse põhise kviitungi tuvastusega
+- ocr: mõõdab pildikaustal iga OCR-i kiirusprofiili aega lehekülje kohta ja
+  täpsust võrreldes tegeliku tekstiga
+- parse: mõõdab arve väljade parsimise (_parse_invoice_data) kiirust OCR tekstide
+  kaustal või sünteetilistel arvetekstidel
+
+Tulemused salvestatakse JSON-faili, mida saab hiljem teise commit'i tulemustega võrrelda.
+
+Kasutamine:
+    python benchmark.py stages --output tulemused.json
+    python benchmark.py stages --kinds text,skewed --sizes 2,12 --repeat 5 --warmup 1
+    python benchmark.py stages --output uus.json --compare vana.json
+    python benchmark.py corpus --corpus korpus/ --levels 0,1,2,3 --ai both
+    python benchmark.py corpus --corpus korpus/ --tune --write-profiles profiilid.json
+    python benchmark.py router --corpus korpus/ --labels märgendid.json
+    python benchmark.py ocr --corpus korpus/ --profiles fast,balanced,accurate
+    python benchmark.py parse --corpus tekstid/ --repeat 5
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import difflib
+import subprocess
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import cv2
+import numpy as np
+from skimage.metrics import structural_similarity
+
+from doc_processor import (DocumentProcessor, OPTIMIZATION_PROFILES, REMBG_AVAILABLE, ANALYSIS_WIDTH,
+                           PAGE_TYPES, OCR_PROFILES, load_optimization_profiles)
+from synthetic_docs import DOCUMENT_KINDS, KIND_PAGE_TYPES, generate_document, generate_invoice_text
+
+# Käsurea tööriista tee kogu töövoo mõõtmiseks
+CLI_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fotod_pdfiks.py")
+
+# Pildifailide laiendid korpuse kaustas
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif')
+
+# Kvaliteedi võrdlemise maksimaalne laius (SSIM arvutatakse vähendatud pildil)
+COMPARE_WIDTH = 1600
+
+# Vaikimisi SSIM sihtväärtused optimeerimistasemete häälestamiseks
+DEFAULT_SSIM_TARGETS = {0: 0.98, 1: 0.95, 2: 0.90, 3: 0.85}
+
+
+def _git_commit():
+    """Tagasta praeguse commit'i lühike räsi või None"""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, universal_newlines=True
+        )
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _tesseract_available():
+    """Kontrolli, kas Tesseract OCR on paigaldatud"""
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def _environment():
+    """Koosta mõõtmiskeskkonna kirjeldus tulemuste võrreldavuse jaoks"""
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "cpu_count": os.cpu_count()
+    }
+
+
+def time_call(func, repeat=3, warmup=1):
+    """Mõõda funktsiooni kestust
+
+    Args:
+        func: Argumentideta funktsioon
+        repeat: Mõõdetud korduste arv
+        warmup: Mõõtmata soojenduskorduste arv
+
+    Returns:
+        List kestustega sekundites
+    """
+    # Töötleja kirjutab palju infot standardväljundisse, see ei kuulu mõõtmisse
+    with redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            func()
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize_times(times):
+    """Koonda kestuste statistika
+
+    Args:
+        times: List kestustega sekundites
+
+    Returns:
+        Dict statistikaga
+    """
+    return {
+        "times_s": times,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.mean(times),
+        "stdev_s": statistics.stdev(times) if len(times) > 1 else 0.0
+    }
+
+
+def build_stage_cases(processor, image_path, image, work_dir, optimization_level=2, ocr=False):
+    """Koosta ühe dokumendi mõõdetavad etapid
+
+    Iga etapi sisend arvutatakse ette, et mõõdetaks ainult etappi ennast.
+
+    Args:
+        processor: DocumentProcessor instants
+        image_path: Pildi tee
+        image: Dekodeeritud pilt
+        work_dir: Kaust ajutiste väljundfailide jaoks
+        optimization_level: Optimeerimise tase
+        ocr: Kas mõõta ka OCR-i kasutavaid meetodeid
+
+    Returns:
+        List paaridest (etapi nimi, argumentideta funktsioon)
+    """
+    with redirect_stdout(io.StringIO()):
+        preview = processor._read_image(image_path, min_side=ANALYSIS_WIDTH)
+        resized = processor._resize_image(preview, width=ANALYSIS_WIDTH)
+        contour = processor._find_document_contour(resized)
+        pts = contour.astype(np.float32) * (image.shape[1] / float(resized.shape[1]))
+        warped = processor._apply_perspective_transform(image, pts)
+        enhanced = processor._enhance_document(warped)
+        enhanced_gray = cv2.cvtColor(enhanced, cv2.COLOR_BGR2GRAY)
+
+    pdf_path = os.path.join(work_dir, "benchmark.pdf")
+
+    cases = [
+        ("_read_image", lambda: processor._read_image(image_path)),
+        ("_read_image_preview", lambda: processor._read_image(image_path, min_side=ANALYSIS_WIDTH)),
+        ("_classify_page", lambda: processor._classify_page(preview)),
+        ("_page_fingerprint", lambda: processor._page_fingerprint(image_path)),
+        ("assess_quality", lambda: processor.assess_quality(image_path)),
+        ("_prepare_for_ocr", lambda: processor._prepare_for_ocr(image_path)),
+        ("_decode_payment_code", lambda: processor._decode_payment_code(image_path)),
+        ("_resize_image", lambda: processor._resize_image(preview, width=ANALYSIS_WIDTH)),
+        ("_find_document_contour", lambda: processor._find_document_contour(resized)),
+        ("_find_document_alternative", lambda: processor._find_document_alternative(resized)),
+        ("_order_points", lambda: processor._order_points(contour.reshape(4, 2))),
+        ("_apply_perspective_transform", lambda: processor._apply_perspective_transform(image, pts)),
+        ("_fit_to_paper", lambda: processor._fit_to_paper(warped, optimization_level)),
+        ("_enhance_document", lambda: processor._enhance_document(warped)),
+        ("_enhance_document_for_kvitungs", lambda: processor._enhance_document_for_kvitungs(warped)),
+        ("_is_colorful", lambda: processor._is_colorful(warped)),
+        ("_is_bilevel", lambda: processor._is_bilevel(enhanced_gray)),
+        ("_encode_bilevel", lambda: processor._encode_bilevel(enhanced_gray)),
+        ("_add_white_background", lambda: processor._add_white_background(enhanced)),
+        ("_optimize_image_for_pdf", lambda: processor._optimize_image_for_pdf(enhanced, optimization_level)),
+        ("process_image", lambda: processor.process_image(image_path, optimization_level=optimization_level)),
+        ("convert_to_pdf", lambda: processor.convert_to_pdf([image_path], pdf_path, optimization_level=optimization_level)),
+    ]
+
+    if processor.use_ai:
+        small = processor._resize_image(image, width=1500)
+        cases.append(("_remove_background_with_ai", lambda: processor._remove_background_with_ai(small)))
+
+    if ocr:
+        cases.append(("ocr_document", lambda: processor.ocr_document(image_path, lang="eng")))
+        cases.append(("extract_structured_data", lambda: processor.extract_structured_data(image_path, lang="eng")))
+
+    return cases
+
+
+def run_stage_benchmark(kinds, sizes, repeat=3, warmup=1, seed=0, optimization_level=2,
+                        use_ai=False, ocr=True, stage_filter=None):
+    """Mõõda kõiki etappe kõigil sünteetilistel dokumentidel
+
+    Args:
+        kinds: Dokumenditüüpide list
+        sizes: Pildi suuruste list megapikslites
+        repeat: Mõõdetud korduste arv
+        warmup: Soojenduskorduste arv
+        seed: Sünteetiliste dokumentide seeme
+        optimization_level: Optimeerimise tase
+        use_ai: Kas lubada AI-põhine tausta eemaldamine
+        ocr: Kas mõõta OCR-i kasutavaid meetodeid (kui Tesseract on olemas)
+        stage_filter: Valikuline etappide nimede hulk, mida mõõta
+
+    Returns:
+        Dict tulemustega
+    """
+    with redirect_stdout(io.StringIO()):
+        processor = DocumentProcessor(use_ai=use_ai)
+    ocr = ocr and _tesseract_available()
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="fotod_bench_")
+    try:
+        for kind in kinds:
+            for megapixels in sizes:
+                image, _ = generate_document(kind, megapixels, seed=seed)
+                document = f"{kind}_{megapixels:g}mp"
+                image_path = os.path.join(work_dir, f"{document}.jpg")
+                cv2.imwrite(image_path, image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+                # Mõõdame etappe samal kujul, nagu need saavad faili dekodeerimise järel
+                image = cv2.imread(image_path)
+
+                cases = build_stage_cases(processor, image_path, image, work_dir,
+                                          optimization_level=optimization_level, ocr=ocr)
+                for stage, func in cases:
+                    if stage_filter and stage not in stage_filter:
+                        continue
+                    times = time_call(func, repeat=repeat, warmup=warmup)
+                    item = {
+                        "document": document,
+                        "kind": kind,
+                        "megapixels": megapixels,
+                        "width": image.shape[1],
+                        "height": image.shape[0],
+                        "stage": stage
+                    }
+                    item.update(summarize_times(times))
+                    results.append(item)
+                    print(f"{document:<16} {stage:<34} mediaan {item['median_s'] * 1000:9.2f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "benchmark": "stages",
+        "environment": _environment(),
+        "config": {
+            "kinds": kinds,
+            "sizes": sizes,
+            "repeat": repeat,
+            "warmup": warmup,
+            "seed": seed,
+            "optimization_level": optimization_level,
+            "use_ai": processor.use_ai,
+            "ocr": ocr
+        },
+        "results": results
+    }
+
+
+def _corpus_images(corpus_dir):
+    """Leia korpuse kaustast pildifailid (sama järjekord nagu fotod_pdfiks.py kasutab)"""
+    return sorted(
+        os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def _ground_truth(image_path):
+    """Tagasta pildi tegelik tekst failist <nimi>.gt.txt või None"""
+    gt_path = os.path.splitext(image_path)[0] + ".gt.txt"
+    if not os.path.exists(gt_path):
+        return None
+    with open(gt_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _normalize_text(text):
+    """Normaliseeri tühikud OCR-i tulemuste võrdlemiseks"""
+    return " ".join(text.split())
+
+
+def char_agreement(expected, actual):
+    """Arvuta kahe teksti tähemärgipõhine kokkulangevus (0-1)"""
+    return difflib.SequenceMatcher(None, _normalize_text(expected), _normalize_text(actual), autojunk=False).ratio()
+
+
+def _comparison_gray(image, size=None):
+    """Teisenda pilt hallskaalasse ja võrdlussuurusesse
+
+    Args:
+        image: OpenCV pilt (BGR, BGRA või hallskaala)
+        size: Sihtsuurus (laius, kõrgus); vaikimisi vähendatakse laiuseni COMPARE_WIDTH
+
+    Returns:
+        Hallskaala pilt
+    """
+    if len(image.shape) == 3:
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        image = cv2.cvtColor(image, code)
+    if size is None:
+        h, w = image.shape[:2]
+        if w <= COMPARE_WIDTH:
+            return image
+        size = (COMPARE_WIDTH, int(h * COMPARE_WIDTH / float(w)))
+    if (image.shape[1], image.shape[0]) == size:
+        return image
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def ssim(reference_gray, image):
+    """Arvuta SSIM võrdluspildi ja töödeldud pildi vahel
+
+    Args:
+        reference_gray: Võrdlussuuruses hallskaala võrdluspilt
+        image: Võrreldav pilt (suvalises suuruses)
+
+    Returns:
+        float: SSIM väärtus
+    """
+    h, w = reference_gray.shape[:2]
+    candidate = _comparison_gray(image, size=(w, h))
+    return float(structural_similarity(reference_gray, candidate, data_range=255))
+
+
+def _run_cli(cli_args):
+    """Käivita fotod_pdfiks.py alamprotsessina ning mõõda aega ja mälu
+
+    Args:
+        cli_args: Käsurea argumentide list
+
+    Returns:
+        Tuple (tagastuskood, kestus sekundites, maksimaalne RSS MB-des või None, väljund)
+    """
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, CLI_SCRIPT] + cli_args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True
+    )
+    output = process.stdout.read()
+    process.stdout.close()
+
+    peak_rss_mb = None
+    if hasattr(os, "wait4"):
+        # wait4 annab just selle alamprotsessi ressursikasutuse
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+        divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+        peak_rss_mb = usage.ru_maxrss / divisor
+    else:
+        process.wait()
+
+    return process.returncode, time.perf_counter() - start, peak_rss_mb, output
+
+
+def _render_pdf_pages(pdf_path, dpi=300):
+    """Renderda PDF-i leheküljed ükshaaval pildiks (vajab poppler'it)
+
+    Args:
+        pdf_path: PDF-faili tee
+        dpi: Renderdamise resolutsioon
+
+    Yields:
+        OpenCV pilt (BGR) iga lehekülje kohta
+    """
+    from pdf2image import convert_from_path, pdfinfo_from_path
+
+    page_count = pdfinfo_from_path(pdf_path)["Pages"]
+    for page in range(1, page_count + 1):
+        rendered = convert_from_path(pdf_path, dpi=dpi, first_page=page, last_page=page)[0]
+        yield rendered, cv2.cvtColor(np.array(rendered.convert("RGB")), cv2.COLOR_RGB2BGR)
+
+
+def _build_masters(image_paths, use_ai):
+    """Töötle korpus maksimaalse kvaliteediga võrdluspiltideks
+
+    Args:
+        image_paths: Pildifailide list
+        use_ai: Kas kasutada AI-põhist tausta eemaldamist
+
+    Returns:
+        List hallskaala võrdluspiltidega (vähendatud laiuseni COMPARE_WIDTH)
+    """
+    with redirect_stdout(io.StringIO()):
+        processor = DocumentProcessor(use_ai=use_ai)
+        return [_comparison_gray(processor.process_image(path, optimization_level=0)) for path in image_paths]
+
+
+def evaluate_pdf(pdf_path, masters, ground_truths, lang="est", ocr=True):
+    """Hinda loodud PDF-i kvaliteeti võrdluspiltide ja tegeliku teksti suhtes
+
+    Args:
+        pdf_path: PDF-faili tee
+        masters: Võrdluspiltide list (lehekülgede järjekorras)
+        ground_truths: Tegelike tekstide list (None, kui puudub)
+        lang: OCR keele kood
+        ocr: Kas hinnata OCR-i täpsust
+
+    Returns:
+        Dict kvaliteedinäitajatega
+    """
+    ssim_values = []
+    agreements = []
+    try:
+        for index, (rendered, page) in enumerate(_render_pdf_pages(pdf_path)):
+            if index >= len(masters):
+                break
+            ssim_values.append(ssim(masters[index], page))
+            if ocr and ground_truths[index]:
+                import pytesseract
+                text = pytesseract.image_to_string(rendered, lang=lang)
+                agreements.append(char_agreement(ground_truths[index], text))
+    except Exception as e:
+        print(f"Hoiatus: PDF-i kvaliteeti ei õnnestunud hinnata ({e})")
+
+    return {
+        "ssim_mean": statistics.mean(ssim_values) if ssim_values else None,
+        "ssim_min": min(ssim_values) if ssim_values else None,
+        "ocr_agreement_mean": statistics.mean(agreements) if agreements else None,
+        "ocr_pages": len(agreements)
+    }
+
+
+def run_corpus_benchmark(corpus_dir, levels, ai_modes, dpi=300, lang="est", ocr=True,
+                         profiles_path=None):
+    """Käivita kogu töövoog korpusel iga optimeerimistaseme ja AI režiimiga
+
+    Args:
+        corpus_dir: Pildikaust
+        levels: Optimeerimistasemete list
+        ai_modes: List väärtustest False/True (AI-põhine tausta eemaldamine)
+        dpi: Väljund-PDF-i DPI
+        lang: OCR keele kood
+        ocr: Kas hinnata OCR-i täpsust (kui Tesseract on olemas)
+        profiles_path: Valikuline optimeerimistasemete seadete fail, mis antakse edasi käsureale
+
+    Returns:
+        List tulemustega iga konfiguratsiooni kohta
+    """
+    image_paths = _corpus_images(corpus_dir)
+    if not image_paths:
+        raise ValueError(f"Korpuse kaustas {corpus_dir} pole pildifaile")
+    ground_truths = [_ground_truth(path) for path in image_paths]
+    ocr = ocr and any(ground_truths) and _tesseract_available()
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix="fotod_corpus_")
+    try:
+        for use_ai in ai_modes:
+            print(f"Koostan võrdluspildid (AI: {'jah' if use_ai else 'ei'})...")
+            masters = _build_masters(image_paths, use_ai)
+
+            for level in levels:
+                pdf_path = os.path.join(work_dir, f"corpus_o{level}_ai{int(use_ai)}.pdf")
+                cli_args = ["--input", corpus_dir, "--output", pdf_path,
+                            "--optimize", str(level), "--dpi", str(dpi)]
+                if use_ai:
+                    cli_args.append("--use-ai")
+                if profiles_path:
+                    cli_args.extend(["--optimization-profiles", profiles_path])
+
+                return_code, elapsed, peak_rss_mb, output = _run_cli(cli_args)
+                if return_code != 0:
+                    print(output)
+                    raise RuntimeError(f"fotod_pdfiks.py lõpetas koodiga {return_code}")
+
+                pdf_bytes = os.path.getsize(pdf_path)
+                pages = len(image_paths)
+                item = {
+                    "optimize": level,
+                    "use_ai": use_ai,
+                    "pages": pages,
+                    "seconds": elapsed,
+                    "pages_per_s": pages / elapsed if elapsed > 0 else None,
+                    "peak_rss_mb": peak_rss_mb,
+                    "pdf_bytes": pdf_bytes,
+                    "bytes_per_page": pdf_bytes / pages
+                }
+                item.update(evaluate_pdf(pdf_path, masters, ground_truths, lang=lang, ocr=ocr))
+                results.append(item)
+
+                ssim_text = f"{item['ssim_mean']:.4f}" if item["ssim_mean"] is not None else "-"
+                ocr_text = f"{item['ocr_agreement_mean']:.3f}" if item["ocr_agreement_mean"] is not None else "-"
+                rss_text = f"{peak_rss_mb:.0f} MB" if peak_rss_mb is not None else "-"
+                print(f"tase {level} AI {'jah' if use_ai else 'ei '}: {item['pages_per_s']:.2f} lk/s, "
+                      f"mälu {rss_text}, {item['bytes_per_page'] / 1024:.1f} KB/lk, "
+                      f"SSIM {ssim_text}, OCR {ocr_text}")
+                os.remove(pdf_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return results
+
+
+def tune_profiles(corpus_dir, scales, qualities, ssim_targets, use_ai=False):
+    """Häälesta optimeerimistasemete skaleerimistegur ja JPEG kvaliteet mõõtmiste põhjal
+
+    Iga lehekülje maksimaalse kvaliteediga töödeldud pilt kodeeritakse kõigi
+    skaleerimisteguri ja JPEG kvaliteedi kombinatsioonidega selles värvirežiimis,
+    mille töötlus lehekülje sisu järgi valis. Iga taseme jaoks valitakse kõige väiksema
+    mahuga kombinatsioon, mille keskmine SSIM on vähemalt taseme sihtväärtus. Tasemetel,
+    kus halltoonideta leheküljed salvestatakse mustvalgelt (profiili seade bilevel),
+    ei mõjuta JPEG seaded neid lehekülgi, seega jäetakse need taseme hinnangust välja.
+
+    Args:
+        corpus_dir: Pildikaust
+        scales: Skaleerimistegurite list
+        qualities: JPEG kvaliteetide list
+        ssim_targets: Dict {tase: SSIM sihtväärtus}
+        use_ai: Kas kasutada AI-põhist tausta eemaldamist
+
+    Returns:
+        Tuple (kõigi kombinatsioonide tulemused, soovitatud seaded)
+    """
+    image_paths = _corpus_images(corpus_dir)
+    with redirect_stdout(io.StringIO()):
+        processor = DocumentProcessor(use_ai=use_ai)
+
+    totals = {}
+    bilevel_pages = []
+    for image_path in image_paths:
+        print(f"Häälestan: {os.path.basename(image_path)}")
+        with redirect_stdout(io.StringIO()):
+            master = processor.process_image(image_path, optimization_level=0)
+        reference = _comparison_gray(master)
+        bilevel_pages.append(processor._is_bilevel(master))
+
+        for scale in scales:
+            scaled = master
+            if scale < 1.0:
+                h, w = master.shape[:2]
+                scaled = cv2.resize(master, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            for quality in qualities:
+                ok, encoded = cv2.imencode(".jpg", scaled, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                decoded = cv2.imdecode(encoded, cv2.IMREAD_UNCHANGED)
+                item = totals.setdefault((scale, quality), {"bytes": [], "ssim": []})
+                item["bytes"].append(len(encoded))
+                item["ssim"].append(ssim(reference, decoded))
+
+    def summarize(scale, quality, item, pages):
+        return {
+            "scale": scale,
+            "jpeg_quality": quality,
+            "bytes_per_page": statistics.mean(item["bytes"][i] for i in pages),
+            "ssim_mean": statistics.mean(item["ssim"][i] for i in pages)
+        }
+
+    all_pages = range(len(image_paths))
+    candidates = [summarize(scale, quality, item, all_pages) for (scale, quality), item in sorted(totals.items())]
+
+    # JPEG-ina salvestatavad leheküljed tasemetel, kus mustvalged leheküljed kodeeritakse eraldi
+    jpeg_pages = [i for i in all_pages if not bilevel_pages[i]]
+
+    recommended = {}
+    for level, target in sorted(ssim_targets.items()):
+        pages = jpeg_pages if OPTIMIZATION_PROFILES[level]["bilevel"] else all_pages
+        if not pages:
+            print(f"Tasemel {level} salvestatakse kõik leheküljed mustvalgelt, JPEG seadeid pole vaja häälestada")
+            continue
+        eligible = [c for c in (summarize(scale, quality, item, pages) for (scale, quality), item in sorted(totals.items()))
+                    if c["ssim_mean"] >= target]
+        if not eligible:
+            print(f"Hoiatus: tasemel {level} ei saavutanud ükski kombinatsioon SSIM {target}")
+            continue
+        best = min(eligible, key=lambda c: c["bytes_per_page"])
+        recommended[str(level)] = {"scale": best["scale"], "jpeg_quality": best["jpeg_quality"]}
+        print(f"tase {level}: skaala {best['scale']}, JPEG {best['jpeg_quality']} "
+              f"-> {best['bytes_per_page'] / 1024:.1f} KB/lk, SSIM {best['ssim_mean']:.4f} (siht {target})")
+
+    return candidates, recommended
+
+
+def legacy_is_kvitung(image_path, image):
+    """Varasem kviitungi tuvastus (failinimi, kõrguse ja laiuse suhe, heledus) võrdluseks
+
+    Args:
+        image_path: Pildi tee
+        image: Dekodeeritud pilt (BGR või hallskaala)
+
+    Returns:
+        bool: True, kui varasem heuristika oleks valinud kviitungi töötluse
+    """
+    filename = os.path.basename(image_path).lower()
+    if "kvit" in filename or "arve" in filename or "tsek" in filename or "tšek" in filename:
+        return True
+    h, w = image.shape[:2]
+    if h / w > 1.5:
+        return True
+    gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return np.mean(gray) > 180
+
+
+def load_page_labels(corpus_dir, labels_path=None):
+    """Leia korpuse piltide lehekülje tüübid
+
+    Märgendid võetakse JSON-failist ({"pilt.jpg": "receipt", ...}), kausta nimest
+    (korpus/receipt/pilt.jpg) või sünteetilise dokumendi nime eesliitest
+    (receipt_2mp_s0.jpg, vt synthetic_docs.py).
+
+    Args:
+        corpus_dir: Pildikaust
+        labels_path: Valikuline märgendite JSON-fail
+
+    Returns:
+        Dict {pildi tee: lehekülje tüüp}
+    """
+    explicit = {}
+    if labels_path:
+        with open(labels_path, 'r', encoding='utf-8') as f:
+            explicit = json.load(f)
+
+    labels = {}
+    for root, _, files in os.walk(corpus_dir):
+        for name in sorted(files):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, corpus_dir)
+            folder = os.path.basename(root)
+            kind = name.split("_", 1)[0]
+            if relative in explicit or name in explicit:
+                label = explicit.get(relative, explicit.get(name))
+            elif folder in PAGE_TYPES:
+                label = folder
+            elif kind in KIND_PAGE_TYPES:
+                label = KIND_PAGE_TYPES[kind]
+            else:
+                continue
+            if label not in PAGE_TYPES:
+                raise ValueError(f"Tundmatu lehekülje tüüp {label} pildil {relative}")
+            labels[path] = label
+    return labels
+
+
+def _confusion_matrix(pairs):
+    """Koosta segadusmaatriks paaridest (tegelik tüüp, tuvastatud tüüp)"""
+    matrix = {actual: {predicted: 0 for predicted in PAGE_TYPES} for actual in PAGE_TYPES}
+    for actual, predicted in pairs:
+        matrix[actual][predicted] += 1
+    return matrix
+
+
+def run_router_benchmark(corpus_dir, labels_path=None, optimization_level=2, timing=True):
+    """Hinda lehekülje tüübi tuvastuse täpsust ja tüübipõhise töötluse ajasäästu
+
+    Varasem heuristika valis kviitungi töötluse failinime, kuju ja heleduse
+    järgi ning kõik ülejäänud leheküljed said täieliku parandamise ("photo").
+    Ajasäästu mõõtmiseks töödeldakse iga lehekülg mõlema valikuga. Varasema
+    heuristika täpsus arvutatakse sama valiku järgi, millega selle aega mõõdetakse.
+
+    Args:
+        corpus_dir: Märgendatud pildikaust
+        labels_path: Valikuline märgendite JSON-fail
+        optimization_level: Optimeerimise tase
+        timing: Kas mõõta ka töötlusaega (aeglane)
+
+    Returns:
+        Dict tulemustega
+    """
+    labels = load_page_labels(corpus_dir, labels_path)
+    if not labels:
+        raise ValueError(f"Kaustas {corpus_dir} pole märgendatud pilte")
+
+    with redirect_stdout(io.StringIO()):
+        processor = DocumentProcessor(use_ai=False)
+
+    pages = []
+    for image_path, label in sorted(labels.items()):
+        preview = processor._read_image(image_path, min_side=ANALYSIS_WIDTH)
+        start = time.perf_counter()
+        predicted, features = processor._classify_page(preview)
+        classify_s = time.perf_counter() - start
+        # Varasem heuristika eristas ainult kviitungeid, ülejäänud said täieliku parandamise
+        legacy_route = "receipt" if legacy_is_kvitung(image_path, preview) else "photo"
+
+        page = {
+            "image": os.path.relpath(image_path, corpus_dir),
+            "label": label,
+            "predicted": predicted,
+            "legacy_predicted": legacy_route,
+            "classify_s": classify_s,
+            "features": features
+        }
+        if timing:
+            with redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                # Tuvastus kuulub tüübipõhise töötluse aja sisse
+                processor._process_page(image_path, optimization_level=optimization_level)
+                page["routed_s"] = time.perf_counter() - start
+                start = time.perf_counter()
+                processor._process_page(image_path, optimization_level=optimization_level, page_type=legacy_route)
+                page["legacy_s"] = time.perf_counter() - start
+        pages.append(page)
+
+        marker = "" if predicted == label else "  <- vale"
+        print(f"{page['image']:<32} {label:<8} -> {predicted:<8} (varem {page['legacy_predicted']}){marker}")
+
+    accuracy = statistics.mean(p["predicted"] == p["label"] for p in pages)
+    legacy_accuracy = statistics.mean(p["legacy_predicted"] == p["label"] for p in pages)
+    summary = {
+        "pages": len(pages),
+        "accuracy": accuracy,
+        "legacy_accuracy": legacy_accuracy,
+        "classify_mean_s": statistics.mean(p["classify_s"] for p in pages),
+        "confusion": _confusion_matrix((p["label"], p["predicted"]) for p in pages)
+    }
+    print(f"Täpsus: {accuracy:.1%} (varasem heuristika {legacy_accuracy:.1%}), "
+          f"tuvastus keskmiselt {summary['classify_mean_s'] * 1000:.1f} ms/lk")
+
+    if timing:
+        routed = sum(p["routed_s"] for p in pages)
+        legacy = sum(p["legacy_s"] for p in pages)
+        summary.update({
+            "routed_total_s": routed,
+            "legacy_total_s": legacy,
+            "time_saved_s": legacy - routed,
+            "time_saved_share": (legacy - routed) / legacy if legacy else 0.0
+        })
+        print(f"Töötlusaeg: {routed:.2f} s (varem {legacy:.2f} s), säästetud {summary['time_saved_share']:.1%}")
+
+    return {
+        "benchmark": "router",
+        "environment": _environment(),
+        "config": {
+            "corpus": os.path.abspath(corpus_dir),
+            "labels": labels_path,
+            "optimization_level": optimization_level
+        },
+        "summary": summary,
+        "pages": pages
+    }
+
+
+def run_ocr_benchmark(corpus_dir, profiles, lang="est"):
+    """Mõõda OCR-i kiirusprofiilide aega lehekülje kohta ja täpsust
+
+    Args:
+        corpus_dir: Pildikaust (tegelik tekst võib olla failides <nimi>.gt.txt)
+        profiles: OCR profiilide nimed (OCR_PROFILES võtmed)
+        lang: OCR keele kood
+
+    Returns:
+        Dict tulemustega
+    """
+    if not _tesseract_available():
+        raise RuntimeError("Tesseract OCR pole paigaldatud, OCR profiile ei saa mõõta")
+
+    image_paths = _corpus_images(corpus_dir)
+    if not image_paths:
+        raise ValueError(f"Kaustas {corpus_dir} pole pilte")
+
+    results = []
+    for profile in profiles:
+        with redirect_stdout(io.StringIO()):
+            processor = DocumentProcessor(use_ai=False, ocr_profile=profile)
+
+        pages = []
+        for image_path in image_paths:
+            with redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                text = processor.ocr_document(image_path, lang=lang)
+                elapsed = time.perf_counter() - start
+            page = {"image": os.path.relpath(image_path, corpus_dir), "seconds": elapsed}
+            expected = _ground_truth(image_path)
+            if expected is not None:
+                page["ocr_char_agreement"] = char_agreement(expected, text)
+            pages.append(page)
+
+        scored = [p["ocr_char_agreement"] for p in pages if "ocr_char_agreement" in p]
+        result = {
+            "profile": profile,
+            "settings": OCR_PROFILES[profile],
+            "pages": len(pages),
+            "seconds_per_page": statistics.mean(p["seconds"] for p in pages),
+            "ocr_char_agreement": statistics.mean(scored) if scored else None,
+            "page_results": pages
+        }
+        results.append(result)
+
+        accuracy = f", täpsus {result['ocr_char_agreement']:.1%}" if scored else ""
+        print(f"{profile:<10} {result['seconds_per_page']:.2f} s/lk{accuracy}")
+
+    return {
+        "benchmark": "ocr",
+        "environment": _environment(),
+        "config": {
+            "corpus": os.path.abspath(corpus_dir),
+            "profiles": profiles,
+            "lang": lang
+        },
+        "results": results
+    }
+
+
+def _corpus_texts(corpus_dir):
+    """Leia korpuse kaustast (ka alamkaustadest) tekstifailid ja loe nende sisu"""
+    texts = []
+    for root, _, names in os.walk(corpus_dir):
+        for name in sorted(names):
+            if name.lower().endswith(".txt"):
+                with open(os.path.join(root, name), 'r', encoding='utf-8') as f:
+                    texts.append((os.path.relpath(os.path.join(root, name), corpus_dir), f.read()))
+    return sorted(texts)
+
+
+def run_parse_benchmark(corpus_dir=None, documents=200, lines=60, repeat=5, seed=0):
+    """Mõõda arve väljade parsimise (_parse_invoice_data) kiirust
+
+    Args:
+        corpus_dir: Tekstifailide (*.txt, nt --text väljund või <nimi>.gt.txt) kaust;
+            None korral kasutatakse sünteetilisi arvetekste
+        documents: Sünteetiliste tekstide arv
+        lines: Ridade arv sünteetilises tekstis
+        repeat: Mõõdetud korduste arv
+        seed: Sünteetiliste tekstide esimene seeme
+
+    Returns:
+        Dict tulemustega
+    """
+    if corpus_dir:
+        texts = _corpus_texts(corpus_dir)
+        if not texts:
+            raise ValueError(f"Kaustas {corpus_dir} pole tekstifaile")
+    else:
+        texts = [(f"synthetic_{seed + i}", generate_invoice_text(lines, seed=seed + i)) for i in range(documents)]
+
+    with redirect_stdout(io.StringIO()):
+        processor = DocumentProcessor(use_ai=False)
+
+    # Soojendus ja leitud väljade loendamine
+    found = {}
+    for _, text in texts:
+        data = processor._parse_invoice_data(text, None)
+        for key, value in data.items():
+            if value:
+                found[key] = found.get(key, 0) + 1
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _, text in texts:
+            processor._parse_invoice_data(text, None)
+        timings.append(time.perf_counter() - start)
+
+    characters = sum(len(text) for _, text in texts)
+    median = statistics.median(timings)
+    result = {
+        "documents": len(texts),
+        "characters": characters,
+        "median_s": median,
+        "ms_per_document": median / len(texts) * 1000,
+        "mb_per_s": characters / median / 1e6 if median > 0 else None,
+        "fields_found": found
+    }
+    print(f"{len(texts)} dokumenti, {result['ms_per_document']:.3f} ms dokumendi kohta, "
+          f"{result['mb_per_s']:.2f} MB/s")
+
+    return {
+        "benchmark": "parse",
+        "environment": _environment(),
+        "config": {
+            "corpus": os.path.abspath(corpus_dir) if corpus_dir else None,
+            "documents": len(texts),
+            "lines": None if corpus_dir else lines,
+            "repeat": repeat,
+            "seed": seed
+        },
+        "results": result
+    }
+
+
+def compare_results(previous, current):
+    """Prindi kahe mõõtmise mediaankestuste võrdlus
+
+    Args:
+        previous: Varasema mõõtmise tulemused
+        current: Praeguse mõõtmise tulemused
+    """
+    old = {(r["document"], r["stage"]): r["median_s"] for r in previous.get("results", [])}
+    print()
+    print(f"Võrdlus: {previous.get('environment', {}).get('commit')} -> {current.get('environment', {}).get('commit')}")
+    print(f"{'dokument':<16} {'etapp':<34} {'vana ms':>10} {'uus ms':>10} {'muutus':>9}")
+    for result in current["results"]:
+        key = (result["document"], result["stage"])
+        if key not in old:
+            continue
+        before, after = old[key], result["median_s"]
+        change = (after - before) / before * 100 if before > 0 else 0.0
+        print(f"{key[0]:<16} {key[1]:<34} {before * 1000:10.2f} {after * 1000:10.2f} {change:+8.1f}%")
+
+
+def _parse_list(value, convert=str):
+    """Teisenda komaga eraldatud loend listiks"""
+    return [convert(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def main():
+    """Põhifunktsioon"""
+    parser = argparse.ArgumentParser(description='Fotod PDFiks jõudlustestid')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    stages = subparsers.add_parser('stages', help='Mõõda DocumentProcessor etappe sünteetilistel dokumentidel')
+    stages.add_argument('--output', default='benchmark_stages.json', help='Tulemuste JSON-fail (vaikimisi: benchmark_stages.json)')
+    stages.add_argument('--kinds', default=",".join(DOCUMENT_KINDS), help='Dokumenditüübid komaga eraldatult')
+    stages.add_argument('--sizes', default='2,8', help='Pildi suurused megapikslites (vaikimisi: 2,8)')
+    stages.add_argument('--repeat', type=int, default=3, help='Mõõdetud korduste arv (vaikimisi: 3)')
+    stages.add_argument('--warmup', type=int, default=1, help='Soojenduskorduste arv (vaikimisi: 1)')
+    stages.add_argument('--seed', type=int, default=0, help='Sünteetiliste dokumentide seeme (vaikimisi: 0)')
+    stages.add_argument('--optimize', type=int, default=2, choices=[0, 1, 2, 3], help='Optimeerimise tase (vaikimisi: 2)')
+    stages.add_argument('--use-ai', action='store_true', help='Mõõda ka AI-põhist tausta eemaldamist')
+    stages.add_argument('--no-ocr', action='store_true', help='Ära mõõda OCR-i kasutavaid meetodeid')
+    stages.add_argument('--stages', help='Mõõda ainult neid etappe (komaga eraldatult)')
+    stages.add_argument('--compare', help='Varasema mõõtmise JSON-fail võrdluseks')
+
+    corpus = subparsers.add_parser('corpus', help='Käivita kogu töövoog pildikaustal ja mõõda kiirust, mahtu ning kvaliteeti')
+    corpus.add_argument('--corpus', required=True, help='Pildikaust (tegelik tekst võib olla failides <nimi>.gt.txt)')
+    corpus.add_argument('--output', default='benchmark_corpus.json', help='Tulemuste JSON-fail (vaikimisi: benchmark_corpus.json)')
+    corpus.add_argument('--levels', default='0,1,2,3', help='Optimeerimistasemed (vaikimisi: 0,1,2,3)')
+    corpus.add_argument('--ai', default='off', choices=['off', 'on', 'both'],
+                        help='AI-põhine tausta eemaldamine: off, on või both (vaikimisi: off)')
+    corpus.add_argument('--dpi', type=int, default=300, help='Väljund-PDF-i DPI (vaikimisi: 300)')
+    corpus.add_argument('--lang', default='est', help='OCR keele kood (vaikimisi: est)')
+    corpus.add_argument('--no-ocr', action='store_true', help='Ära hinda OCR-i täpsust')
+    corpus.add_argument('--optimization-profiles', help='Hinda neid optimeerimistasemete seadeid (JSON-fail)')
+    corpus.add_argument('--tune', action='store_true', help='Häälesta optimeerimistasemete skaala ja JPEG kvaliteet')
+    corpus.add_argument('--scales', default='1.0,0.9,0.8,0.7,0.6,0.5,0.4', help='--tune skaleerimistegurid')
+    corpus.add_argument('--qualities', default='95,90,85,80,75,70,65,60,50', help='--tune JPEG kvaliteedid')
+    corpus.add_argument('--ssim-targets', default=",".join(str(DEFAULT_SSIM_TARGETS[level]) for level in sorted(DEFAULT_SSIM_TARGETS)),
+                        help='--tune SSIM sihtväärtused tasemetele 0-3 (vaikimisi: 0.98,0.95,0.9,0.85)')
+    corpus.add_argument('--write-profiles', help='Salvesta soovitatud seaded faili (kasutatav --optimization-profiles abil)')
+
+    router = subparsers.add_parser('router', help='Hinda lehekülje tüübi tuvastust märgendatud pildikaustal')
+    router.add_argument('--corpus', required=True,
+                        help='Pildikaust; märgendid kausta nimest, failinime eesliitest või --labels failist')
+    router.add_argument('--labels', help='JSON-fail kujul {"pilt.jpg": "receipt", ...}')
+    router.add_argument('--output', default='benchmark_router.json', help='Tulemuste JSON-fail (vaikimisi: benchmark_router.json)')
+    router.add_argument('--optimize', type=int, default=2, choices=[0, 1, 2, 3], help='Optimeerimise tase (vaikimisi: 2)')
+    router.add_argument('--no-timing', action='store_true', help='Hinda ainult täpsust, ära mõõda töötlusaega')
+
+    ocr = subparsers.add_parser('ocr', help='Mõõda OCR-i kiirusprofiilide aega ja täpsust pildikaustal')
+    ocr.add_argument('--corpus', required=True, help='Pildikaust (tegelik tekst võib olla failides <nimi>.gt.txt)')
+    ocr.add_argument('--profiles', default=",".join(OCR_PROFILES),
+                     help=f'OCR profiilid komaga eraldatult (vaikimisi: {",".join(OCR_PROFILES)})')
+    ocr.add_argument('--lang', default='est', help='OCR keele kood (vaikimisi: est)')
+    ocr.add_argument('--output', default='benchmark_ocr.json', help='Tulemuste JSON-fail (vaikimisi: benchmark_ocr.json)')
+
+    parse = subparsers.add_parser('parse', help='Mõõda arve väljade parsimise kiirust OCR tekstidel')
+    parse.add_argument('--corpus', help='Tekstifailide (*.txt) kaust; vaikimisi sünteetilised arvetekstid')
+    parse.add_argument('--documents', type=int, default=200, help='Sünteetiliste tekstide arv (vaikimisi: 200)')
+    parse.add_argument('--lines', type=int, default=60, help='Ridade arv sünteetilises tekstis (vaikimisi: 60)')
+    parse.add_argument('--repeat', type=int, default=5, help='Mõõdetud korduste arv (vaikimisi: 5)')
+    parse.add_argument('--seed', type=int, default=0, help='Sünteetiliste tekstide seeme (vaikimisi: 0)')
+    parse.add_argument('--output', default='benchmark_parse.json', help='Tulemuste JSON-fail (vaikimisi: benchmark_parse.json)')
+
+    args = parser.parse_args()
+
+    if args.command == 'stages':
+        if args.repeat < 1:
+            parser.error("--repeat peab olema vähemalt 1")
+        report = run_stage_benchmark(
+            _parse_list(args.kinds),
+            _parse_list(args.sizes, float),
+            repeat=args.repeat,
+            warmup=args.warmup,
+            seed=args.seed,
+            optimization_level=args.optimize,
+            use_ai=args.use_ai,
+            ocr=not args.no_ocr,
+            stage_filter=set(_parse_list(args.stages)) if args.stages else None
+        )
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Tulemused salvestatud: {args.output}")
+
+        if args.compare:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                compare_results(json.load(f), report)
+
+    elif args.command == 'corpus':
+        if args.optimization_profiles:
+            # Kontrolli faili kehtivust enne pikka mõõtmist
+            load_optimization_profiles(args.optimization_profiles)
+
+        ai_modes = {"off": [False], "on": [True], "both": [False, True]}[args.ai]
+        if True in ai_modes and not REMBG_AVAILABLE:
+            print("Hoiatus: rembg pole saadaval, AI-põhist tausta eemaldamist ei mõõdeta")
+            ai_modes = [False]
+
+        report = {
+            "benchmark": "corpus",
+            "environment": _environment(),
+            "config": {
+                "corpus": os.path.abspath(args.corpus),
+                "levels": _parse_list(args.levels, int),
+                "ai_modes": ai_modes,
+                "dpi": args.dpi,
+                "lang": args.lang,
+                "optimization_profiles": args.optimization_profiles
+            },
+            "results": run_corpus_benchmark(
+                args.corpus,
+                _parse_list(args.levels, int),
+                ai_modes,
+                dpi=args.dpi,
+                lang=args.lang,
+                ocr=not args.no_ocr,
+                profiles_path=args.optimization_profiles
+            )
+        }
+
+        if args.tune:
+            targets = dict(zip(range(4), _parse_list(args.ssim_targets, float)))
+            candidates, recommended = tune_profiles(
+                args.corpus,
+                _parse_list(args.scales, float),
+                _parse_list(args.qualities, int),
+                targets,
+                use_ai=ai_modes[-1]
+            )
+            report["tuning"] = {"ssim_targets": targets, "candidates": candidates}
+            report["recommended_profiles"] = recommended
+            if args.write_profiles:
+                with open(args.write_profiles, 'w', encoding='utf-8') as f:
+                    json.dump(recommended, f, indent=2)
+                print(f"Soovitatud seaded salvestatud: {args.write_profiles}")
+
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Tulemused salvestatud: {args.output}")
+
+    elif args.command == 'router':
+        report = run_router_benchmark(args.corpus, labels_path=args.labels, optimization_level=args.optimize,
+                                      timing=not args.no_timing)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Tulemused salvestatud: {args.output}")
+
+    elif args.command == 'ocr':
+        profiles = _parse_list(args.profiles)
+        unknown = [profile for profile in profiles if profile not in OCR_PROFILES]
+        if unknown:
+            parser.error(f"Tundmatud OCR profiilid: {', '.join(unknown)}")
+        report = run_ocr_benchmark(args.corpus, profiles, lang=args.lang)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Tulemused salvestatud: {args.output}")
+
+    elif args.command == 'parse':
+        if args.repeat < 1:
+            parser.error("--repeat peab olema vähemalt 1")
+        report = run_parse_benchmark(args.corpus, documents=args.documents, lines=args.lines,
+                                     repeat=args.repeat, seed=args.seed)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Tulemused salvestatud: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,6 @@ from skimage.filters import threshold_local
 import os
 from PIL import Image, ImageEnhance
 import pytesseract
-import img2pdf
 import importlib.util
 import sys
 import tempfile
@@ -13,7 +12,14 @@ import re
 import json
 import csv
 import warnings
-from pdf2image import convert_from_path, convert_from_bytes
+import zlib
+import hashlib
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from pdf2image import convert_from_path, convert_from_bytes, pdfinfo_from_path
+from pdf_writer import StreamingPdfWriter, PAGE_OBJECT_BYTES, PAGE_CLOSING_BYTES, TRAILER_BYTES
+from invoice_templates import TEMPLATE_FIELDS, TEMPLATE_HEADER_FRACTION, field_region, parse_field
+from ledger_writer import INVOICE_CSV_HEADERS, ITEM_CSV_HEADERS, CSV_DELIMITER, invoice_csv_row, item_csv_row
 
 # Proovi laadida lzma_fix, mis asendab puuduva _lzma mooduli
 try:
@@ -33,40 +39,474 @@ if REMBG_AVAILABLE:
 else:
     print("rembg teeki ei leitud - kasutatakse tavalist töötlust")
 
+# Optimeerimistasemete seaded:
+# scale - pildi skaleerimistegur, jpeg_quality - JPEG kvaliteet,
+# max_dpi - PDF-i DPI ülempiir (None = piiranguta),
+# grayscale - teisenda kõik leheküljed hallskaalasse (muidu valitakse värviline või
+# hallskaala lehekülje sisu järgi), bilevel - salvesta halltoonideta leheküljed mustvalgelt
+# (1 bitt pikslis)
+# Väärtusi saab häälestada `benchmark.py corpus --tune` tulemuste põhjal
+OPTIMIZATION_PROFILES = {
+    0: {"scale": 1.0, "jpeg_quality": 100, "max_dpi": None, "grayscale": False, "bilevel": False},
+    1: {"scale": 0.8, "jpeg_quality": 90, "max_dpi": None, "grayscale": False, "bilevel": False},
+    2: {"scale": 0.6, "jpeg_quality": 80, "max_dpi": 300, "grayscale": False, "bilevel": True},
+    3: {"scale": 0.4, "jpeg_quality": 65, "max_dpi": 200, "grayscale": False, "bilevel": True}
+}
+
+# Analüüsietappide (kviitungi ja kontuuri tuvastus) tööpildi laius
+ANALYSIS_WIDTH = 1000
+
+# Paberiformaatide laiused millimeetrites lehekülje füüsilise suuruse hindamiseks
+A4_WIDTH_MM = 210.0
+A4_HEIGHT_MM = 297.0
+KVITUNG_WIDTH_MM = 80.0
+MM_PER_INCH = 25.4
+
+# Kõrguse ja laiuse suhe, millest alates loetakse dokument kviitungipaberiks
+KVITUNG_PAPER_ASPECT = 2.0
+
+# Originaal-JPEG-i säilitamine (vt DocumentProcessor._passthrough_jpeg): paberi minimaalne
+# laius ja kõrgus kaadri suhtes, mille korral pilti ei ole vaja sirgestada, ning
+# tekstilehekülje minimaalne tekstijoonte kontrast, mille korral parandamine pole vajalik.
+# Värvilise pildi serva riba (osakaal lühemast küljest) peab olema paberi moodi värvitu:
+# heledat tausta ei erista paberist heleduse, vaid ainult küllastuse järgi
+PASSTHROUGH_MIN_PAPER = 0.97
+PASSTHROUGH_MIN_CONTRAST = 170.0
+PASSTHROUGH_EDGE = 0.02
+PASSTHROUGH_MAX_EDGE_SATURATION = 25
+
+# EXIF-i orientatsiooni silt
+EXIF_ORIENTATION_TAG = 274
+
+# Mahupiiranguga režiimi (--max-size) sammud parimast halvimani: (skaala, JPEG kvaliteet)
+SIZE_BUDGET_STEPS = [
+    (1.0, 95), (1.0, 90), (1.0, 85), (1.0, 80), (1.0, 75),
+    (0.85, 75), (0.85, 70), (0.7, 70), (0.7, 65), (0.6, 60),
+    (0.5, 55), (0.4, 50), (0.3, 45), (0.25, 40)
+]
+
+# Proovikodeerimiseks kasutatava vähendatud koopia laius
+BUDGET_PROXY_WIDTH = 640
+
+# Värvilisuse tuvastus: pisipildi laius, Lab värvuse lävi ja värviliste pikslite
+# minimaalne osakaal (väike tempel või logo on juba värviline sisu)
+COLOR_THUMBNAIL_WIDTH = 256
+COLOR_CHROMA_THRESHOLD = 18.0
+COLOR_MIN_FRACTION = 0.002
+
+# Mustvalge lehekülje tuvastus: valimi laius ja halltoonide maksimaalne osakaal
+BILEVEL_SAMPLE_WIDTH = 800
+BILEVEL_MAX_MIDTONES = 0.03
+
+# Lehekülje tüübid (vt DocumentProcessor._classify_page):
+# receipt - kviitung (binariseerimine), text - tekstilehekülg, photo - fotode või
+# joonistega lehekülg (täielik parandamine), blank - tühi lehekülg (parandamiseta)
+PAGE_TYPES = ["receipt", "text", "photo", "blank"]
+
+# Lehekülje tüübi tuvastuse pisipildi laius ja lävendid
+ROUTER_THUMBNAIL_WIDTH = 400
+BLANK_MAX_INK = 0.01
+BLANK_MAX_FILL = 0.05
+PHOTO_MIN_FILL = 0.25
+# Hallskaala fotode tuvastus tekstilehekülje sees: paberist vähemalt ROUTER_REGION_MARGIN
+# võrra tumedamad alad, mis jäävad alles pärast avamist ROUTER_REGION_KERNEL suuruse
+# tuumaga (tekstiread kaovad, ühtsed pinnad jäävad), ja nende minimaalne osakaal
+ROUTER_REGION_KERNEL = 7
+ROUTER_REGION_MARGIN = 50
+PHOTO_MIN_REGIONS = 0.04
+
+# Korduvate lehekülgede tuvastus: tajuräsi (pHash) arvutatakse DCT madalatest
+# sagedustest PHASH_SIZE x PHASH_SIZE, pisipildilt laiusega PHASH_RESIZE.
+# Sõrmejälje räsi arvutatakse sirgestatud paberilt ilma servadeta (PHASH_PAPER_MARGIN
+# paberi lühema külje suhtes), et foto taust ja paberi asend räsi ei mõjutaks.
+# Lehekülg loetakse koopiaks, kui räsid erinevad kuni DUPLICATE_MAX_DISTANCE biti võrra
+# (sünteetilistel fotodel erinesid sama lehe pildistused 2-12, eri lehed vähemalt 44 bitti)
+PHASH_SIZE = 16
+PHASH_RESIZE = 64
+PHASH_PAPER_MARGIN = 0.03
+DUPLICATE_MAX_DISTANCE = 24
+
+# Paberi kumera ümbrise lähendamine nelinurgaks: approxPolyDP täpsused ümbermõõdu suhtes
+PAPER_QUAD_EPSILONS = [0.02, 0.04, 0.06, 0.08]
+
+# OCR-i eeltöötlus (vt DocumentProcessor._prepare_for_ocr): paberi resolutsioon, mille
+# juures on tavalise kirja tähed Tesseracti jaoks sobiva kõrgusega, ning binariseerimise
+# adaptiivse läve akna suurus ja nihe
+OCR_DPI = 300
+OCR_BINARIZE_BLOCK = 31
+OCR_BINARIZE_C = 15
+
+# Teksti kõrguse normaliseerimine: Tesseract on kiireim ja täpseim, kui tähemärgid on
+# umbes OCR_TEXT_HEIGHT pikslit kõrged. Lehekülge skaleeritakse ainult siis, kui
+# tüüpiline tähemärgi kõrgus jääb lubatud vahemikust välja
+OCR_TEXT_HEIGHT = 30
+OCR_MIN_TEXT_HEIGHT = 20
+OCR_MAX_TEXT_HEIGHT = 40
+OCR_MAX_UPSCALE = 2.5
+# Tähemärkideks loetavate komponentide piirid ja vähim arv usaldusväärseks hinnanguks
+GLYPH_MIN_HEIGHT = 6
+GLYPH_MAX_HEIGHT = 200
+GLYPH_MIN_COUNT = 20
+
+# OCR-i kiirusprofiilid: psm - Tesseracti lehekülje segmenteerimise režiim (11 = hõre
+# tekst ilma paigutuse analüüsita, 6 = üks tekstiplokk, 3 = automaatne paigutus),
+# oem - OCR mootor (1 = LSTM), models - treeningandmete komplekt ("fast" = tessdata_fast,
+# "best" = tessdata_best, None = paigaldatud vaikemudelid)
+OCR_PROFILES = {
+    "fast": {"psm": 11, "oem": 1, "models": "fast"},
+    "balanced": {"psm": 6, "oem": 1, "models": None},
+    "accurate": {"psm": 3, "oem": 1, "models": "best"}
+}
+DEFAULT_OCR_PROFILE = "balanced"
+
+# Lehekülje paralleelne OCR (vt DocumentProcessor._split_ocr_blocks): tekstiread leitakse
+# tindi laiendamisel OCR_BLOCK_JOIN_WIDTH x OCR_BLOCK_JOIN_HEIGHT aknaga, nii et sama rea
+# sõnad liituvad, kuid järjestikused read jäävad eraldi
+OCR_BLOCK_JOIN_WIDTH = 2 * OCR_TEXT_HEIGHT
+OCR_BLOCK_JOIN_HEIGHT = 3
+# Tekstireast kõrgemad komponendid (raamid, püstjooned, logod, fotod) ei osale ridade
+# leidmisel, kuid plokkide piirid ei lõika neid läbi
+OCR_BLOCK_MAX_LINE_HEIGHT = 4 * OCR_TEXT_HEIGHT
+
+# Valikuline täpsustav OCR (vt DocumentProcessor._run_ocr_refined): esmalt tuvastatakse
+# vähendatud lehekülg, seejärel tuvastatakse uuesti täisresolutsioonis ainult read, milles
+# mõne sõna usaldusväärsus on alla OCR_REFINE_MIN_CONFIDENCE
+OCR_REFINE_SCALE = 0.6
+OCR_REFINE_MIN_CONFIDENCE = 70
+OCR_REFINE_PADDING = 6
+
+# Arve päiseväljad, mis otsitakse mitmeleheküljelisest PDF-ist (vt extract_structured_data_from_pdf).
+# Need asuvad tavaliselt esimesel või viimasel leheküljel, mistõttu vahepealseid lehekülgi
+# töödeldakse ainult arveridade eraldamiseks
+INVOICE_HEADER_FIELDS = [
+    "invoice_number",
+    "invoice_date",
+    "due_date",
+    "total_amount",
+    "tax_amount",
+    "supplier_name",
+    "supplier_reg_number"
+]
+
+# Arve päiseväljade mustrid (vt DocumentProcessor._parse_invoice_data). Kõik mustrid on
+# ühendatud üheks skanneriks, mis läbib teksti ühe korra: iga muster on eraldi nimega grupp
+# ettevaates (lookahead), seega ei varja ühe mustri vaste teise mustri vasteid. Skanner
+# töötab väiketähtedeks teisendatud tekstil ilma re.IGNORECASE liputa, mis on mitu korda
+# kiirem; väärtused võetakse algsest tekstist samast kohast
+INVOICE_FIELD_PATTERNS = [
+    # Arve number (otsime standardseid formaate)
+    r"(?:arve\s*nr|invoice\s*no|arve\s*number)[:\.\s]*(?P<invoice_number>[a-z0-9\-\/]+)",
+    r"(?:arve|invoice)[:\.\s]*(?P<invoice_number_fallback>[a-z0-9\-\/]+)",
+    # Kuupäevad
+    r"(?:kuupäev|date)[:\.\s]*(?P<labelled_date>\d{1,2}[\.\/\-]\d{1,2}[\.\/\-]\d{2,4})",
+    r"(?P<date>\d{1,2}[\.\/\-]\d{1,2}[\.\/\-]\d{2,4})",
+    # Summa
+    r"(?:summa|kokku|total)[:\.\s]*(?P<amount>\d+[,\.]\d{2})",
+    r"(?:summa|kokku|total)[:\.\s]*(?P<amount_integer>\d+)[€\s]",
+    r"€\s*(?P<amount_euro>\d+[,\.]\d{2})",
+    # Käibemaks
+    r"(?:käibemaks|km|vat)[:\.\s]*(?P<tax>\d+[,\.]\d{2})",
+    r"(?:käibemaks|km|vat)[:\.\s]*(?P<tax_integer>\d+)[€\s]",
+    # Tarnija nimi
+    r"(?:müüja|supplier|vendor)[:\.\s]*(?P<supplier>[^\n]+)",
+    # Registreerimiskood / VAT number
+    r"(?:reg\.\s*nr|registration\s*no|reg\s*code)[:\.\s]*(?P<reg_number>[a-z0-9]+)",
+    r"(?:kmkr|vat\s*no)[:\.\s]*(?P<vat_number>[a-z0-9]+)"
+]
+# Mustrite esimesed märgid: kiire eelkontroll jätab ülejäänud positsioonid vahele
+INVOICE_FIELD_FIRST_CHARS = "aikdstvmr€0-9"
+INVOICE_FIELD_SCANNER = re.compile(
+    f"(?=[{INVOICE_FIELD_FIRST_CHARS}])(?=" + "|".join(INVOICE_FIELD_PATTERNS) + ")")
+
+# Väljad ja neid täitvad mustrid prioriteedi järjekorras
+INVOICE_FIELD_PRIORITIES = {
+    "invoice_number": ["invoice_number", "invoice_number_fallback"],
+    "total_amount": ["amount", "amount_integer", "amount_euro"],
+    "tax_amount": ["tax", "tax_integer"],
+    "supplier_name": ["supplier"],
+    "supplier_reg_number": ["reg_number", "vat_number"]
+}
+
+# Arveread: read, milles on hind ja ühik, ning nende veerud, kogus ja hind
+INVOICE_ITEM_LINE = re.compile(r"^(?=[^\n]*\d+[,\.]\d{2})(?=[^\n]*\b(?:tk|pcs|kg|g|m|l)\b)[^\n]*", re.MULTILINE)
+ITEM_COLUMN_SEPARATOR = re.compile(r"\s{2,}")
+ITEM_QUANTITY_PATTERN = re.compile(r"(\d+(?:[,\.]\d+)?)\s*(?:tk|pcs|kg|g|m|l)")
+ITEM_PRICE_PATTERN = re.compile(r"(\d+[,\.]\d{2})")
+
+# Makse QR-kood või vöötkood (vt DocumentProcessor._decode_payment_code): koodi otsimiseks
+# dekodeeritakse pilt JPEG-i vähendusteguriga (2, 4 või 8) nii, et lühem külg oleks vähemalt
+# PAYMENT_CODE_MIN_SIDE pikslit. Täisresolutsioonis dekodeeritakse pilt ainult siis, kui kood
+# leiti, kuid selle sisu ei õnnestunud lugeda.
+# Kui kood sisaldab kõiki PAYMENT_CODE_COMPLETE_FIELDS välju, jäetakse OCR vahele
+PAYMENT_CODE_MIN_SIDE = 1000
+PAYMENT_CODE_COMPLETE_FIELDS = ["invoice_number", "total_amount", "supplier_name", "supplier_iban"]
+
+# Virtuaalse viivakoodi (Soome pangaviivakood) pikkus numbrites
+VIRTUAL_BARCODE_LENGTH = 54
+
+# Keskkonnamuutujad, mis sisaldavad treeningandmete komplektide kaustu. Kui muutuja
+# pole määratud, kasutatakse paigaldatud vaikemudeleid
+TESSDATA_DIR_VARIABLES = {
+    "fast": "TESSDATA_FAST_DIR",
+    "best": "TESSDATA_BEST_DIR"
+}
+
+# Kvaliteedikontroll (vt DocumentProcessor.check_quality): režiimid, valimi laius ja lävendid.
+# Teravus on Laplace'i operaatori dispersioon, kontrast tekstijoonte tumedus paberi suhtes
+# (black-hat) ja ülevalgustus täiesti valgete pikslite osakaal
+QUALITY_GATE_MODES = ["off", "warn", "reject"]
+QUALITY_SAMPLE_WIDTH = 640
+QUALITY_MIN_SHARPNESS = 150.0
+QUALITY_MIN_CONTRAST = 40.0
+QUALITY_MAX_CLIPPED = 0.5
+
+# Kvaliteediprobleemide kirjeldused teadete jaoks
+QUALITY_ISSUES = {
+    "blurry": "udune",
+    "overexposed": "ülevalgustatud",
+    "low_contrast": "madala kontrastiga"
+}
+
+# Vähendatud dekodeerimise lipud: libjpeg skaleerib pildi juba DCT tasemel,
+# mistõttu on vähendatud eelvaate dekodeerimine mitu korda kiirem kui täissuuruses
+REDUCED_COLOR_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+REDUCED_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+}
+
+
+def load_optimization_profiles(path):
+    """Laadi optimeerimistasemete seaded JSON-failist
+    
+    Fail võib üle kirjutada ainult osa tasemetest või seadetest, ülejäänud
+    väärtused võetakse OPTIMIZATION_PROFILES vaikeväärtustest.
+    
+    Args:
+        path: JSON-faili tee kujul {"2": {"scale": 0.7, "jpeg_quality": 75}, ...}
+        
+    Returns:
+        Dict optimeerimistasemete seadetega
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        overrides = json.load(f)
+    
+    # Luba ka benchmark.py väljundit, kus seaded on võtme all "recommended_profiles"
+    overrides = overrides.get("recommended_profiles", overrides)
+    
+    profiles = {level: dict(settings) for level, settings in OPTIMIZATION_PROFILES.items()}
+    for level, settings in overrides.items():
+        level = int(level)
+        if level not in profiles:
+            raise ValueError(f"Tundmatu optimeerimistase: {level}")
+        unknown = set(settings) - set(profiles[level])
+        if unknown:
+            raise ValueError(f"Tundmatud seaded optimeerimistasemel {level}: {', '.join(sorted(unknown))}")
+        profiles[level].update(settings)
+    return profiles
+
+
+class ImageQualityError(ValueError):
+    """Pilt lükati kvaliteedikontrollis tagasi (vt DocumentProcessor.check_quality)"""
+    
+    def __init__(self, message, quality=None):
+        super().__init__(message)
+        self.quality = quality
+
+
 class DocumentProcessor:
     """Klass dokumendifotode töötlemiseks ja optimeerimiseks"""
     
-    def __init__(self, debug=False, use_ai=True):
+    def __init__(self, debug=False, use_ai=True, metrics=None, optimization_profiles=None,
+                 quality_gate="off", ocr_profile=DEFAULT_OCR_PROFILE, ocr_workers=1, ocr_refine=False,
+                 templates=None):
         """Initsialiseeri DocumentProcessor
         
         Args:
             debug (bool): Kui True, kuvatakse debug infot ja salvestatakse töötluse vaheetapid
             use_ai (bool): Kui True ja rembg on saadaval, kasutatakse AI-d tausta eemaldamiseks
+            metrics: Valikuline perf_metrics.StageMetrics objekt töötlusetappide mõõtmiseks
+            optimization_profiles: Valikulised optimeerimistasemete seaded (vaikimisi OPTIMIZATION_PROFILES)
+            quality_gate: Kvaliteedikontrolli režiim QUALITY_GATE_MODES hulgast: "off" (välja lülitatud),
+                "warn" (hoiata kasutuskõlbmatust pildist) või "reject" (lükka pilt tagasi)
+            ocr_profile: OCR-i kiirusprofiil OCR_PROFILES hulgast
+            ocr_workers: Paralleelsete OCR protsesside arv lehekülje kohta (1 = kogu lehekülg korraga)
+            ocr_refine: Kui True, tuvastatakse lehekülg vähendatult ja ainult ebakindlad read
+                täisresolutsioonis (vt _run_ocr_refined)
+            templates: Valikuline invoice_templates.SupplierTemplateStore korduvate tarnijate
+                väljade asukohtadega (vt _extract_with_template)
         """
+        if quality_gate not in QUALITY_GATE_MODES:
+            raise ValueError(f"Tundmatu kvaliteedikontrolli režiim: {quality_gate}")
+        if ocr_profile not in OCR_PROFILES:
+            raise ValueError(f"Tundmatu OCR profiil: {ocr_profile}")
         self.debug = debug
+        self.quality_gate = quality_gate
+        self.ocr_profile = ocr_profile
+        self.ocr_workers = max(1, ocr_workers)
+        self.ocr_refine = ocr_refine
+        self.templates = templates
         self.use_ai = use_ai and REMBG_AVAILABLE
+        self.metrics = metrics
+        self.optimization_profiles = optimization_profiles or OPTIMIZATION_PROFILES
         if self.use_ai:
             print("AI-põhine tausta eemaldamine lubatud")
         else:
             print("Kasutatakse klassikalist pilditöötlust tausta eemaldamiseks")
     
+    def _stage(self, name):
+        """Tagasta kontekstihaldur töötlusetapi mõõtmiseks
+        
+        Args:
+            name: Etapi nimi
+            
+        Returns:
+            Kontekstihaldur, mis mõõdab etappi või ei tee midagi, kui mõõdikud pole lubatud
+        """
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.stage(name)
+    
+    def _set_metrics_page(self, image_path):
+        """Seo järgmised mõõdetud etapid antud leheküljega"""
+        if self.metrics is not None:
+            self.metrics.set_page(image_path)
+    
+    def _read_image_size(self, image_path):
+        """Loe pildi mõõtmed failipäisest ilma pilti dekodeerimata
+        
+        Args:
+            image_path: Pildi tee
+            
+        Returns:
+            Tuple (laius, kõrgus) või None, kui päist ei õnnestunud lugeda
+        """
+        try:
+            with Image.open(image_path) as img:
+                return img.size
+        except Exception:
+            return None
+    
+    def _read_image(self, image_path, min_side=None, grayscale=False):
+        """Loe pilt failist, vajadusel vähendatud resolutsiooniga
+        
+        Args:
+            image_path: Pildi tee
+            min_side: Kui määratud, dekodeeritakse pilt suurima vähendusteguriga (2, 4 või 8),
+                mille korral pildi lühem külg on vähemalt nii pikk
+            grayscale: Kui True, dekodeeritakse pilt otse hallskaalasse
+            
+        Returns:
+            OpenCV pilt või None, kui pilti ei õnnestunud lugeda
+        """
+        factor = 1
+        if min_side:
+            size = self._read_image_size(image_path)
+            if size:
+                # Lühem külg ei sõltu EXIF-i pööramisest
+                short_side = min(size)
+                for candidate in (8, 4, 2):
+                    if short_side / candidate >= min_side:
+                        factor = candidate
+                        break
+        
+        flags = REDUCED_GRAYSCALE_FLAGS[factor] if grayscale else REDUCED_COLOR_FLAGS[factor]
+        return cv2.imread(image_path, flags)
+    
     def _resize_image(self, image, width=2000):
         """Muuda pildi suurust, säilitades pildisuhte
         
+        Pilti ainult vähendatakse: sihtlaiusest kitsamat pilti ei suurendata,
+        sest suurendamine ei lisa detaili, kuid suurendab mälu- ja ajakulu.
+        
         Args:
             image: OpenCV pilt
-            width: Sihtlaius
+            width: Maksimaalne laius
             
         Returns:
-            Muudetud suurusega pilt
+            Muudetud suurusega pilt või algne pilt, kui see on juba piisavalt kitsas
         """
         h, w = image.shape[:2]
+        if w <= width:
+            return image
         ratio = width / float(w)
         dim = (width, int(h * ratio))
-        resized = cv2.resize(image, dim, interpolation=cv2.INTER_CUBIC)
+        resized = cv2.resize(image, dim, interpolation=cv2.INTER_AREA)
         
         return resized
     
+    def _paper_width_inches(self, w, h):
+        """Hinda dokumendi füüsilist laiust tollides
+        
+        Pikad ja kitsad dokumendid loetakse kviitungipaberiks (80 mm), ülejäänud
+        A4 leheks (püsti või rõhtsalt). Kahtluse korral eeldatakse suuremat
+        paberit, et resolutsiooni ei vähendataks liiga palju.
+        
+        Args:
+            w: Dokumendi laius pikslites (pärast perspektiivi korrigeerimist)
+            h: Dokumendi kõrgus pikslites
+            
+        Returns:
+            Dokumendi laius tollides
+        """
+        if h / float(w) >= KVITUNG_PAPER_ASPECT:
+            width_mm = KVITUNG_WIDTH_MM
+        elif w > h:
+            width_mm = A4_HEIGHT_MM
+        else:
+            width_mm = A4_WIDTH_MM
+        return width_mm / MM_PER_INCH
+    
+    def _page_dpi_limit(self, dpi, optimization_level=2):
+        """Tagasta väljundlehekülje DPI ülempiir
+        
+        Args:
+            dpi: Soovitud väljundresolutsioon
+            optimization_level: Optimeerimise tase
+            
+        Returns:
+            DPI ülempiir
+        """
+        max_dpi = self.optimization_profiles[optimization_level]["max_dpi"]
+        return min(dpi, max_dpi) if max_dpi else dpi
+    
+    def _fit_to_paper(self, image, optimization_level=2, dpi=300, scale=None):
+        """Vähenda dokumendi pilti resolutsioonini, mida paberi suurus ja siht-DPI vajavad
+        
+        Dokumendi efektiivne resolutsioon (pikslit tolli kohta) arvutatakse pildi
+        laiuse ja hinnatud paberi laiuse järgi. Tööresolutsioon on väiksem kahest:
+        optimeerimisprofiili skaleeritud algresolutsioon ja siht-DPI. Pilti ei
+        suurendata kunagi.
+        
+        Args:
+            image: Dokumendi pilt
+            optimization_level: Optimeerimise tase
+            dpi: Soovitud väljundresolutsioon
+            scale: Skaleerimistegur, mis asendab profiili oma (nt mahupiiranguga režiimis)
+            
+        Returns:
+            Tuple (pilt, lehekülje DPI), kus lehekülje DPI annab PDF-is paberi suuruse
+        """
+        h, w = image.shape[:2]
+        paper_inches = self._paper_width_inches(w, h)
+        source_dpi = w / paper_inches
+        if scale is None:
+            scale = self.optimization_profiles[optimization_level]["scale"]
+        target_dpi = min(source_dpi * scale, self._page_dpi_limit(dpi, optimization_level))
+        
+        target_width = max(1, int(round(paper_inches * target_dpi)))
+        if target_width < w:
+            image = self._resize_image(image, width=target_width)
+        
+        return image, image.shape[1] / paper_inches
+    
     def _remove_background_with_ai(self, image):
         """Eemalda pildilt taust kasutades rembg (AI-põhine)
         
@@ -146,7 +586,7 @@ class DocumentProcessor:
             Dokumendi kontuur või None, kui kontuuri ei leitud
         """
         # Konverdi hallskaalasse ja paranda kontrasti
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # Rakenda mitut erinevat eeltöötlust tulemuste parandamiseks
         # 1. Meetod - Adaptiivne lävistamine kontrasti suurendamiseks
@@ -205,7 +645,7 @@ class DocumentProcessor:
             Dokumendi kontuur või None, kui kontuuri ei leitud
         """
         # Proovime taustavärvi eemaldamist
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # Leiame taustavärvi (eeldame, et see on pildi nurkades)
         h, w = gray.shape
@@ -314,6 +754,69 @@ class DocumentProcessor:
         
         return warped
     
+    def _is_colorful(self, image, mask=None):
+        """Kontrolli pisipildi põhjal, kas dokumendil on värvilist sisu (tempel, logo, joonis)
+        
+        Args:
+            image: Dokumendi pilt (BGR või hallskaala)
+            mask: Valikuline mask (mis tahes suuruses), mille sees värvilisust hinnatakse,
+                nt paberi ala ilma foto taustata
+            
+        Returns:
+            True, kui dokument vajab värvilist salvestamist
+        """
+        if len(image.shape) == 2:
+            return False
+        
+        thumbnail = self._resize_image(image, width=COLOR_THUMBNAIL_WIDTH)
+        lab = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2LAB).astype(np.float32)
+        a = lab[:, :, 1]
+        b = lab[:, :, 2]
+        if mask is not None:
+            th, tw = thumbnail.shape[:2]
+            mask = cv2.resize(mask.astype(np.uint8), (tw, th), interpolation=cv2.INTER_NEAREST) > 0
+            if mask.any():
+                a = a[mask]
+                b = b[mask]
+        
+        # Eemalda valgustuse värvivarjund: valdav (paberi) toon loetakse neutraalseks
+        chroma = np.hypot(a - np.median(a), b - np.median(b))
+        
+        return bool(np.mean(chroma > COLOR_CHROMA_THRESHOLD) > COLOR_MIN_FRACTION)
+    
+    def _is_bilevel(self, image):
+        """Kontrolli, kas hallskaala leheküljel on ainult must ja valge (nt tekst või kviitung)
+        
+        Args:
+            image: Töödeldud hallskaala pilt
+            
+        Returns:
+            True, kui lehekülje saab salvestada 1 bitiga piksli kohta
+        """
+        if len(image.shape) != 2:
+            return False
+        
+        # Hõre valim ilma interpolatsioonita, et servadele ei tekiks halltoone
+        step = max(1, image.shape[1] // BILEVEL_SAMPLE_WIDTH)
+        sample = image[::step, ::step]
+        midtones = np.mean((sample > 64) & (sample < 192))
+        
+        return midtones < BILEVEL_MAX_MIDTONES
+    
+    def _encode_bilevel(self, image):
+        """Kodeeri hallskaala pilt mustvalgeks PDF-i pildiks (1 bitt pikslis, FlateDecode)
+        
+        Args:
+            image: Hallskaala pilt
+            
+        Returns:
+            zlib-iga pakitud pildiandmed
+        """
+        _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # DeviceGray 1 bitiga: 1 = valge; iga rida täidetakse baidi piirini
+        packed = np.packbits(binary > 127, axis=1)
+        return zlib.compress(packed.tobytes(), 6)
+    
     def _enhance_document_for_kvitungs(self, image):
         """Paranda dokumendi kvaliteeti spetsiaalselt kviitungitele
         
@@ -324,7 +827,7 @@ class DocumentProcessor:
             Parandatud kvaliteediga pilt
         """
         # Konverdi hallskaalasse - see on parem kviitungite jaoks
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # Esimene meetod: adaptiivse läve rakendamine, hästi soome mustale tekstile valgel taustal
         try:
@@ -348,41 +851,57 @@ class DocumentProcessor:
         """Paranda dokumendi kvaliteeti
         
         Args:
-            image: OpenCV pilt
+            image: OpenCV pilt (BGR või hallskaala)
             
         Returns:
-            Parandatud kvaliteediga pilt
+            Parandatud kvaliteediga pilt samas värviruumis
         """
+        is_gray = len(image.shape) == 2
+        
         # Konverdi värviruumi ja eemaldame müra
         # Kasutame värviruumi säilitavat meetodit parema kvaliteedi saamiseks
-        denoised = cv2.fastNlMeansDenoisingColored(image, None, 10, 10, 7, 21)
-        
-        # Konverdi PIL formaati täiendavate paranduste jaoks
-        pil_image = Image.fromarray(cv2.cvtColor(denoised, cv2.COLOR_BGR2RGB))
-        
-        # Suurendame teravust
-        sharpener = ImageEnhance.Sharpness(pil_image)
-        sharpened = sharpener.enhance(2.0)  # Suurendame teravust 2x
-        
-        # Suurendame kontrasti
-        enhancer = ImageEnhance.Contrast(sharpened)
-        enhanced = enhancer.enhance(1.8)  # Suurendame kontrasti 1.8x
-        
-        # Parandame heledust
-        brightness = ImageEnhance.Brightness(enhanced)
-        brightened = brightness.enhance(1.1)  # Väike heleduse tõstmine
+        with self._stage("denoise"):
+            if is_gray:
+                # Ühe kanaliga pildi müra eemaldamine on ligikaudu 3x kiirem
+                denoised = cv2.fastNlMeansDenoising(image, None, 10, 7, 21)
+            else:
+                denoised = cv2.fastNlMeansDenoisingColored(image, None, 10, 10, 7, 21)
         
-        # Tagasta parandatud pilt OpenCV formaadis
-        result = cv2.cvtColor(np.array(brightened), cv2.COLOR_RGB2BGR)
+        with self._stage("enhance"):
+            # Konverdi PIL formaati täiendavate paranduste jaoks
+            if is_gray:
+                pil_image = Image.fromarray(denoised, mode="L")
+            else:
+                pil_image = Image.fromarray(cv2.cvtColor(denoised, cv2.COLOR_BGR2RGB))
+            
+            # Suurendame teravust
+            sharpener = ImageEnhance.Sharpness(pil_image)
+            sharpened = sharpener.enhance(2.0)  # Suurendame teravust 2x
+            
+            # Suurendame kontrasti
+            enhancer = ImageEnhance.Contrast(sharpened)
+            enhanced = enhancer.enhance(1.8)  # Suurendame kontrasti 1.8x
+            
+            # Parandame heledust
+            brightness = ImageEnhance.Brightness(enhanced)
+            brightened = brightness.enhance(1.1)  # Väike heleduse tõstmine
+            
+            # Tagasta parandatud pilt OpenCV formaadis
+            if is_gray:
+                result = np.array(brightened)
+            else:
+                result = cv2.cvtColor(np.array(brightened), cv2.COLOR_RGB2BGR)
         
         return result
     
-    def _optimize_image_for_pdf(self, image, optimization_level=2):
+    def _optimize_image_for_pdf(self, image, optimization_level=2, rescale=True):
         """Optimeeri pilti PDF-i suuruse vähendamiseks
         
         Args:
             image: OpenCV pilt
             optimization_level: Optimeerimise tase (0-3)
+            rescale: Kas rakendada profiili skaleerimistegurit (False, kui pilt on
+                juba _fit_to_paper abil sobivasse resolutsiooni viidud)
             
         Returns:
             Optimeeritud pilt
@@ -392,26 +911,21 @@ class DocumentProcessor:
         # 1 - Kerge optimeerimine
         # 2 - Keskmine optimeerimine (vaikimisi)
         # 3 - Tugev optimeerimine
+        profile = self.optimization_profiles[optimization_level]
         
         # Kontrolli, kas pilt on juba must-valge (1 kanal)
         if len(image.shape) == 2 or image.shape[2] == 1:
             # Must-valge piltide puhul ära rohkem konverteeri
             optimized = image
         else:
-            # Värviliste piltide puhul konverteeri hallskaalasse, kui optimeerimistase > 1
-            if optimization_level >= 2:
+            # Värviliste piltide puhul konverteeri hallskaalasse, kui tase seda ette näeb
+            if profile["grayscale"]:
                 optimized = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             else:
                 optimized = image
                 
         # Suuruse skaleerimine vastavalt optimeerimistasemele
-        scale_factor = 1.0
-        if optimization_level == 1:
-            scale_factor = 0.8  # 80% originaalsuurusest
-        elif optimization_level == 2:
-            scale_factor = 0.6  # 60% originaalsuurusest
-        elif optimization_level == 3:
-            scale_factor = 0.4  # 40% originaalsuurusest
+        scale_factor = profile["scale"] if rescale else 1.0
             
         if scale_factor < 1.0:
             h, w = optimized.shape[:2]
@@ -450,75 +964,494 @@ class DocumentProcessor:
             
         return result
     
-    def _is_kvitung(self, image_path):
-        """Kontrolli kas pilt on tõenäoliselt kviitung
+    def _find_paper(self, thumbnail):
+        """Leia pisipildilt paber, st suurim hele ühtne ala (Otsu lävi)
+        
+        Args:
+            thumbnail: Hallskaala pisipilt
+            
+        Returns:
+            Tuple (Otsu lävi, paberi kumer ümbris või None, kui heledat ala pole).
+            Kumer ümbris sisaldab ka paberil olevaid fotosid ja jooniseid
+        """
+        threshold, paper = cv2.threshold(thumbnail, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        paper = cv2.morphologyEx(paper, cv2.MORPH_CLOSE, np.ones((9, 9), np.uint8))
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(paper)
+        if count < 2:
+            return threshold, None
+        index = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        points = cv2.findNonZero((labels == index).astype(np.uint8))
+        return threshold, cv2.convexHull(points)
+    
+    def _warp_paper(self, thumbnail):
+        """Sirgesta pisipildil olev paber ja lõika ära selle servad
+        
+        Erinevalt _find_document_contour'ist ei otsita servi, vaid paberi nelinurk
+        lähendatakse paberi kumerast ümbrisest, seega töötab see ka väikesel pisipildil.
+        
+        Args:
+            thumbnail: Hallskaala pisipilt
+            
+        Returns:
+            Sirgestatud paberi pilt (või pisipilt, kui paberit ei leitud)
+        """
+        _, hull = self._find_paper(thumbnail)
+        if hull is None:
+            return thumbnail
+        
+        quad = None
+        perimeter = cv2.arcLength(hull, True)
+        for epsilon in PAPER_QUAD_EPSILONS:
+            approx = cv2.approxPolyDP(hull, epsilon * perimeter, True)
+            if len(approx) == 4:
+                quad = approx
+                break
+        if quad is None:
+            quad = cv2.boxPoints(cv2.minAreaRect(hull))
+        
+        warped = self._apply_perspective_transform(thumbnail, quad.astype(np.float32))
+        h, w = warped.shape[:2]
+        margin = int(min(h, w) * PHASH_PAPER_MARGIN)
+        if min(h, w) - 2 * margin < PHASH_SIZE:
+            return thumbnail
+        return warped[margin:h - margin, margin:w - margin]
+    
+    def _page_features(self, image):
+        """Arvuta lehekülje tüübi tuvastamiseks vajalikud tunnused pisipildilt
+        
+        Paber leitakse heledaima suure ala järgi (Otsu lävi). Tunnused arvutatakse
+        paberi kumera ümbrise sees, seega ei mõjuta neid foto taust.
+        
+        Args:
+            image: Pilt (BGR või hallskaala, võib olla vähendatud)
+            
+        Returns:
+            Dict tunnustega: paper_aspect (paberi kõrgus/laius), paper_width (paberi laius
+            kaadri laiuse suhtes), ink (tekstilaadsete tumedate pikslite osakaal),
+            fill (suurte tumedate või värviliste pindade osakaal), regions (paberist
+            tumedamate ühtsete alade, näiteks hallskaala fotode osakaal) ja colorful
+            (kas paberil on värvilist sisu)
+        """
+        gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        thumbnail = self._resize_image(gray, width=ROUTER_THUMBNAIL_WIDTH)
+        th, tw = thumbnail.shape
+        
+        threshold, hull = self._find_paper(thumbnail)
+        if hull is None:
+            # Heledat ala pole, käsitleme kogu kaadrit paberina
+            hull_mask = np.ones((th, tw), dtype=np.uint8)
+            x, y, w, h = 0, 0, tw, th
+        else:
+            x, y, w, h = cv2.boundingRect(hull)
+            hull_mask = np.zeros((th, tw), dtype=np.uint8)
+            cv2.fillConvexPoly(hull_mask, hull, 1)
+        
+        # Jäta paberi servad välja, et taust ei paistaks tindina
+        inner = cv2.erode(hull_mask, np.ones((7, 7), np.uint8)) > 0
+        if not inner.any():
+            inner = hull_mask > 0
+        
+        ink = cv2.adaptiveThreshold(thumbnail, 255, cv2.ADAPTIVE_THRESH_MEAN_C,
+                                    cv2.THRESH_BINARY_INV, 15, 15)
+        ink_fraction = float(np.mean(ink[inner] > 0))
+        dark_fraction = float(np.mean(thumbnail[inner] < threshold))
+        
+        # Hallskaala foto võib olla Otsu lävest heledam, seega võrdleme paberi enda heledusega
+        paper_pixels = thumbnail[inner & (thumbnail >= threshold)]
+        paper_level = float(np.median(paper_pixels)) if paper_pixels.size else float(threshold)
+        nonpaper = ((thumbnail < paper_level - ROUTER_REGION_MARGIN) & inner).astype(np.uint8)
+        kernel = np.ones((ROUTER_REGION_KERNEL, ROUTER_REGION_KERNEL), np.uint8)
+        regions = cv2.morphologyEx(nonpaper, cv2.MORPH_OPEN, kernel)
+        
+        return {
+            "paper_aspect": h / float(w),
+            "paper_width": w / float(tw),
+            "ink": ink_fraction,
+            # Tekst on nii tume kui ka tindina tuvastatud, fotod ja joonised on suured tumedad pinnad
+            "fill": max(0.0, dark_fraction - ink_fraction),
+            "regions": float(np.mean(regions[inner] > 0)),
+            "colorful": self._is_colorful(image, inner)
+        }
+    
+    def _classify_page(self, image):
+        """Tuvasta lehekülje tüüp, et valida odavaim piisava tulemusega töötlus
+        
+        Args:
+            image: Pilt (BGR või hallskaala, võib olla vähendatud)
+            
+        Returns:
+            Tuple (lehekülje tüüp PAGE_TYPES hulgast, tunnuste dict)
+        """
+        features = self._page_features(image)
+        
+        if features["ink"] < BLANK_MAX_INK and features["fill"] < BLANK_MAX_FILL:
+            page_type = "blank"
+        elif features["paper_aspect"] >= KVITUNG_PAPER_ASPECT:
+            page_type = "receipt"
+        elif features["fill"] >= PHOTO_MIN_FILL or features["regions"] >= PHOTO_MIN_REGIONS:
+            page_type = "photo"
+        else:
+            page_type = "text"
+        
+        return page_type, features
+    
+    def _perceptual_hash(self, image):
+        """Arvuta pildi tajuräsi (pHash)
+        
+        Pisipildi DCT madalate sageduste märgid mediaani suhtes ei muutu väikese nihke,
+        valgustuse ega JPEG kvaliteedi erinevuse korral, seega on sama lehe kahel
+        pildistusel lähedased räsid.
+        
+        Args:
+            image: Hallskaala pilt (võib olla vähendatud)
+            
+        Returns:
+            Bool massiiv PHASH_SIZE * PHASH_SIZE - 1 bitiga (konstantne DC komponent jäetakse välja)
+        """
+        thumbnail = cv2.resize(image, (PHASH_RESIZE, PHASH_RESIZE), interpolation=cv2.INTER_AREA)
+        dct = cv2.dct(thumbnail.astype(np.float32))
+        low = dct[:PHASH_SIZE, :PHASH_SIZE].flatten()[1:]
+        return low > np.median(low)
+    
+    def _page_fingerprint(self, image_path):
+        """Arvuta lehekülje sõrmejälg tühjade ja korduvate lehekülgede tuvastamiseks
+        
+        Pilt dekodeeritakse vähendatud hallskaalas, täissuuruses pilti ei loeta.
+        Tajuräsi arvutatakse sirgestatud paberilt (vt _warp_paper), seega on sama
+        lehe eri nurga ja taustaga pildistuste räsid lähedased.
         
         Args:
             image_path: Pildi tee
             
         Returns:
-            Boolean: Tõene kui tõenäoliselt on kviitung
+            Dict võtmetega digest (faili sisu SHA-1), phash, ink, fill ja blank
+            või None, kui pilti ei õnnestunud lugeda
         """
-        # Kasutame faili nime ja/või pildi omadusi, et hinnata tõenäosust
-        filename = os.path.basename(image_path).lower()
-        if "kvit" in filename or "arve" in filename or "tsek" in filename or "tšek" in filename:
-            return True
-            
-        # Kasutame pildi mõõtmeid ja aspekti suhet
-        image = cv2.imread(image_path)
-        if image is None:
-            return False
+        gray = self._read_image(image_path, min_side=ROUTER_THUMBNAIL_WIDTH, grayscale=True)
+        if gray is None:
+            return None
+        
+        with open(image_path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        
+        features = self._page_features(gray)
+        return {
+            "digest": digest,
+            "phash": self._perceptual_hash(self._warp_paper(self._resize_image(gray, width=ROUTER_THUMBNAIL_WIDTH))),
+            "ink": features["ink"],
+            "fill": features["fill"],
+            "blank": features["ink"] < BLANK_MAX_INK and features["fill"] < BLANK_MAX_FILL
+        }
+    
+    def screen_pages(self, image_paths, drop_blank=False, dedupe=False):
+        """Leia tühjad ja korduvad leheküljed enne täisresolutsiooniga töötlust
+        
+        Tühjad leheküljed (nt lehe tagakülg) märgitakse või jäetakse välja. Sama lehe
+        korduvatest pildistustest jäetakse alles esimene: täpne koopia tuvastatakse faili
+        sisu järgi, peaaegu sama pilt tajuräsi järgi.
+        
+        Args:
+            image_paths: List pildifailide teedega
+            drop_blank: Kui True, jäetakse tühjad leheküljed välja, muidu ainult märgitakse
+            dedupe: Kui True, jäetakse korduvad leheküljed välja
             
-        h, w = image.shape[:2]
-        aspect_ratio = h / w
+        Returns:
+            Tuple (alles jäetud pildifailide list, aruanne). Aruanne on list dict-e iga
+            pildi kohta võtmetega image, blank, ink, duplicate_of ja dropped
+        """
+        kept = []
+        report = []
+        digests = {}
+        hashes = []
+        
+        for image_path in image_paths:
+            self._set_metrics_page(image_path)
+            with self._stage("screen"):
+                fingerprint = self._page_fingerprint(image_path)
+            
+            entry = {"image": image_path, "blank": False, "ink": None, "duplicate_of": None, "dropped": False}
+            report.append(entry)
+            if fingerprint is None:
+                # Loetamatu pildi viga antakse teada hilisemas töötluses
+                kept.append(image_path)
+                continue
+            
+            entry["blank"] = fingerprint["blank"]
+            entry["ink"] = round(fingerprint["ink"], 4)
+            
+            if fingerprint["blank"]:
+                entry["dropped"] = drop_blank
+                if drop_blank:
+                    print(f"Tühi lehekülg jäetakse välja: {os.path.basename(image_path)}")
+                else:
+                    print(f"Hoiatus: tühi lehekülg: {os.path.basename(image_path)}")
+            elif dedupe:
+                original = digests.get(fingerprint["digest"])
+                if original is None:
+                    for phash, path in hashes:
+                        if np.count_nonzero(phash != fingerprint["phash"]) <= DUPLICATE_MAX_DISTANCE:
+                            original = path
+                            break
+                if original is not None:
+                    entry["duplicate_of"] = original
+                    entry["dropped"] = True
+                    print(f"Korduv lehekülg jäetakse välja: {os.path.basename(image_path)} "
+                          f"(sama mis {os.path.basename(original)})")
+                else:
+                    digests[fingerprint["digest"]] = image_path
+                    hashes.append((fingerprint["phash"], image_path))
+            
+            if self.metrics is not None:
+                self.metrics.add_page_info(image_path, "blank", entry["blank"])
+                if entry["duplicate_of"]:
+                    self.metrics.add_page_info(image_path, "duplicate_of", entry["duplicate_of"])
+            
+            if not entry["dropped"]:
+                kept.append(image_path)
+        
+        return kept, report
+    
+    def assess_quality(self, image_path):
+        """Hinda vähendatud pildi põhjal, kas foto on töötlemiseks kasutatav
+        
+        Args:
+            image_path: Pildi tee
+            
+        Returns:
+            Dict võtmetega sharpness (Laplace'i dispersioon), clipped (täiesti valgete pikslite
+            osakaal), contrast (tekstijoonte kontrast), blank (kas lehekülg on tühi),
+            issues (probleemide list QUALITY_ISSUES võtmetest) ja usable
+        """
+        gray = self._read_image(image_path, min_side=QUALITY_SAMPLE_WIDTH // 2, grayscale=True)
+        if gray is None:
+            raise ValueError(f"Ei suutnud pilti lugeda: {image_path}")
+        gray = self._resize_image(gray, width=QUALITY_SAMPLE_WIDTH)
+        
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+        clipped = float(np.mean(gray >= 250))
+        # Black-hat toob esile paberist tumedamad peened jooned, st teksti
+        strokes = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, np.ones((9, 9), np.uint8))
+        contrast = float(np.percentile(strokes, 99))
+        # Tühjal lehel pole teksti, seega pole ka kontrasti, mida hinnata
+        features = self._page_features(gray)
+        blank = features["ink"] < BLANK_MAX_INK and features["fill"] < BLANK_MAX_FILL
+        
+        # Valge paber võib olla täiesti valge ka heal pildil, seega on ülevalgustus
+        # probleem ainult siis, kui tekst on selle tõttu kahvatuks jäänud.
+        # Peaaegu tekstita pildi teravust ei hinnata
+        issues = []
+        if not blank:
+            if sharpness < QUALITY_MIN_SHARPNESS and contrast >= QUALITY_MIN_CONTRAST / 2:
+                issues.append("blurry")
+            if contrast < QUALITY_MIN_CONTRAST:
+                issues.append("overexposed" if clipped >= QUALITY_MAX_CLIPPED else "low_contrast")
+        
+        return {
+            "sharpness": round(sharpness, 1),
+            "clipped": round(clipped, 4),
+            "contrast": round(contrast, 1),
+            "blank": blank,
+            "issues": issues,
+            "usable": not issues
+        }
+    
+    def check_quality(self, image_path):
+        """Rakenda kvaliteedikontrolli enne kallist töötlust (vt quality_gate)
         
-        # Kviitungid on tavaliselt pikad ja kitsad (kõrge/lai suhe)
-        if aspect_ratio > 1.5:  # Kõrgem kui laiem
-            return True
+        Args:
+            image_path: Pildi tee
+            
+        Returns:
+            Kvaliteedi hinnang (vt assess_quality) või None, kui kontroll on välja lülitatud
             
-        # Vaatame ka pildi heledust - kviitungid on tavaliselt valge taustaga
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        avg_brightness = np.mean(gray)
-        if avg_brightness > 180:  # Väga hele pilt
-            return True
+        Raises:
+            ImageQualityError: Kui režiim on "reject" ja pilt pole kasutatav
+        """
+        if self.quality_gate == "off":
+            return None
+        
+        self._set_metrics_page(image_path)
+        with self._stage("quality"):
+            quality = self.assess_quality(image_path)
+        if self.metrics is not None:
+            self.metrics.add_page_info(image_path, "quality", quality)
+        
+        if not quality["usable"]:
+            reasons = ", ".join(QUALITY_ISSUES[issue] for issue in quality["issues"])
+            if self.quality_gate == "reject":
+                raise ImageQualityError(f"Pilt {image_path} lükati tagasi ({reasons}), pildista uuesti", quality)
+            print(f"Hoiatus: Pilt {image_path} on {reasons}, soovitatav on uuesti pildistada.")
+        elif quality["blank"]:
+            print(f"Pilt {image_path} on tühi lehekülg.")
+        
+        return quality
+    
+    def _passthrough_jpeg(self, image_path, optimization_level=2, dpi=300):
+        """Kontrolli, kas JPEG-faili saab PDF-i lisada muutmata kujul
+        
+        Originaalne JPEG bitivoog sobib, kui pilt ei vaja sirgestamist (lehekülje
+        tüübi tuvastuse järgi katab paber kogu kaadri), pööramist, värviruumi muutmist,
+        vähendamist ega parandamist (tekst- või tühi lehekülg, tekstilehekülg on terav
+        ja kontrastne). Sellisel juhul jäetakse dekodeerimine, parandamine ja
+        kodeerimine vahele.
+        
+        Args:
+            image_path: Pildi tee
+            optimization_level: Optimeerimise tase
+            dpi: Soovitud väljundresolutsioon
             
-        return False
+        Returns:
+            Tuple (JPEG andmed, laius, kõrgus, komponentide arv, lehekülje DPI)
+            või None, kui pilti tuleb töödelda
+        """
+        if self.use_ai:
+            return None
+        
+        profile = self.optimization_profiles[optimization_level]
+        try:
+            with Image.open(image_path) as img:
+                if img.format != "JPEG" or img.mode not in ("L", "RGB"):
+                    return None
+                # Pööratud pilt tuleks enne PDF-i lisamist ümber pöörata
+                if img.getexif().get(EXIF_ORIENTATION_TAG, 1) != 1:
+                    return None
+                w, h = img.size
+                components = 1 if img.mode == "L" else 3
+        except Exception:
+            return None
+        
+        # Hallskaala või mustvalge väljund vajab värvilise pildi ümberkodeerimist
+        if (profile["grayscale"] or profile["bilevel"]) and components != 1:
+            return None
+        
+        # Pilti tuleks vähendada, kui profiil seda ette näeb või resolutsioon ületab siht-DPI
+        paper_inches = self._paper_width_inches(w, h)
+        page_dpi = w / paper_inches
+        if profile["scale"] < 1.0 or page_dpi > self._page_dpi_limit(dpi, optimization_level):
+            return None
+        
+        # Paber peab katma kogu kaadri, muidu on vaja perspektiivi korrigeerimist.
+        # Kviitungid ja fotodega leheküljed vajavad alati töötlust
+        with self._stage("decode_preview"):
+            preview = self._read_image(image_path, min_side=ANALYSIS_WIDTH, grayscale=components == 1)
+        if preview is None:
+            return None
+        with self._stage("classify"):
+            page_type, features = self._classify_page(preview)
+        ph, pw = preview.shape[:2]
+        paper_height = features["paper_width"] * features["paper_aspect"] * pw / float(ph)
+        if page_type not in ("text", "blank") or min(features["paper_width"], paper_height) < PASSTHROUGH_MIN_PAPER:
+            return None
+        if components == 3:
+            edge = max(1, int(min(ph, pw) * PASSTHROUGH_EDGE))
+            ring = np.ones((ph, pw), dtype=bool)
+            ring[edge:-edge, edge:-edge] = False
+            saturation = cv2.cvtColor(preview, cv2.COLOR_BGR2HSV)[:, :, 1][ring]
+            if np.percentile(saturation, 90) > PASSTHROUGH_MAX_EDGE_SATURATION:
+                return None
+        
+        # Udune, kahvatu või üle säritatud tekst vajab parandamist
+        if page_type == "text":
+            with self._stage("quality"):
+                quality = self.assess_quality(image_path)
+            if not quality["usable"] or quality["contrast"] < PASSTHROUGH_MIN_CONTRAST:
+                return None
+        
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        return data, w, h, components, page_dpi
     
-    def process_image(self, image_path, output_dir=None, optimization_level=2):
+    def process_image(self, image_path, output_dir=None, optimization_level=2, dpi=300):
         """Töötle dokumendifotot
         
         Args:
             image_path: Töödeldava pildi tee
             output_dir: Väljundkaust debugimiseks
             optimization_level: Optimeerimise tase
+            dpi: Soovitud väljundresolutsioon, millest suuremaks pilti ei jäeta
             
         Returns:
             Töödeldud pilt
+            
+        Raises:
+            ImageQualityError: Kui kvaliteedikontroll lükkas pildi tagasi
+        """
+        self.check_quality(image_path)
+        result, _ = self._process_page(image_path, output_dir=output_dir,
+                                       optimization_level=optimization_level, dpi=dpi)
+        return result
+    
+    def _process_page(self, image_path, output_dir=None, optimization_level=2, dpi=300, scale=None,
+                      page_type=None):
+        """Töötle dokumendifotot ja arvuta lehekülje resolutsioon
+        
+        Args:
+            image_path: Töödeldava pildi tee
+            output_dir: Väljundkaust debugimiseks
+            optimization_level: Optimeerimise tase
+            dpi: Soovitud väljundresolutsioon
+            scale: Valikuline skaleerimistegur, mis asendab profiili oma (vt _fit_to_paper)
+            page_type: Valikuline lehekülje tüüp (PAGE_TYPES), mis asendab automaatse tuvastuse
+            
+        Returns:
+            Tuple (töödeldud pilt, lehekülje DPI)
         """
-        # Loe pilt
-        image = cv2.imread(image_path)
-        if image is None:
+        self._set_metrics_page(image_path)
+        
+        # Kui profiil nõuab hallskaalat, dekodeerime ja töötleme kohe ainult ühte kanalit
+        # (AI tausta eemaldus vajab värve)
+        profile = self.optimization_profiles[optimization_level]
+        force_grayscale = profile["grayscale"]
+        grayscale = not self.use_ai and force_grayscale
+        
+        # Loe pildist vähendatud eelvaade analüüsietappide jaoks
+        # (AI töötlus vajab 1500 px laiust pilti, seega piisab sellestki)
+        with self._stage("decode_preview"):
+            preview = self._read_image(image_path, min_side=1500 if self.use_ai else ANALYSIS_WIDTH,
+                                       grayscale=grayscale)
+        if preview is None:
             raise ValueError(f"Ei suutnud pilti lugeda: {image_path}")
         
-        # Kontrolli, kas see on kviitung
-        is_kvitung = self._is_kvitung(image_path)
+        # Tuvasta lehekülje tüüp eelvaate pisipildilt
+        features = None
+        if page_type is None:
+            with self._stage("classify"):
+                page_type, features = self._classify_page(preview)
+        if self.metrics is not None:
+            self.metrics.add_page_info(image_path, "page_type", page_type)
+        is_kvitung = page_type == "receipt"
         
         # AI-põhine töötlus, kui see on lubatud
         if self.use_ai:
             print(f"Kasutan AI-d dokumendi tausta eemaldamiseks: {image_path}")
+            image = preview
             # Tee pilt AI töötluseks sobivaks suuruseks
-            resized_for_ai = self._resize_image(image, width=1500)
+            with self._stage("resize"):
+                resized_for_ai = self._resize_image(image, width=1500)
             # Eemalda taust AI abiga
-            result_with_transparency = self._remove_background_with_ai(resized_for_ai)
-            # Lisa valge taust
-            result = self._add_white_background_to_transparent(result_with_transparency)
+            with self._stage("ai_background"):
+                result_with_transparency = self._remove_background_with_ai(resized_for_ai)
+                # Lisa valge taust
+                result = self._add_white_background_to_transparent(result_with_transparency)
+            
+            # Värvilisena säilitatakse ainult värvilise sisuga dokumendid
+            if features is not None:
+                grayscale = force_grayscale or not features["colorful"]
+            else:
+                with self._stage("color_mode"):
+                    grayscale = force_grayscale or not self._is_colorful(resized_for_ai)
             
             # Dokumendi kvaliteedi parandamine vastavalt dokumendi tüübile
             if is_kvitung and len(result.shape) == 3:  # Veendu, et värviline kviitung
-                result = self._enhance_document_for_kvitungs(result)
-            elif optimization_level < 2:  # Kui ei muuda halliks, siis paranda kvaliteeti
+                with self._stage("enhance"):
+                    result = self._enhance_document_for_kvitungs(result)
+            elif not grayscale:  # Kui ei muuda halliks, siis paranda kvaliteeti
                 result = self._enhance_document(result)
             
+            # Vii pilt paberi suuruse ja siht-DPI järgi vajalikku resolutsiooni
+            with self._stage("resize"):
+                result, page_dpi = self._fit_to_paper(result, optimization_level, dpi, scale)
+            
             # Salvesta debug pildid, kui vajalik
             if self.debug and output_dir:
                 os.makedirs(output_dir, exist_ok=True)
@@ -534,43 +1467,74 @@ class DocumentProcessor:
         
         else:
             # Klassikaline töötlus ilma AI-ta
-            # Muuda pildi suurust töötlemiseks
-            orig = image.copy()
-            image = self._resize_image(image, width=2000)
+            # Muuda eelvaate suurust analüüsiks
+            with self._stage("resize"):
+                image = self._resize_image(preview, width=ANALYSIS_WIDTH)
+            del preview
             
             # Leia dokumendi kontuur
-            contour = self._find_document_contour(image)
+            with self._stage("contour"):
+                contour = self._find_document_contour(image)
+            
+            # Otsusta värvirežiim enne täissuuruses dekodeerimist: hallskaala dokumente
+            # töödeldakse ühe kanaliga. Kviitungid muudetakse töötluse käigus alati hallskaalasse.
+            # Lehekülje tüübi tuvastus hindab värvilisust juba paberi alal, foto taustata
+            if not (grayscale or is_kvitung):
+                if features is not None:
+                    grayscale = not features["colorful"]
+                else:
+                    with self._stage("color_mode"):
+                        document = image if contour is None else self._apply_perspective_transform(image, contour.astype(np.float32))
+                        grayscale = not self._is_colorful(document)
+            grayscale = grayscale or is_kvitung
+            
+            # Vali lehekülje tüübile vastav odavaim piisava tulemusega töötlus:
+            # kviitungid ja mustvalgena salvestatavad tekstileheküljed binariseeritakse,
+            # tühjad leheküljed jäetakse parandamata, ülejäänud parandatakse täielikult.
+            # Tekstilehekülg binariseeritakse ainult siis, kui paberil pole halltoonidega
+            # alasid (nt hallskaala fotosid); muul juhul parandatakse see tavapäraselt ja
+            # mustvalge salvestamise otsustab _is_bilevel parandatud lehekülje põhjal
+            binarize = is_kvitung
+            if page_type == "text" and grayscale and profile["bilevel"]:
+                # Eelvaade on juba vabastatud, tunnused arvutatakse analüüsi pildilt
+                if features is None:
+                    with self._stage("classify"):
+                        features = self._page_features(image)
+                binarize = features["regions"] < PHOTO_MIN_REGIONS
             
-            # Protsessi kontuuriga leitud dokument, isegi kviitungite puhul
             if contour is not None:
                 print(f"Info: Dokumendi kontuur leitud pildil {image_path}.")
-                
-                # Rakenda perspektiivi transform
-                warped = self._apply_perspective_transform(orig, contour.astype(np.float32) * (orig.shape[1] / 2000.0))
-                
-                # Paranda dokumendi kvaliteeti vastavalt dokumendi tüübile
-                if is_kvitung:
-                    result = self._enhance_document_for_kvitungs(warped)
-                else:
-                    result = self._enhance_document(warped)
-                    
-                # Lisa valge taust, et PDF-is ei oleks läbipaistvust
-                result = self._add_white_background(result)
             else:
                 # Kui kontuuri ei leitud, kasuta kogu pilti
                 print(f"Info: Dokumendi kontuuri ei leitud pildil {image_path}.")
-                
-                # Kviitungite puhul kasutame spetsiaalset töötlusmeetodit, muidu tavalist
-                if is_kvitung:
-                    # Teeme pildi suuremaks
-                    resized = self._resize_image(orig, width=2000)
-                    result = self._enhance_document_for_kvitungs(resized)
-                else:
-                    result = self._enhance_document(orig)
-                
-                # Lisa valge taust, et PDF-is ei oleks läbipaistvust
-                result = self._add_white_background(result)
-                
+            
+            # Täisresolutsiooniga pilti on vaja alles perspektiivi korrigeerimiseks
+            with self._stage("decode"):
+                orig = self._read_image(image_path, grayscale=grayscale)
+            
+            # Rakenda perspektiivi transform
+            warped = orig
+            if contour is not None:
+                with self._stage("warp"):
+                    ratio = orig.shape[1] / float(image.shape[1])
+                    warped = self._apply_perspective_transform(orig, contour.astype(np.float32) * ratio)
+            
+            # Töötleme edasi ainult nii palju piksleid, kui paber ja siht-DPI vajavad
+            with self._stage("resize"):
+                warped, page_dpi = self._fit_to_paper(warped, optimization_level, dpi, scale)
+            
+            # Paranda dokumendi kvaliteeti vastavalt dokumendi tüübile
+            if binarize:
+                with self._stage("enhance"):
+                    result = self._enhance_document_for_kvitungs(warped)
+            elif page_type == "blank":
+                result = warped
+            else:
+                result = self._enhance_document(warped)
+            
+            # Lisa valge taust, et PDF-is ei oleks läbipaistvust
+            result = self._add_white_background(result)
+            
             # Salvesta vaheetapid, kui debug on lubatud
             if self.debug and output_dir:
                 os.makedirs(output_dir, exist_ok=True)
@@ -578,59 +1542,562 @@ class DocumentProcessor:
                 
                 cv2.imwrite(os.path.join(output_dir, f"{base_name}_1_original.jpg"), orig)
                 if contour is not None:
-                    cv2.imwrite(os.path.join(output_dir, f"{base_name}_2_contour.jpg"), cv2.drawContours(image.copy(), [contour], -1, (0, 255, 0), 3))
+                    contour_image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR) if len(image.shape) == 2 else image.copy()
+                    cv2.imwrite(os.path.join(output_dir, f"{base_name}_2_contour.jpg"), cv2.drawContours(contour_image, [contour], -1, (0, 255, 0), 3))
                     cv2.imwrite(os.path.join(output_dir, f"{base_name}_3_warped.jpg"), warped)
                 cv2.imwrite(os.path.join(output_dir, f"{base_name}_4_enhanced.jpg"), result)
         
-        # Optimeerime pilti PDF-i suuruse vähendamiseks
-        result = self._optimize_image_for_pdf(result, optimization_level)
+        # Optimeerime pilti PDF-i suuruse vähendamiseks (resolutsioon on juba paika pandud)
+        with self._stage("optimize"):
+            if grayscale and len(result.shape) == 3:
+                result = cv2.cvtColor(result, cv2.COLOR_BGRA2GRAY if result.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+            result = self._optimize_image_for_pdf(result, optimization_level, rescale=False)
         
-        return result
+        return result, page_dpi
     
-    def convert_to_pdf(self, image_paths, output_path, dpi=300, optimization_level=2):
+    def _encode_for_budget(self, image, max_bytes):
+        """Kodeeri lehekülg parima kvaliteediga, mis mahub antud baidimahtu
+        
+        Sammud (SIZE_BUDGET_STEPS) läbitakse parimast halvimani. Iga sammu maht
+        hinnatakse vähendatud koopia proovikodeerimise järgi ja otsing lõpetatakse
+        esimese sobiva sammu juures. Valitud samm kodeeritakse täissuuruses ning
+        kui tegelik maht ületab piiri, jätkatakse järgmisest sammust.
+        
+        Args:
+            image: OpenCV pilt (BGR või hallskaala)
+            max_bytes: Lehekülje pildiandmete maksimaalne maht baitides
+            
+        Returns:
+            Tuple (JPEG andmed, kodeeritud pilt, JPEG kvaliteet)
+        """
+        h, w = image.shape[:2]
+        proxy = self._resize_image(image, width=BUDGET_PROXY_WIDTH)
+        proxy_pixels = float(proxy.shape[0] * proxy.shape[1])
+        
+        # Proovikodeeringute tulemused kvaliteedi kaupa (baiti piksli kohta)
+        proxy_bpp = {}
+        
+        start = 0
+        while True:
+            # Leia esimene samm, mille hinnanguline maht mahub piiri sisse
+            step = len(SIZE_BUDGET_STEPS) - 1
+            for index in range(start, len(SIZE_BUDGET_STEPS)):
+                scale, quality = SIZE_BUDGET_STEPS[index]
+                if quality not in proxy_bpp:
+                    _, trial = cv2.imencode(".jpg", proxy, [cv2.IMWRITE_JPEG_QUALITY, quality])
+                    proxy_bpp[quality] = len(trial) / proxy_pixels
+                # Vähendatud koopia on detailitihedam, seega on hinnang pigem ülehinnatud
+                if proxy_bpp[quality] * (w * scale) * (h * scale) <= max_bytes:
+                    step = index
+                    break
+            
+            scale, quality = SIZE_BUDGET_STEPS[step]
+            page = self._resize_image(image, width=max(1, int(round(w * scale))))
+            success, encoded = cv2.imencode(".jpg", page, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if not success:
+                raise ValueError("Ei suutnud pilti JPEG-iks kodeerida")
+            if len(encoded) <= max_bytes or step == len(SIZE_BUDGET_STEPS) - 1:
+                return encoded, page, quality
+            start = step + 1
+    
+    def convert_to_pdf(self, image_paths, output_path, dpi=300, optimization_level=2, output_dir=None,
+                       progress_callback=None, passthrough=False, max_bytes=None):
         """Konverdi pildid PDF-iks
         
+        Iga lehekülg töödeldakse, kodeeritakse ja kirjutatakse PDF-faili kohe,
+        seega hoitakse mälus korraga ainult ühte lehekülge.
+        
         Args:
             image_paths: List pildifailide teedega
             output_path: PDF-faili väljundtee
-            dpi: Pildi resolutsioon punktides tolli kohta
+            dpi: Soovitud resolutsioon punktides tolli kohta; lehekülgede pikslid piiratakse
+                selle (ja optimeerimisprofiili max_dpi) ning hinnatud paberi suuruse järgi
             optimization_level: Optimeerimise tase PDF suuruse vähendamiseks
+            output_dir: Väljundkaust debugimiseks (vt process_image)
+            progress_callback: Valikuline funktsioon (järjekorranumber, kokku, pildi tee),
+                mida kutsutakse enne iga lehekülje töötlemist
+            passthrough: Kui True, lisatakse tasased JPEG-pildid, mis ei vaja sirgestamist
+                ega vähendamist, PDF-i originaalkujul ilma parandamata (vt _passthrough_jpeg)
+            max_bytes: Valikuline PDF-faili maksimaalne maht baitides. Kui määratud, valitakse
+                iga lehekülje skaala ja JPEG kvaliteet nii, et fail mahuks piiri sisse
+                (optimeerimistaseme skaala ja kvaliteet jäetakse siis kõrvale)
+            
+        Raises:
+            ValueError: Kui pilte pole, PDF-faili siis ei looda
+            ImageQualityError: Kui kõik pildid lükati kvaliteedikontrollis tagasi
         """
-        processed_images = []
+        if not image_paths:
+            raise ValueError("PDF-i loomiseks pole ühtegi pilti")
         
-        for image_path in image_paths:
-            # Töötle pilti
-            processed = self.process_image(image_path, optimization_level=optimization_level)
-            
-            # Arvuta JPEG kvaliteet vastavalt optimeerimistasemele
-            jpeg_quality = 100
-            if optimization_level == 1:
-                jpeg_quality = 90
-            elif optimization_level == 2:
-                jpeg_quality = 80
-            elif optimization_level == 3:
-                jpeg_quality = 65
-            
-            # Salvesta töödeldud pilt ajutiselt kohandatud kvaliteediga
-            temp_path = f"temp_{os.path.basename(image_path)}"
-            cv2.imwrite(temp_path, processed, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
-            processed_images.append(temp_path)
-        
-        # Arvuta DPI vastavalt optimeerimistasemele
-        output_dpi = int(dpi)
-        if optimization_level >= 2:
-            output_dpi = min(300, output_dpi)  # Piira DPI väärtust 300-ga
-        if optimization_level >= 3:
-            output_dpi = min(200, output_dpi)  # Piira DPI väärtust 200-ga
-        
-        # Konverdi töödeldud pildid PDF-iks
-        with open(output_path, "wb") as f:
-            # Kasuta optimeeritud DPI väärtust img2pdf puhul
-            f.write(img2pdf.convert(processed_images, dpi=output_dpi))
-        
-        # Kustuta ajutised pildid
-        for temp_path in processed_images:
-            os.remove(temp_path)
+        profile = self.optimization_profiles[optimization_level]
+        
+        # JPEG kvaliteet vastavalt optimeerimistasemele
+        jpeg_quality = profile["jpeg_quality"]
+        
+        # Mahupiiranguga režiimis jagatakse maht lehekülgede vahel pikslite arvu järgi
+        # (loetakse ainult failipäistest, pilte selleks ei dekodeerita)
+        if max_bytes:
+            weights = []
+            for image_path in image_paths:
+                size = self._read_image_size(image_path)
+                weights.append(float(size[0] * size[1]) if size else 1.0)
+        
+        rejected = []
+        with StreamingPdfWriter(output_path) as writer:
+            for i, image_path in enumerate(image_paths):
+                if progress_callback is not None:
+                    progress_callback(i + 1, len(image_paths), image_path)
+                
+                # Kasutuskõlbmatud pildid jäetakse enne töötlust välja
+                try:
+                    self.check_quality(image_path)
+                except ImageQualityError as e:
+                    print(f"Hoiatus: {e}")
+                    rejected.append(str(e))
+                    continue
+                
+                # Jaga järelejäänud maht ülejäänud lehekülgede vahel, nii et
+                # eelmistest lehekülgedest ülejäänud maht jääb järgmistele
+                page_budget = None
+                if max_bytes:
+                    remaining_pages = len(image_paths) - i
+                    remaining = (max_bytes - writer.bytes_written - TRAILER_BYTES
+                                 - PAGE_CLOSING_BYTES * len(image_paths)
+                                 - PAGE_OBJECT_BYTES * remaining_pages)
+                    share = weights[i] / sum(weights[i:])
+                    page_budget = max(1, int(remaining * share))
+                
+                # Tasased JPEG-id kirjutatakse muutmata kujul, ilma dekodeerimise ja kodeerimiseta
+                if passthrough:
+                    self._set_metrics_page(image_path)
+                    original = self._passthrough_jpeg(image_path, optimization_level, dpi)
+                    if original is not None and (page_budget is None or len(original[0]) <= page_budget):
+                        data, w, h, components, page_dpi = original
+                        print(f"Info: Lisan pildi {image_path} PDF-i muutmata kujul.")
+                        with self._stage("pdf_write"):
+                            writer.add_jpeg_page(data, w, h, components=components, dpi=page_dpi)
+                        del data, original
+                        continue
+                
+                # Töötle pilti; lehekülje DPI määrab PDF-is hinnatud paberi suuruse
+                # (mahupiiranguga režiimis töödeldakse täisresolutsioonis ja skaala valitakse hiljem)
+                processed, page_dpi = self._process_page(image_path, output_dir=output_dir,
+                                                         optimization_level=optimization_level, dpi=dpi,
+                                                         scale=1.0 if max_bytes else None)
+                if len(processed.shape) == 3 and processed.shape[2] == 4:
+                    processed = cv2.cvtColor(processed, cv2.COLOR_BGRA2BGR)
+                
+                # Kodeeri töödeldud pilt kohandatud kvaliteediga otse mällu
+                self._set_metrics_page(image_path)
+                
+                # Halltoonideta leheküljed salvestatakse mustvalgelt (1 bitt pikslis)
+                h, w = processed.shape[:2]
+                if profile["bilevel"] and self._is_bilevel(processed):
+                    with self._stage("encode"):
+                        bilevel = self._encode_bilevel(processed)
+                    if page_budget is None or len(bilevel) <= page_budget:
+                        if self.metrics is not None:
+                            self.metrics.add_page_info(image_path, "color_mode", "bilevel")
+                        with self._stage("pdf_write"):
+                            writer.add_image_page(bilevel, w, h, "/DeviceGray", bits_per_component=1,
+                                                  filter_name="/FlateDecode", dpi=page_dpi)
+                        del processed, bilevel
+                        continue
+                
+                if self.metrics is not None:
+                    self.metrics.add_page_info(image_path, "color_mode", "gray" if len(processed.shape) == 2 else "color")
+                
+                if page_budget is not None:
+                    with self._stage("budget_search"):
+                        full_width = processed.shape[1]
+                        encoded, processed, quality = self._encode_for_budget(processed, page_budget)
+                    # Lehekülje suurus paberil ei muutu, väheneb ainult resolutsioon
+                    page_dpi = page_dpi * processed.shape[1] / float(full_width)
+                    if self.metrics is not None:
+                        self.metrics.add_page_info(image_path, "jpeg_quality", quality)
+                        self.metrics.add_page_info(image_path, "page_dpi", round(page_dpi, 1))
+                    if len(encoded) > page_budget:
+                        print(f"Hoiatus: Lehekülg {image_path} ei mahu mahupiirangu sisse ka madalaima kvaliteediga.")
+                else:
+                    with self._stage("encode"):
+                        success, encoded = cv2.imencode(".jpg", processed, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+                    if not success:
+                        raise ValueError(f"Ei suutnud pilti JPEG-iks kodeerida: {image_path}")
+                
+                # Lisa lehekülg kohe PDF-faili
+                h, w = processed.shape[:2]
+                components = 1 if len(processed.shape) == 2 else processed.shape[2]
+                with self._stage("pdf_write"):
+                    writer.add_jpeg_page(encoded, w, h, components=components, dpi=page_dpi)
+                
+                # Vabasta lehekülje mälu enne järgmist
+                del processed, encoded
+            
+            if writer.page_count == 0:
+                raise ImageQualityError("Kõik pildid lükati kvaliteedikontrollis tagasi:\n" + "\n".join(rejected))
+        
+        if max_bytes:
+            size = os.path.getsize(output_path)
+            if size > max_bytes:
+                print(f"Hoiatus: PDF-i maht {size} baiti ületab piirangu {max_bytes} baiti.")
+    
+    def _estimate_text_height(self, binary):
+        """Hinda tüüpilist tähemärgi kõrgust seotud komponentide põhjal
+        
+        Args:
+            binary: Binariseeritud pilt (must tekst valgel taustal)
+            
+        Returns:
+            Tähemärkide kõrguste mediaan pikslites või None, kui tähemärke on liiga vähe
+        """
+        _, _, stats, _ = cv2.connectedComponentsWithStats(255 - binary, connectivity=8)
+        widths = stats[1:, cv2.CC_STAT_WIDTH]
+        heights = stats[1:, cv2.CC_STAT_HEIGHT]
+        areas = stats[1:, cv2.CC_STAT_AREA]
+        
+        # Jäta välja müra, jooned, tabelite ääred ja suured pildid
+        glyphs = ((heights >= GLYPH_MIN_HEIGHT) & (heights <= GLYPH_MAX_HEIGHT)
+                  & (widths <= 3 * heights) & (areas >= 0.1 * widths * heights))
+        if np.count_nonzero(glyphs) < GLYPH_MIN_COUNT:
+            return None
+        return float(np.median(heights[glyphs]))
+    
+    def _prepare_for_ocr(self, image_path):
+        """Valmista dokumendifoto ette OCR-i jaoks
+        
+        Erinevalt process_image'ist ei tehta PDF-i jaoks mõeldud värvilist müra
+        eemaldamist ega teravuse, kontrasti ja heleduse parandamist: pilt dekodeeritakse
+        hallskaalas (vajadusel vähendatult), sirgestatakse, viiakse OCR_DPI resolutsioonile
+        ja binariseeritakse adaptiivse lävega. Seejärel skaleeritakse lehekülge nii, et
+        tüüpiline tähemärk oleks umbes OCR_TEXT_HEIGHT pikslit kõrge.
+        
+        Args:
+            image_path: Pildi tee
+            
+        Returns:
+            Binariseeritud hallskaala pilt (must tekst valgel taustal)
+        """
+        self._set_metrics_page(image_path)
+        
+        with self._stage("decode_preview"):
+            preview = self._read_image(image_path, min_side=ANALYSIS_WIDTH, grayscale=True)
+        if preview is None:
+            raise ValueError(f"Ei suutnud pilti lugeda: {image_path}")
+        
+        with self._stage("resize"):
+            image = self._resize_image(preview, width=ANALYSIS_WIDTH)
+        with self._stage("contour"):
+            contour = self._find_document_contour(image)
+        
+        # Dekodeeri ainult nii suurelt, et dokument jääks OCR_DPI resolutsioonile
+        # vähemalt nii laiaks, kui paber vajab
+        doc_w, doc_h = image.shape[1], image.shape[0]
+        if contour is not None:
+            _, _, doc_w, doc_h = cv2.boundingRect(contour)
+        needed_width = self._paper_width_inches(doc_w, doc_h) * OCR_DPI
+        min_side = min(image.shape[:2]) * needed_width / float(max(doc_w, 1))
+        with self._stage("decode"):
+            gray = self._read_image(image_path, min_side=min_side, grayscale=True)
+        
+        if contour is not None:
+            with self._stage("warp"):
+                ratio = gray.shape[1] / float(image.shape[1])
+                gray = self._apply_perspective_transform(gray, contour.astype(np.float32) * ratio)
+        
+        with self._stage("resize"):
+            gray, _ = self._fit_to_paper(gray, 0, OCR_DPI)
+        
+        with self._stage("binarize"):
+            binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+                                           OCR_BINARIZE_BLOCK, OCR_BINARIZE_C)
+        
+        # Normaliseeri teksti kõrgus: suure kirjaga lehekülg vähendatakse, väike kiri suurendatakse
+        with self._stage("text_height"):
+            text_height = self._estimate_text_height(binary)
+        if self.metrics is not None and text_height is not None:
+            self.metrics.add_page_info(image_path, "text_height", text_height)
+        if text_height is not None and not OCR_MIN_TEXT_HEIGHT <= text_height <= OCR_MAX_TEXT_HEIGHT:
+            factor = min(OCR_TEXT_HEIGHT / text_height, OCR_MAX_UPSCALE)
+            with self._stage("resize"):
+                interpolation = cv2.INTER_AREA if factor < 1 else cv2.INTER_CUBIC
+                gray = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=interpolation)
+            with self._stage("binarize"):
+                binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+                                               OCR_BINARIZE_BLOCK, OCR_BINARIZE_C)
+        
+        return binary
+    
+    def _ocr_config(self, psm=None):
+        """Koosta valitud OCR profiilile vastavad Tesseracti seaded
+        
+        Args:
+            psm: Valikuline lehekülje segmenteerimise režiim, mis asendab profiili oma
+            
+        Returns:
+            Tesseracti käsurea seaded (pytesseract config)
+        """
+        profile = OCR_PROFILES[self.ocr_profile]
+        config = f"--psm {psm or profile['psm']} --oem {profile['oem']}"
+        
+        if profile["models"]:
+            tessdata_dir = os.environ.get(TESSDATA_DIR_VARIABLES[profile["models"]])
+            if tessdata_dir:
+                config += f' --tessdata-dir "{tessdata_dir}"'
+        
+        return config
+    
+    def _split_ocr_blocks(self, binary, count):
+        """Jaga lehekülg kuni count horisontaalseks ribaks, mida saab OCR-ida üksteisest sõltumatult
+        
+        Tekstiread leitakse kiire paigutuse analüüsiga (laiendatud tindi seotud komponendid).
+        Plokkide piirid valitakse ainult ridade vahele jäävatele tühjadele ridadele nii, et
+        tindi (ja seega OCR-i töö) hulk oleks plokkides võimalikult võrdne. Tekstireast
+        kõrgemad komponendid (pealkirjad, raamid, logod, fotod) ei liida ridade leidmisel kõiki
+        ridu üheks, kuid ükski piir ei lõika neid ega viltuseid ridu läbi: nende kõrgus
+        liidetakse üheks lõikamatuks vööndiks. Ploki pilt on lehekülje terve riba, seega ei
+        jää ükski tint OCR-ist välja.
+        
+        Args:
+            binary: Binariseeritud pilt (must tekst valgel taustal)
+            count: Soovitud plokkide arv
+            
+        Returns:
+            List paaridest (ploki ülemine rida leheküljel, ploki pilt) lugemisjärjekorras
+        """
+        ink = (binary == 0).astype(np.uint8)
+        parts, part_labels, part_stats, _ = cv2.connectedComponentsWithStats(ink)
+        tall = part_stats[:, cv2.CC_STAT_HEIGHT] > OCR_BLOCK_MAX_LINE_HEIGHT
+        tall[0] = False
+        line_ink = ink
+        if tall.any():
+            line_ink = ink.copy()
+            line_ink[tall[part_labels]] = 0
+        
+        joined = cv2.dilate(line_ink, np.ones((OCR_BLOCK_JOIN_HEIGHT, OCR_BLOCK_JOIN_WIDTH), np.uint8))
+        lines, _, stats, _ = cv2.connectedComponentsWithStats(joined)
+        if count < 2 or lines < 3:
+            return [(0, binary)]
+        
+        # Ridade ja kõrgete komponentide kõrgusvahemikud liidetakse lõikamatuteks vöönditeks
+        extents = np.concatenate([stats[1:, [cv2.CC_STAT_TOP, cv2.CC_STAT_HEIGHT]],
+                                  part_stats[tall][:, [cv2.CC_STAT_TOP, cv2.CC_STAT_HEIGHT]]])
+        bands = []
+        for top, height in sorted(extents.tolist()):
+            if bands and top < bands[-1][1]:
+                bands[-1][1] = max(bands[-1][1], top + height)
+            else:
+                bands.append([top, top + height])
+        if len(bands) < 2:
+            return [(0, binary)]
+        
+        # Määra vööndid ülalt alla plokkidesse tindi hulga järgi
+        row_ink = np.concatenate([[0], np.cumsum(ink.sum(axis=1, dtype=np.int64))])
+        band_ink = np.array([row_ink[bottom] - row_ink[top] for top, bottom in bands], dtype=np.float64)
+        before = np.cumsum(band_ink) - band_ink / 2
+        owner = np.minimum((before / max(band_ink.sum(), 1.0) * count).astype(np.int32), count - 1)
+        
+        # Ploki piir on kahe vööndi vahelise tühja ala keskel
+        height = binary.shape[0]
+        cuts = [0]
+        for i in range(1, len(bands)):
+            if owner[i] != owner[i - 1]:
+                cuts.append((bands[i - 1][1] + bands[i][0]) // 2)
+        cuts.append(height)
+        
+        return [(top, binary[top:bottom]) for top, bottom in zip(cuts[:-1], cuts[1:]) if bottom > top]
+    
+    def _ocr_image(self, image, lang, config, with_data=False, with_text=True):
+        """Tuvasta tekst ühelt pildilt või tekstiplokilt
+        
+        Args:
+            image: Binariseeritud pilt
+            lang: OCR keele kood
+            config: Tesseracti seaded (vt _ocr_config)
+            with_data: Kas tuvastada ka sõnade andmed koos koordinaatidega
+            with_text: Kas tuvastada tekst (image_to_string)
+            
+        Returns:
+            Tuple (tekst või None, Tesseracti sõnade andmed või None)
+        """
+        image = Image.fromarray(image)
+        text = None
+        if with_text:
+            text = pytesseract.image_to_string(image, lang=lang, config=config)
+        data = None
+        if with_data:
+            data = pytesseract.image_to_data(image, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+        return text, data
+    
+    def _run_ocr(self, binary, lang, with_data=False):
+        """Tuvasta lehekülje tekst valitud OCR profiiliga
+        
+        Args:
+            binary: OCR-i jaoks ette valmistatud pilt (vt _prepare_for_ocr)
+            lang: OCR keele kood
+            with_data: Kas tagastada ka sõnade andmed (pytesseract.image_to_data)
+            
+        Returns:
+            Tuple (tekst, sõnade andmed või None)
+        """
+        if self.ocr_refine:
+            text, data = self._run_ocr_refined(binary, lang)
+            return text, data if with_data else None
+        return self._run_ocr_blocks(binary, lang, with_data)
+    
+    def _run_ocr_blocks(self, binary, lang, with_data=False, with_text=True):
+        """Tuvasta lehekülje tekst, vajadusel tekstiplokkide kaupa paralleelselt
+        
+        Kui ocr_workers > 1, jagatakse lehekülg tekstiplokkideks (vt _split_ocr_blocks), mida
+        tuvastatakse paralleelselt eraldi Tesseracti protsessides, ja tulemused liidetakse
+        lugemisjärjekorras. Sõnade koordinaadid teisendatakse kogu lehekülje koordinaatideks.
+        
+        Args:
+            binary: OCR-i jaoks ette valmistatud pilt (vt _prepare_for_ocr)
+            lang: OCR keele kood
+            with_data: Kas tagastada ka sõnade andmed (pytesseract.image_to_data)
+            with_text: Kas tuvastada tekst (image_to_string)
+            
+        Returns:
+            Tuple (tekst või None, sõnade andmed või None)
+        """
+        config = self._ocr_config()
+        blocks = self._split_ocr_blocks(binary, self.ocr_workers) if self.ocr_workers > 1 else [(0, binary)]
+        if len(blocks) == 1:
+            return self._ocr_image(binary, lang, config, with_data, with_text)
+        
+        # Tesseract töötab eraldi protsessis, seega piisab lõimedest
+        with ThreadPoolExecutor(max_workers=len(blocks)) as executor:
+            results = list(executor.map(
+                lambda block: self._ocr_image(block[1], lang, config, with_data, with_text), blocks))
+        
+        text = None
+        if with_text:
+            text = "\n".join(part.strip("\n\f") for part, _ in results) + "\n"
+        if not with_data:
+            return text, None
+        
+        # Liida sõnade andmed: nihuta koordinaadid ja plokkide numbrid
+        data = {key: [] for key in results[0][1]}
+        block_offset = 0
+        for (top, _), (_, part) in zip(blocks, results):
+            for key, values in part.items():
+                if key == "top":
+                    values = [value + top for value in values]
+                elif key == "block_num":
+                    # Lehekülje tasandi kirjel (block_num 0) plokki pole
+                    values = [value + block_offset if value else 0 for value in values]
+                data[key].extend(values)
+            block_offset += max(part["block_num"], default=0)
+        
+        return text, data
+    
+    def _ocr_lines(self, data):
+        """Rühmita Tesseracti sõnade andmed ridadeks
+        
+        Args:
+            data: pytesseract.image_to_data väljund (Output.DICT)
+            
+        Returns:
+            List ridadest lugemisjärjekorras; iga rida on dict võtmetega key (plokk, lõik, rida)
+            ja words (sõnade kirjete indeksid andmetes)
+        """
+        lines = []
+        index = {}
+        for i, level in enumerate(data["level"]):
+            if level != 5 or not str(data["text"][i]).strip():
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            if key not in index:
+                index[key] = len(lines)
+                lines.append({"key": key, "words": []})
+            lines[index[key]]["words"].append(i)
+        return lines
+    
+    def _run_ocr_refined(self, binary, lang):
+        """Tuvasta tekst vähendatud leheküljelt ja täpsusta ainult ebakindlaid ridu
+        
+        Kogu lehekülg tuvastatakse OCR_REFINE_SCALE korda vähendatuna. Read, milles mõne
+        sõna usaldusväärsus jääb alla OCR_REFINE_MIN_CONFIDENCE, lõigatakse välja
+        täisresolutsiooniga leheküljelt ja tuvastatakse uuesti üherealisena (psm 7).
+        Uus tulemus asendab rea, kui selle keskmine usaldusväärsus on suurem.
+        
+        Args:
+            binary: OCR-i jaoks ette valmistatud pilt (vt _prepare_for_ocr)
+            lang: OCR keele kood
+            
+        Returns:
+            Tuple (tekst, sõnade andmed täisresolutsiooniga lehekülje koordinaatides)
+        """
+        small = cv2.resize(binary, None, fx=OCR_REFINE_SCALE, fy=OCR_REFINE_SCALE, interpolation=cv2.INTER_AREA)
+        _, data = self._run_ocr_blocks(small, lang, with_data=True, with_text=False)
+        for key in ("left", "top", "width", "height"):
+            data[key] = [int(round(value / OCR_REFINE_SCALE)) for value in data[key]]
+        
+        # Leia read, mille mõni sõna on ebakindel
+        lines = self._ocr_lines(data)
+        uncertain = [line for line in lines
+                     if min(float(data["conf"][i]) for i in line["words"]) < OCR_REFINE_MIN_CONFIDENCE]
+        
+        def refine(line):
+            words = line["words"]
+            h, w = binary.shape[:2]
+            left = max(0, min(data["left"][i] for i in words) - OCR_REFINE_PADDING)
+            top = max(0, min(data["top"][i] for i in words) - OCR_REFINE_PADDING)
+            right = min(w, max(data["left"][i] + data["width"][i] for i in words) + OCR_REFINE_PADDING)
+            bottom = min(h, max(data["top"][i] + data["height"][i] for i in words) + OCR_REFINE_PADDING)
+            _, line_data = self._ocr_image(binary[top:bottom, left:right], lang, self._ocr_config(psm=7),
+                                           with_data=True, with_text=False)
+            return left, top, line_data
+        
+        replacements = {}
+        if uncertain:
+            with ThreadPoolExecutor(max_workers=self.ocr_workers) as executor:
+                for line, (left, top, line_data) in zip(uncertain, executor.map(refine, uncertain)):
+                    new_words = [i for i, level in enumerate(line_data["level"])
+                                 if level == 5 and str(line_data["text"][i]).strip()]
+                    if not new_words:
+                        continue
+                    old_conf = np.mean([float(data["conf"][i]) for i in line["words"]])
+                    new_conf = np.mean([float(line_data["conf"][i]) for i in new_words])
+                    if new_conf > old_conf:
+                        replacements[line["key"]] = (left, top, line_data, new_words)
+        
+        if self.metrics is not None:
+            self.metrics.add_page_info(self.metrics.current_page, "ocr_refined_lines",
+                                       f"{len(replacements)}/{len(lines)}")
+        
+        # Asenda täpsustatud ridade sõnad ja koosta tekst ridade kaupa
+        refined = {key: [] for key in data}
+        text_lines = []
+        previous = None
+        for line in lines:
+            if previous is not None and line["key"][:2] != previous[:2]:
+                text_lines.append("")
+            previous = line["key"]
+            
+            if line["key"] in replacements:
+                left, top, line_data, new_words = replacements[line["key"]]
+                for number, i in enumerate(new_words, start=1):
+                    for key in refined:
+                        value = line_data[key][i]
+                        if key == "left":
+                            value += left
+                        elif key == "top":
+                            value += top
+                        elif key in ("block_num", "par_num", "line_num"):
+                            value = dict(zip(("block_num", "par_num", "line_num"), line["key"]))[key]
+                        elif key == "word_num":
+                            value = number
+                        refined[key].append(value)
+                words = [str(line_data["text"][i]).strip() for i in new_words]
+            else:
+                for i in line["words"]:
+                    for key in refined:
+                        refined[key].append(data[key][i])
+                words = [str(data["text"][i]).strip() for i in line["words"]]
+            text_lines.append(" ".join(words))
+        
+        return "\n".join(text_lines) + "\n", refined
     
     def ocr_document(self, image_path, lang="eng"):
         """Teksti tuvastamine pildilt
@@ -641,62 +2108,270 @@ class DocumentProcessor:
             
         Returns:
             Tuvastatud tekst
+            
+        Raises:
+            ImageQualityError: Kui kvaliteedikontroll lükkas pildi tagasi
         """
-        # Töötle pilti ilma optimeerimiseta (OCR vajab head kvaliteeti)
-        processed = self.process_image(image_path, optimization_level=0)
+        self.check_quality(image_path)
         
-        # Salvesta töödeldud pilt ajutiselt OCR-i jaoks
-        temp_path = f"temp_ocr_{os.path.basename(image_path)}"
-        cv2.imwrite(temp_path, processed)
+        # OCR vajab ainult sirgestatud ja binariseeritud pilti (vt _prepare_for_ocr)
+        processed = self._prepare_for_ocr(image_path)
         
-        # OCR seadistused
-        config = '--psm 6'  # Eeldame, et tekst on ühel real
-        
-        # Tuvasta tekst
-        text = pytesseract.image_to_string(Image.open(temp_path), lang=lang, config=config)
-        
-        # Kustuta ajutine pilt
-        os.remove(temp_path)
+        # Tuvasta tekst valitud OCR profiiliga
+        self._set_metrics_page(image_path)
+        if self.metrics is not None:
+            self.metrics.add_page_info(image_path, "ocr_profile", self.ocr_profile)
+        with self._stage("ocr"):
+            text, _ = self._run_ocr(processed, lang)
         
         return text
     
     def extract_structured_data(self, image_path, lang="est"):
         """Eraldab struktureeritud andmeid dokumendist
         
+        Kui pildil on makse QR-kood või vöötkood (vt _decode_payment_code), võetakse
+        selle väljad koodist. OCR jäetakse vahele, kui kood sisaldab kõiki
+        PAYMENT_CODE_COMPLETE_FIELDS välju.
+        
         Args:
             image_path: Pildi tee
             lang: OCR keele kood
             
         Returns:
-            Dict struktureeritud andmetega (arve number, kuupäev, summa jne)
+            Dict struktureeritud andmetega (arve number, kuupäev, summa jne) ja kasutatud
+            OCR profiiliga (ocr_profile). Kui kvaliteedikontroll on sisse lülitatud, on võtme quality all selle tulemus
+            (vt assess_quality); tagasi lükatud pildi väljad jäävad tühjaks
         """
-        # Töötle pilti OCR-i jaoks optimeeritud viisil
-        processed = self.process_image(image_path, optimization_level=0)
+        try:
+            quality = self.check_quality(image_path)
+        except ImageQualityError as e:
+            print(f"Hoiatus: {e}")
+            structured_data = self._parse_invoice_data("", None)
+            structured_data["quality"] = e.quality
+            return structured_data
+        
+        # Makse QR-koodi või vöötkoodi väljad on masinloetavad ja täpsemad kui OCR
+        self._set_metrics_page(image_path)
+        with self._stage("payment_code"):
+            payment = self._decode_payment_code(image_path) or {}
+        code_type = payment.pop("payment_code", None)
+        if code_type is not None and self.metrics is not None:
+            self.metrics.add_page_info(image_path, "payment_code", code_type)
+        
+        if all(payment.get(field) is not None for field in PAYMENT_CODE_COMPLETE_FIELDS):
+            structured_data = self._parse_invoice_data("", None)
+            structured_data.update(payment)
+            if quality is not None:
+                structured_data["quality"] = quality
+            return structured_data
+        
+        # Töötle pilti OCR-i jaoks optimeeritud viisil (vt _prepare_for_ocr)
+        processed = self._prepare_for_ocr(image_path)
+        
+        self._set_metrics_page(image_path)
+        if self.metrics is not None:
+            self.metrics.add_page_info(image_path, "ocr_profile", self.ocr_profile)
+        
+        # Korduva tarnija arvel tuvastatakse ainult malli väljade alad, mida kood ei sisalda
+        structured_data = None
+        if self.templates is not None:
+            header = processed[:max(1, int(processed.shape[0] * TEMPLATE_HEADER_FRACTION))]
+            phash = self._perceptual_hash(header)
+            key, template = self.templates.find(phash)
+            if template is not None:
+                with self._stage("template_ocr"):
+                    structured_data = self._extract_with_template(processed, template, lang, covered=payment)
+                if structured_data is None:
+                    print(f"Mall {key} ei sobinud, tuvastan kogu lehekülje: {image_path}")
+                elif self.metrics is not None:
+                    self.metrics.add_page_info(image_path, "template", key)
+        
+        if structured_data is None:
+            with self._stage("ocr"):
+                # Eraldame teksti ja lisaks tekstiplokkide andmed koos koordinaatidega
+                text, data = self._run_ocr(processed, lang, with_data=True)
+            
+            # Struktureeritud andmete eraldamine
+            with self._stage("parse"):
+                structured_data = self._parse_invoice_data(text, data)
+            
+            # Jäta väljade asukohad meelde järgmiste sama tarnija arvete jaoks
+            if self.templates is not None:
+                self.templates.learn(structured_data, data, phash, processed.shape[1], processed.shape[0])
         
-        # Salvesta töödeldud pilt ajutiselt OCR-i jaoks
-        temp_path = f"temp_ocr_{os.path.basename(image_path)}"
-        cv2.imwrite(temp_path, processed)
+        structured_data.update(payment)
+        structured_data["ocr_profile"] = self.ocr_profile
+        if quality is not None:
+            structured_data["quality"] = quality
         
-        # Kasuta täiustatud OCR seadistusi
-        config = '--psm 6 --oem 1'  # 1 = LSTM mootor, mis on täpsem
+        return structured_data
+    
+    def _parse_payment_code(self, text):
+        """Parsi makse QR-koodi või vöötkoodi sisu
         
-        # Kasuta Tesseract OCR-i, et eraldada tekst
-        text = pytesseract.image_to_string(Image.open(temp_path), lang=lang, config=config)
+        Toetatud on SEPA makse QR-kood (EPC069-12, algab reaga "BCD") ja Soome
+        virtuaalne viivakood (54 numbrit, versioonid 4 ja 5). EPC koodi vaba teksti
+        selgitusest otsitakse ka arve numbrit ja kuupäeva.
         
-        # Eraldame lisaks tekstiplokkide andmed koos koordinaatidega
-        data = pytesseract.image_to_data(Image.open(temp_path), lang=lang, config=config, output_type=pytesseract.Output.DICT)
+        Args:
+            text: Koodi sisu
+            
+        Returns:
+            Dict leitud väljadega ja koodi tüübiga (payment_code) või None, kui kood pole makseandmetega
+        """
+        text = text.strip()
+        lines = [line.strip() for line in text.replace("\r", "").split("\n")]
+        
+        if lines[0] == "BCD" and len(lines) >= 7 and lines[3] == "SCT":
+            lines += [""] * (11 - len(lines))
+            payment = {
+                "payment_code": "epc",
+                "supplier_name": lines[5] or None,
+                "supplier_iban": lines[6].replace(" ", "") or None,
+                "total_amount": None,
+                "reference_number": lines[9] or None
+            }
+            amount = re.fullmatch(r"EUR(\d+(?:\.\d{1,2})?)", lines[7])
+            if amount:
+                payment["total_amount"] = float(amount.group(1))
+            # Vaba tekstiga selgitus sisaldab sageli arve numbrit
+            if lines[10]:
+                remittance = self._parse_invoice_data(lines[10], None)
+                payment["invoice_number"] = remittance["invoice_number"]
+                payment["invoice_date"] = remittance["invoice_date"]
+            return {key: value for key, value in payment.items() if value is not None}
+        
+        if len(text) == VIRTUAL_BARCODE_LENGTH and text.isdigit() and text[0] in "45":
+            payment = {
+                "payment_code": "virtual_barcode",
+                "supplier_iban": "FI" + text[1:17],
+                "total_amount": int(text[17:23]) + int(text[23:25]) / 100.0
+            }
+            if text[0] == "4":
+                reference = text[28:48].lstrip("0")
+            else:
+                reference = "RF" + text[25:27] + text[27:48].lstrip("0")
+            if reference:
+                payment["reference_number"] = reference
+            if text[48:54] != "000000":
+                payment["due_date"] = f"{text[52:54]}.{text[50:52]}.20{text[48:50]}"
+            return payment
+        
+        return None
+    
+    def _decode_payment_code(self, image_path):
+        """Otsi pildilt makse QR-koodi või vöötkoodi
         
-        # Kustuta ajutine pilt
-        os.remove(temp_path)
+        Pilt dekodeeritakse vähendatud hallskaalas (vt PAYMENT_CODE_MIN_SIDE). Kui
+        vähendatud pildilt leitakse kood, mille sisu ei õnnestu lugeda (nt väike QR-kood),
+        proovitakse uuesti täisresolutsioonis.
         
-        # Struktureeritud andmete eraldamine
-        structured_data = self._parse_invoice_data(text, data)
+        Args:
+            image_path: Pildi tee
+            
+        Returns:
+            Dict koodist leitud väljadega (vt _parse_payment_code) või None, kui koodi ei leitud
+        """
+        gray = self._read_image(image_path, min_side=PAYMENT_CODE_MIN_SIDE, grayscale=True)
+        if gray is None:
+            return None
+        
+        candidates, undecoded = self._find_payment_codes(gray)
+        if not candidates and undecoded:
+            full = self._read_image(image_path, grayscale=True)
+            if full is not None and full.shape != gray.shape:
+                candidates, _ = self._find_payment_codes(full)
+        
+        for text in candidates:
+            payment = self._parse_payment_code(text)
+            if payment is not None:
+                print(f"Makse kood leitud ({payment['payment_code']}): {image_path}")
+                return payment
+        return None
+    
+    def _find_payment_codes(self, gray):
+        """Leia hallskaala pildilt QR-koodid ja vöötkoodid
         
-        return structured_data
+        Args:
+            gray: Hallskaala pilt
+            
+        Returns:
+            Tuple (loetud koodide sisu list, kas leiti koode, mille sisu ei õnnestunud lugeda)
+        """
+        candidates = []
+        undecoded = False
+        text, points, _ = cv2.QRCodeDetector().detectAndDecode(gray)
+        if text:
+            candidates.append(text)
+        elif points is not None:
+            undecoded = True
+        ok, barcodes, _, points = cv2.barcode.BarcodeDetector().detectAndDecodeWithType(gray)
+        if ok:
+            candidates.extend(code for code in barcodes if code)
+        if points is not None and (not ok or not all(barcodes)):
+            undecoded = True
+        return candidates, undecoded
+    
+    def _extract_with_template(self, processed, template, lang, covered=None):
+        """Eralda arve andmed ainult tarnija malli väljade aladest
+        
+        Iga välja ala tuvastatakse üherealisena (psm 7) ainult välja jaoks lubatud
+        märkidega. Registrikoodi ala tuvastatakse alati ja tarnija nimi võetakse mallist
+        ainult siis, kui tuvastatud registrikood on sama mis mallis. Kui ala serv lõikab
+        läbi teksti, mõne välja väärtus ei vasta tervikuna oodatud kujule või registrikood
+        erineb, tagastatakse None ja kasutatakse täislehekülje OCR-i.
+        
+        Args:
+            processed: OCR-i jaoks ette valmistatud pilt (vt _prepare_for_ocr)
+            template: Mall (vt invoice_templates.SupplierTemplateStore)
+            lang: OCR keele kood
+            covered: Valikuline dict juba teadaolevate väljadega (nt makse QR-koodist),
+                mille alasid ei tuvastata
+            
+        Returns:
+            Dict struktureeritud andmetega või None, kui mall ei sobinud
+        """
+        height, width = processed.shape[:2]
+        covered = covered or {}
+        if "supplier_reg_number" not in template["fields"]:
+            return None
+        fields = [(field, box) for field, box in template["fields"].items()
+                  if field == "supplier_reg_number" or covered.get(field) is None]
+        
+        def recognize(item):
+            field, box = item
+            left, top, right, bottom = field_region(box, width, height)
+            region = processed[top:bottom, left:right]
+            # Väärtus on mallis salvestatust pikem või ala tabab naabersilti
+            if region.size == 0 or not (region[:, 0].all() and region[:, -1].all()):
+                return None
+            config = f"{self._ocr_config(psm=7)} -c tessedit_char_whitelist={TEMPLATE_FIELDS[field]}"
+            text, _ = self._ocr_image(region, lang, config)
+            return parse_field(field, text)
+        
+        with ThreadPoolExecutor(max_workers=self.ocr_workers) as executor:
+            values = dict(zip((field for field, _ in fields), executor.map(recognize, fields)))
+        
+        if any(value is None for value in values.values()):
+            return None
+        if values["supplier_reg_number"] != str(template["supplier_reg_number"]).upper():
+            return None
+        tax, total = values.get("tax_amount"), values.get("total_amount")
+        if tax is not None and total is not None and tax > total:
+            return None
+        
+        result = self._parse_invoice_data("", None)
+        result.update(values)
+        result["supplier_name"] = template["supplier_name"]
+        return result
     
     def _parse_invoice_data(self, text, ocr_data):
         """Parsi arve tekst struktureeritud andmeteks
         
+        Tekst läbitakse päiseväljade leidmiseks ühe korra (vt INVOICE_FIELD_SCANNER).
+        Igast mustrist jäetakse meelde esimene vaste ja väli võetakse kõrgeima
+        prioriteediga mustrist, millel vaste on (vt INVOICE_FIELD_PRIORITIES).
+        
         Args:
             text: OCR-iga tuvastatud tekst
             ocr_data: Tesseracti väljund sõnastiku kujul
@@ -713,142 +2388,84 @@ class DocumentProcessor:
             "tax_amount": None,
             "supplier_name": None,
             "supplier_reg_number": None,
+            "supplier_iban": None,
+            "reference_number": None,
             "line_items": []
         }
         
-        # Regulaaravaldised erinevate andmeväljade tuvastamiseks
-        # Arve number (otsime standardseid formaate)
-        invoice_number_patterns = [
-            r"(?:arve\s*nr|invoice\s*no|arve\s*number)[:\.\s]*([A-Z0-9\-\/]+)",
-            r"(?:arve|invoice)[:\.\s]*([A-Z0-9\-\/]+)"
-        ]
-        
-        # Kuupäevad
-        date_patterns = [
-            r"(?:kuupäev|date)[:\.\s]*(\d{1,2}[\.\/\-]\d{1,2}[\.\/\-]\d{2,4})",
-            r"(\d{1,2}[\.\/\-]\d{1,2}[\.\/\-]\d{2,4})"
-        ]
-        
-        # Summa
-        amount_patterns = [
-            r"(?:summa|kokku|total)[:\.\s]*(\d+[,\.]\d{2})",
-            r"(?:summa|kokku|total)[:\.\s]*(\d+)[€\s]",
-            r"€\s*(\d+[,\.]\d{2})"
-        ]
-        
-        # Käibemaks
-        tax_patterns = [
-            r"(?:käibemaks|km|vat)[:\.\s]*(\d+[,\.]\d{2})",
-            r"(?:käibemaks|km|vat)[:\.\s]*(\d+)[€\s]"
-        ]
-        
-        # Tarnija nimi
-        supplier_patterns = [
-            r"(?:müüja|supplier|vendor)[:\.\s]*([^\n]+)"
-        ]
-        
-        # Registreerimiskood / VAT number
-        reg_number_patterns = [
-            r"(?:reg\.\s*nr|registration\s*no|reg\s*code)[:\.\s]*([A-Z0-9]+)",
-            r"(?:kmkr|vat\s*no)[:\.\s]*([A-Z0-9]+)"
-        ]
-        
-        # Otsime iga välja regulaaravaldiste abil
-        for pattern in invoice_number_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result["invoice_number"] = match.group(1).strip()
-                break
+        # Skanner ja arveridade muster töötavad väiketähtedega tekstil. "İ" on ainus täht,
+        # mille väiketäht on kahe märgi pikkune, see asendatakse, et positsioonid ei nihkuks
+        folded = text.replace("\u0130", "I").lower()
+        
+        # Mustrite esimesed vasted ja kuupäevad (märgendiga kuupäevad enne kõiki kuupäevi)
+        first_matches = {}
+        labelled_dates = []
+        dates = []
+        date_end = 0
+        for match in INVOICE_FIELD_SCANNER.finditer(folded):
+            name = match.lastgroup
+            value = text[match.start(name):match.end(name)]
+            if name == "labelled_date":
+                labelled_dates.append(value)
+            elif name == "date":
+                # Kuupäevad ei kattu (nagu re.finditer), "12.03.2024" sees ei loeta "2.03.2024"
+                if match.start() >= date_end:
+                    dates.append(value)
+                    date_end = match.start() + len(value)
+            elif name not in first_matches:
+                first_matches[name] = value
+        
+        for field, names in INVOICE_FIELD_PRIORITIES.items():
+            value = next((first_matches[name] for name in names if name in first_matches), None)
+            if value is None:
+                continue
+            value = value.strip()
+            if field in ("total_amount", "tax_amount"):
+                # Teisendame tekstilise summa numbriks
+                try:
+                    value = float(value.replace(',', '.'))
+                except ValueError:
+                    continue
+            result[field] = value
         
         # Kuupäevade otsing - arveldamise kuupäev on tavaliselt esimene
-        date_matches = []
-        for pattern in date_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                date_matches.append(match.group(1).strip())
-        
+        date_matches = labelled_dates + dates
         if len(date_matches) >= 1:
             result["invoice_date"] = date_matches[0]
         if len(date_matches) >= 2:
             result["due_date"] = date_matches[1]
         
-        # Summa otsing
-        for pattern in amount_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                # Teisendame tekstilise summa numbriks
-                amount_str = match.group(1).strip().replace(',', '.')
-                try:
-                    result["total_amount"] = float(amount_str)
-                except ValueError:
-                    pass
-                break
-        
-        # Käibemaksu otsing
-        for pattern in tax_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                # Teisendame tekstilise summa numbriks
-                tax_str = match.group(1).strip().replace(',', '.')
-                try:
-                    result["tax_amount"] = float(tax_str)
-                except ValueError:
-                    pass
-                break
-        
-        # Tarnija nime otsing
-        for pattern in supplier_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result["supplier_name"] = match.group(1).strip()
-                break
-        
-        # Registreerimisnumbri otsing
-        for pattern in reg_number_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                result["supplier_reg_number"] = match.group(1).strip()
-                break
-        
         # Kui tarnija nimi puudub, proovime määrata seda esimese tekstirea põhjal
-        if not result["supplier_name"] and len(text.strip().split("\n")) > 0:
-            result["supplier_name"] = text.strip().split("\n")[0].strip()
+        if not result["supplier_name"]:
+            result["supplier_name"] = text.strip().split("\n", 1)[0].strip()
         
-        # Proovime tuvastada ka tabelis olevaid ridu
-        lines = text.split('\n')
+        # Proovime tuvastada ka tabelis olevaid ridu (lihtsustatud, eeldab, et kogus,
+        # ühik ja hind on reas); INVOICE_ITEM_LINE leiab ainult hinna ja ühikuga read
         line_items = []
-        
-        # Otsime tabelit ridades (lihtsustatud, eeldab, et kogus, ühik, hind on reas)
-        for line in lines:
-            # Kui rida sisaldab numbrit, potentsiaalselt hinda ja mõnda ühikut
-            if re.search(r'\d+[,\.]\d{2}', line) and re.search(r'\b(tk|pcs|kg|g|m|l)\b', line, re.IGNORECASE):
-                # Eraldame rea osadeks
-                parts = re.split(r'\s{2,}', line)
-                if len(parts) >= 3:
-                    item = {
-                        "description": parts[0].strip(),
-                        "quantity": None,
-                        "unit_price": None,
-                        "total": None
-                    }
-                    
-                    # Proovime leida kogust
-                    quantity_match = re.search(r'(\d+(?:[,\.]\d+)?)\s*(tk|pcs|kg|g|m|l)', line, re.IGNORECASE)
-                    if quantity_match:
-                        try:
-                            item["quantity"] = float(quantity_match.group(1).replace(',', '.'))
-                        except ValueError:
-                            pass
-                    
-                    # Proovime leida hinda
-                    price_match = re.search(r'(\d+[,\.]\d{2})', line)
-                    if price_match:
-                        try:
-                            item["unit_price"] = float(price_match.group(1).replace(',', '.'))
-                        except ValueError:
-                            pass
-                    
-                    line_items.append(item)
+        for match in INVOICE_ITEM_LINE.finditer(folded):
+            line = text[match.start():match.end()]
+            # Eraldame rea osadeks
+            parts = ITEM_COLUMN_SEPARATOR.split(line)
+            if len(parts) < 3:
+                continue
+            item = {
+                "description": parts[0].strip(),
+                "quantity": None,
+                "unit_price": None,
+                "total": None
+            }
+            
+            # Proovime leida kogust
+            quantity_match = ITEM_QUANTITY_PATTERN.search(match.group(0))
+            if quantity_match:
+                item["quantity"] = float(quantity_match.group(1).replace(',', '.'))
+            
+            # Proovime leida hinda
+            price_match = ITEM_PRICE_PATTERN.search(line)
+            if price_match:
+                item["unit_price"] = float(price_match.group(1).replace(',', '.'))
+            
+            line_items.append(item)
         
         result["line_items"] = line_items
         
@@ -861,45 +2478,21 @@ class DocumentProcessor:
             structured_data: Struktureeritud andmed (sõnastik)
             output_path: Väljundfaili tee
         """
-        # CSV päised vastavalt Dolibarr'i impordi nõuetele
-        # NB! Täpne formaat võib sõltuda Dolibarr'i versioonist ja seadistusest
-        headers = [
-            "invoice_ref", "invoice_date", "due_date", 
-            "total_ttc", "total_vat", "supplier_name", "supplier_vat"
-        ]
-        
-        # Koostame andmerea
-        row = [
-            structured_data["invoice_number"] or "",
-            structured_data["invoice_date"] or "",
-            structured_data["due_date"] or "",
-            str(structured_data["total_amount"] or ""),
-            str(structured_data["tax_amount"] or ""),
-            structured_data["supplier_name"] or "",
-            structured_data["supplier_reg_number"] or ""
-        ]
-        
-        # Kirjutame CSV faili
+        # CSV päised ja read vastavalt Dolibarr'i impordi nõuetele (vt ledger_writer.py)
         with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f, delimiter=';')
-            writer.writerow(headers)
-            writer.writerow(row)
+            writer = csv.writer(f, delimiter=CSV_DELIMITER)
+            writer.writerow(INVOICE_CSV_HEADERS)
+            writer.writerow(invoice_csv_row(structured_data))
         
         # Kui on rea-elemendid, lisame ka need eraldi failina
         if structured_data["line_items"]:
             items_output_path = os.path.splitext(output_path)[0] + "_items.csv"
-            item_headers = ["description", "quantity", "unit_price", "total"]
             
             with open(items_output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f, delimiter=';')
-                writer.writerow(item_headers)
+                writer = csv.writer(f, delimiter=CSV_DELIMITER)
+                writer.writerow(ITEM_CSV_HEADERS)
                 for item in structured_data["line_items"]:
-                    writer.writerow([
-                        item["description"] or "",
-                        str(item["quantity"] or ""),
-                        str(item["unit_price"] or ""),
-                        str(item["total"] or "")
-                    ])
+                    writer.writerow(item_csv_row(item))
     
     def export_invoice_data_to_json(self, structured_data, output_path):
         """Ekspordi struktureeritud andmed JSON failina
@@ -988,41 +2581,78 @@ class DocumentProcessor:
             # Puhasta ajutised failid
             shutil.rmtree(temp_dir, ignore_errors=True)
             
-    def extract_structured_data_from_pdf(self, pdf_path, lang="est", dpi=300):
+    def _render_pdf_page(self, pdf_path, page_number, output_dir, dpi=300):
+        """Renderda PDF-ist üks lehekülg pildifailiks
+        
+        Args:
+            pdf_path: PDF-faili tee
+            page_number: Lehekülje number (alates 1)
+            output_dir: Kataloog pildi salvestamiseks
+            dpi: Pildi resolutsioon punktides tolli kohta
+            
+        Returns:
+            Pildifaili tee
+        """
+        with self._stage("render"):
+            image = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number)[0]
+            image_path = os.path.join(output_dir, f"page_{page_number:03d}.jpg")
+            image.save(image_path, 'JPEG')
+        return image_path
+    
+    def extract_structured_data_from_pdf(self, pdf_path, lang="est", dpi=300, line_items=False):
         """
         Eraldab PDF-failist struktureeritud andmed
         
+        Arve päiseväljad (INVOICE_HEADER_FIELDS) asuvad tavaliselt esimesel või viimasel
+        leheküljel. Seetõttu töödeldakse esmalt esimene lehekülg ja, kui mõni päiseväli jäi
+        leidmata, viimane lehekülg. Vahepealsed leheküljed töödeldakse ainult siis, kui
+        soovitakse kõiki arveridu. Lehekülgi renderdatakse ükshaaval.
+        
         Args:
             pdf_path: PDF-faili tee
             lang: OCR keele kood
             dpi: Pildi resolutsioon punktides tolli kohta
+            line_items: Kas eraldada arveread kõigilt lehekülgedelt
             
         Returns:
             dict: Struktureeritud andmed
         """
-        # Konverteeri PDF piltideks
+        page_count = pdfinfo_from_path(pdf_path)["Pages"]
+        if page_count <= 2 or line_items:
+            page_numbers = list(range(1, page_count + 1))
+        else:
+            page_numbers = [1, page_count]
+        
         temp_dir = tempfile.mkdtemp(prefix="pdf_data_")
         try:
-            # Töötleme PDF ja saame pildifailid
-            image_paths = self.process_pdf(pdf_path, output_dir=temp_dir, dpi=dpi)
+            pages = {}
+            for page_number in page_numbers:
+                image_path = self._render_pdf_page(pdf_path, page_number, temp_dir, dpi=dpi)
+                try:
+                    pages[page_number] = self.extract_structured_data(image_path, lang=lang)
+                finally:
+                    os.remove(image_path)
+                
+                # Kui arveridu ei soovita, piisab päiseväljadest
+                header_complete = all(any(data.get(key) is not None for data in pages.values())
+                                      for key in INVOICE_HEADER_FIELDS)
+                if header_complete and not line_items:
+                    break
+            
+            print(f"Andmed eraldatud {len(pages)}/{page_count} leheküljelt: {pdf_path}")
             
-            # Kogume kõigi lehtede andmed
+            # Ühenda andmed lehekülgede järjekorras: esimene leitud väärtus jääb kehtima,
+            # arveread liidetakse
             all_data = {}
-            for i, image_path in enumerate(image_paths):
-                # Eralda andmed igalt lehelt
-                data = self.extract_structured_data(image_path, lang=lang)
-                
-                # Ühenda andmed
-                if i == 0:  # Esimene lehekülg
+            for page_number in sorted(pages):
+                data = pages[page_number]
+                if not all_data:
                     all_data = data
-                else:
-                    # Lisa järgnevate lehtede andmed (kui on)
-                    if 'items' in data and 'items' in all_data:
-                        all_data['items'].extend(data.get('items', []))
-                    # Täienda puuduvaid andmeid
-                    for key, value in data.items():
-                        if key != 'items' and not all_data.get(key):
-                            all_data[key] = value
+                    continue
+                all_data["line_items"].extend(data.get("line_items", []))
+                for key, value in data.items():
+                    if key != "line_items" and all_data.get(key) is None:
+                        all_data[key] = value
             
             return all_data
             
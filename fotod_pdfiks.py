@@ -18,6 +18,12 @@ Kasutamine:
     python fotod_pdfiks.py --input pilt.jpg --output andmed.csv --extract --format csv
     python fotod_pdfiks.py --input dokument.pdf --output andmed.csv --extract --format csv
     python fotod_pdfiks.py --input dokument.pdf --output tekst.txt --text
+    python fotod_pdfiks.py --input pildikaust/ --output tekstid/ --text --ocr-profile fast
+    python fotod_pdfiks.py --input pildikaust/ --output dokument.pdf --metrics mõõdikud/
+    python fotod_pdfiks.py --input pildikaust/ --output dokument.pdf --profile profiil/
+    python fotod_pdfiks.py --input pildikaust/ --output dokument.pdf --max-size 5MB
+    python fotod_pdfiks.py --input pildikaust/ --output dokument.pdf --drop-blank --dedupe
+    python fotod_pdfiks.py --input pildikaust/ --output andmed/ --extract --quality-gate reject
 """
 
 import os
@@ -27,7 +33,12 @@ import glob
 import json
 import csv
 import re
-from doc_processor import DocumentProcessor
+from doc_processor import (DocumentProcessor, ImageQualityError, load_optimization_profiles, QUALITY_GATE_MODES,
+                           OCR_PROFILES, DEFAULT_OCR_PROFILE)
+from perf_metrics import StageMetrics
+from invoice_templates import SupplierTemplateStore
+from ledger_writer import InvoiceLedgerWriter
+from perf_profile import RunProfiler
 
 
 def get_image_files(input_path):
@@ -100,7 +111,53 @@ def create_output_dir(output_path):
         os.makedirs(output_dir, exist_ok=True)
 
 
-def process_single_image(processor, image_path, output_path, dpi, optimization_level, ocr=False, ocr_lang="eng", debug_dir=None):
+def parse_size(value):
+    """
+    Teisenda failimahu kirjeldus (nt "5MB", "500k", "2.5 MiB") baitideks
+    
+    Args:
+        value: Mahu kirjeldus; ühikud B, KB, MB ja GB (1024-kordsed)
+        
+    Returns:
+        Maht baitides
+    """
+    match = re.match(r'^\s*(\d+(?:[.,]\d+)?)\s*([kmg]?)(?:i?b)?\s*$', value, re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError(f"Vigane failimaht: {value} (nt 5MB, 500KB)")
+    number = float(match.group(1).replace(',', '.'))
+    multiplier = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}[match.group(2).lower()]
+    size = int(number * multiplier)
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"Failimaht peab olema positiivne: {value}")
+    return size
+
+
+def screening_summary(report):
+    """
+    Koosta tühjade ja korduvate lehekülgede kontrolli kokkuvõte
+    
+    Args:
+        report: DocumentProcessor.screen_pages aruanne
+        
+    Returns:
+        Kokkuvõtte tekst
+    """
+    blank = [entry for entry in report if entry["blank"]]
+    duplicates = [entry for entry in report if entry["duplicate_of"]]
+    dropped = sum(1 for entry in report if entry["dropped"])
+    lines = [f"Lehekülgede kontroll: {len(report)} pilti, tühje {len(blank)}, "
+             f"korduvaid {len(duplicates)}, välja jäetud {dropped}"]
+    for entry in blank:
+        status = "välja jäetud" if entry["dropped"] else "alles jäetud"
+        lines.append(f"  Tühi lehekülg ({status}): {os.path.basename(entry['image'])}")
+    for entry in duplicates:
+        lines.append(f"  Korduv lehekülg (välja jäetud): {os.path.basename(entry['image'])} "
+                     f"(sama mis {os.path.basename(entry['duplicate_of'])})")
+    return "\n".join(lines)
+
+
+def process_single_image(processor, image_path, output_path, dpi, optimization_level, ocr=False, ocr_lang="eng", debug_dir=None,
+                         passthrough=False, max_bytes=None):
     """
     Töötle üks pildifail ja konverteeri see PDF-iks
     
@@ -113,12 +170,16 @@ def process_single_image(processor, image_path, output_path, dpi, optimization_l
         ocr: Kas teha OCR
         ocr_lang: OCR keel
         debug_dir: Debug väljundkaust
+        passthrough: Kas lisada tasased JPEG-id PDF-i muutmata kujul
+        max_bytes: Valikuline PDF-i maksimaalne maht baitides
     """
-    # Töötle pilti
-    processor.process_image(image_path, output_dir=debug_dir, optimization_level=optimization_level)
-    
-    # Konverteeri PDF-iks
-    processor.convert_to_pdf([image_path], output_path, dpi=dpi, optimization_level=optimization_level)
+    # Töötle pilt ja konverteeri PDF-iks (kvaliteedikontrollis tagasi lükatud pilt jäetakse vahele)
+    try:
+        processor.convert_to_pdf([image_path], output_path, dpi=dpi, optimization_level=optimization_level,
+                                 output_dir=debug_dir, passthrough=passthrough, max_bytes=max_bytes)
+    except ImageQualityError:
+        print(f"PDF-i ei loodud: {output_path}")
+        return
     print(f"PDF loodud: {output_path}")
     
     # OCR töötlus, kui soovitud
@@ -132,7 +193,7 @@ def process_single_image(processor, image_path, output_path, dpi, optimization_l
         print(f"OCR tulemus salvestatud: {text_path}")
 
 
-def extract_structured_data(processor, image_path, output_format, lang):
+def extract_structured_data(processor, image_path, output_format, lang, line_items=False):
     """
     Eralda struktureeritud andmed dokumendist ja salvesta need vastavalt formaadile
     
@@ -141,6 +202,7 @@ def extract_structured_data(processor, image_path, output_format, lang):
         image_path: Pildi või PDF-faili tee
         output_format: Väljundformaat (json või csv)
         lang: OCR keele kood
+        line_items: Kas eraldada PDF-i arveread kõigilt lehekülgedelt
     
     Returns:
         str: Väljundfaili tee
@@ -148,7 +210,7 @@ def extract_structured_data(processor, image_path, output_format, lang):
     # Kontrolli, kas tegu on PDF-failiga
     if image_path.lower().endswith('.pdf'):
         # Eralda andmed PDF-failist
-        data = processor.extract_structured_data_from_pdf(image_path, lang=lang)
+        data = processor.extract_structured_data_from_pdf(image_path, lang=lang, line_items=line_items)
     else:
         # Eralda andmed pildifailist
         data = processor.extract_structured_data(image_path, lang=lang)
@@ -179,7 +241,7 @@ def extract_text(processor, image_path, output_path, lang):
         lang: OCR keele kood
         
     Returns:
-        str: OCR tulemus (tekst)
+        str: OCR tulemus (tekst) või None, kui kvaliteedikontroll lükkas pildi tagasi
     """
     print(f"Eraldan teksti failist: {image_path}")
     
@@ -188,8 +250,12 @@ def extract_text(processor, image_path, output_path, lang):
         # Eralda tekst PDF-failist
         text = processor.extract_text_from_pdf(image_path, lang=lang)
     else:
-        # Eralda tekst pildifailist
-        text = processor.ocr_document(image_path, lang=lang)
+        # Eralda tekst pildifailist (kvaliteedikontrollis tagasi lükatud pildist teksti ei eraldata)
+        try:
+            text = processor.ocr_document(image_path, lang=lang)
+        except ImageQualityError as e:
+            print(f"Hoiatus: {e}")
+            return None
     
     # Salvesta tulemus tekstifaili
     if output_path:
@@ -211,6 +277,13 @@ def main():
     parser.add_argument('--ocr', action='store_true', help='Tuvasta tekst (OCR)')
     parser.add_argument('--text', action='store_true', help='Eralda tekst dokumendist ja salvesta tekstifaili')
     parser.add_argument('--lang', default='est', help='OCR keele kood (vaikimisi: est)')
+    parser.add_argument('--ocr-profile', default=DEFAULT_OCR_PROFILE, choices=list(OCR_PROFILES),
+                        help='OCR-i kiirusprofiil: fast (kiire mudel, hõre paigutus), balanced või '
+                             f'accurate (täpne mudel, automaatne paigutus) (vaikimisi: {DEFAULT_OCR_PROFILE})')
+    parser.add_argument('--ocr-workers', type=int, default=1, metavar='N',
+                        help='Tuvasta lehekülje tekstiplokke paralleelselt N protsessiga (0 = kõik protsessorituumad, vaikimisi 1)')
+    parser.add_argument('--ocr-refine', action='store_true',
+                        help='Tuvasta lehekülg vähendatult ja ebakindlad read uuesti täisresolutsioonis (kiirem OCR)')
     parser.add_argument('--optimize', type=int, default=2, choices=[0, 1, 2, 3], 
                         help='Optimeerimise tase: 0=max kvaliteet, 3=min suurus (vaikimisi: 2)')
     parser.add_argument('--use-ai', action='store_true', help='Kasuta AI-põhist tausta eemaldamist (kui rembg on installitud)')
@@ -218,9 +291,64 @@ def main():
                         help='Töötle iga sisendfail eraldi PDF-iks (--output peab siis olema kaust)')
     parser.add_argument('--extract', action='store_true', help='Eralda struktureeritud andmed dokumentidest')
     parser.add_argument('--format', default='json', choices=['json', 'csv'], help='Struktureeritud andmete väljundformaat')
+    parser.add_argument('--line-items', action='store_true',
+                        help='Eralda mitmeleheküljelise PDF-i arveread kõigilt lehekülgedelt '
+                             '(vaikimisi töödeldakse ainult esimest ja viimast lehekülge)')
+    parser.add_argument('--ledger', action='store_true',
+                        help='Kirjuta kõigi arvete andmed ühte koondfaili (--format csv: Dolibarr CSV ja _items.csv, '
+                             'json: JSON Lines); korduvad arved (sama registrikood ja arve number) jäetakse välja')
+    parser.add_argument('--templates', metavar='FAIL',
+                        help='Tarnijate mallide JSON-fail: korduva tarnija arvel tuvastatakse ainult väljade alad, '
+                             'uute tarnijate väljade asukohad salvestatakse faili')
+    parser.add_argument('--passthrough', action='store_true',
+                        help='Lisa tasased JPEG-id, mis ei vaja sirgestamist ega vähendamist, PDF-i muutmata kujul')
+    parser.add_argument('--max-size', type=parse_size, metavar='MAHT',
+                        help='PDF-i maksimaalne maht (nt 5MB); iga lehekülje skaala ja kvaliteet valitakse selle järgi')
+    parser.add_argument('--drop-blank', action='store_true',
+                        help='Jäta tühjad leheküljed (nt lehe tagaküljed) enne töötlust välja')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='Jäta sama lehe korduvad pildistused enne töötlust välja')
+    parser.add_argument('--quality-gate', default='off', choices=QUALITY_GATE_MODES,
+                        help='Udusate ja ülevalgustatud fotode kontroll enne töötlust: off (vaikimisi), '
+                             'warn (hoiata) või reject (jäta pilt välja)')
+    parser.add_argument('--optimization-profiles', metavar='FAIL',
+                        help='JSON-fail optimeerimistasemete seadetega (nt benchmark.py corpus --tune tulemus)')
+    parser.add_argument('--metrics', metavar='KAUST',
+                        help='Mõõda töötlusetappide aega ja mälu ning salvesta metrics.json ja metrics.prom kausta')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Mõõda --metrics korral ka Pythoni mälutippe (tracemalloc, aeglasem)')
+    parser.add_argument('--profile', metavar='KAUST',
+                        help='Profileeri kogu käivitus ja salvesta cProfile tulemus ning flamegraph\'i pinud kausta')
     
     args = parser.parse_args()
     
+    # Töötlusetappide mõõdikud, kui soovitud
+    metrics = StageMetrics(trace_memory=args.trace_memory) if args.metrics else None
+    
+    # Kogu käivituse profileerimine, kui soovitud
+    profiler = RunProfiler(args.profile) if args.profile else None
+    
+    try:
+        if profiler is not None:
+            profiler.start()
+        run(args, metrics)
+    finally:
+        if profiler is not None:
+            profile_paths = profiler.stop()
+            print(f"Profiil salvestatud: {', '.join(profile_paths)}")
+        if metrics is not None:
+            json_path, prom_path = metrics.write_reports(args.metrics)
+            print(f"Mõõdikud salvestatud: {json_path}, {prom_path}")
+
+
+def run(args, metrics=None):
+    """
+    Käivita töötlus vastavalt käsurea argumentidele
+    
+    Args:
+        args: argparse tulemus
+        metrics: Valikuline StageMetrics objekt töötlusetappide mõõtmiseks
+    """
     # Optimeerimistaseme kirjeldused
     optimization_descriptions = {
         0: "maksimaalse kvaliteediga",
@@ -239,12 +367,33 @@ def main():
             print(f"Eraldi väljundite režiim: Väljund suunatakse kataloogi {args.output}")
     
     # Loo töötleja
-    processor = DocumentProcessor(debug=args.debug, use_ai=args.use_ai)
+    optimization_profiles = None
+    if args.optimization_profiles:
+        optimization_profiles = load_optimization_profiles(args.optimization_profiles)
+    templates = SupplierTemplateStore(args.templates) if args.templates else None
+    processor = DocumentProcessor(debug=args.debug, use_ai=args.use_ai, metrics=metrics,
+                                  optimization_profiles=optimization_profiles,
+                                  quality_gate=args.quality_gate, ocr_profile=args.ocr_profile,
+                                  ocr_workers=args.ocr_workers or os.cpu_count() or 1,
+                                  ocr_refine=args.ocr_refine, templates=templates)
     
     # Leia pildifailid
     image_files = get_image_files(args.input)
     print(f"Leitud {len(image_files)} pildifaili töötlemiseks")
     
+    # Tühjad ja korduvad leheküljed leitakse vähendatud pildilt enne kallist töötlust
+    screening = None
+    if args.drop_blank or args.dedupe:
+        image_files, report = processor.screen_pages(image_files, drop_blank=args.drop_blank, dedupe=args.dedupe)
+        screening = screening_summary(report)
+        print(screening)
+        print(f"Pärast tühjade ja korduvate lehekülgede kontrolli jäi töötlemiseks {len(image_files)} faili")
+    
+    # Tühja PDF-i või väljundita töötlust pole mõtet alustada
+    if not image_files:
+        print("Viga: Töötlemiseks ei jäänud ühtegi pilti, väljundit ei loodud.")
+        sys.exit(1)
+    
     # Loo väljundkaust
     create_output_dir(args.output)
     
@@ -263,16 +412,33 @@ def main():
         
         # Kontrolli, et väljundkaust oleks olemas
         output_dir = args.output
-        if not output_dir.endswith('/') and os.path.splitext(output_dir)[1] not in ['.json', '.csv']:
+        ledger_extensions = ['.jsonl', '.json', '.csv'] if args.ledger else ['.json', '.csv']
+        if not output_dir.endswith('/') and os.path.splitext(output_dir)[1] not in ledger_extensions:
             output_dir = output_dir + '/'
         create_output_dir(output_dir)
         
+        # Koondfaili režiimis lisatakse kõik arved ühte faili kohe pärast eraldamist
+        ledger = None
+        if args.ledger:
+            ledger_format = 'jsonl' if args.format == 'json' else 'csv'
+            ledger_path = output_dir
+            if output_dir.endswith('/'):
+                ledger_path = os.path.join(output_dir, f"arved.{ledger_format}")
+            try:
+                ledger = InvoiceLedgerWriter(ledger_path, ledger_format)
+            except ValueError as e:
+                print(f"Viga: {e}")
+                sys.exit(1)
+            print(f"Koondfail: {ledger_path}")
+        
         # Töötleme iga faili eraldi
         for i, image_path in enumerate(image_files):
             basename = os.path.splitext(os.path.basename(image_path))[0]
             
             # Väljundfaili teekond
-            if output_dir.endswith('/'):
+            if ledger is not None:
+                output_path = ledger.output_path
+            elif output_dir.endswith('/'):
                 if args.format == 'json':
                     output_path = os.path.join(output_dir, f"{basename}_data.json")
                 else:
@@ -284,12 +450,19 @@ def main():
             
             # Eralda andmed
             if image_path.lower().endswith('.pdf'):
-                data = processor.extract_structured_data_from_pdf(image_path, lang=args.lang)
+                data = processor.extract_structured_data_from_pdf(image_path, lang=args.lang,
+                                                                  line_items=args.line_items)
             else:
                 data = processor.extract_structured_data(image_path, lang=args.lang)
             
             # Salvesta vastavalt formaadile
-            if args.format == 'json':
+            if ledger is not None:
+                if ledger.add(data, source=image_path):
+                    print(f"Arve lisatud koondfaili: {data['invoice_number'] or basename}")
+                else:
+                    print(f"Korduv arve jäeti välja: {data['supplier_reg_number']} {data['invoice_number']}")
+                continue
+            elif args.format == 'json':
                 processor.export_invoice_data_to_json(data, output_path)
                 print(f"JSON andmed eraldatud ja salvestatud: {output_path}")
             else:
@@ -301,6 +474,16 @@ def main():
             if os.path.exists(items_path):
                 print(f"Arve elementide andmed salvestatud: {items_path}")
         
+        if ledger is not None:
+            ledger.close()
+            print(f"Koondfaili lisatud {ledger.written} arvet, korduvaid {ledger.duplicates}: {ledger.output_path}")
+        
+        if templates is not None:
+            templates.save()
+            print(f"Tarnijate mallid salvestatud: {args.templates} ({len(templates.templates)} malli)")
+        
+        if screening:
+            print(screening)
         print(f"Andmete eraldamine lõpetatud!")
         return
     
@@ -328,6 +511,8 @@ def main():
                 extract_text(processor, image_path, output_path, args.lang)
             
             print(f"Teksti eraldamine lõpetatud!")
+        if screening:
+            print(screening)
         return
     
     # Töötleme pildid eraldi või üheks PDF-iks
@@ -348,16 +533,24 @@ def main():
                 args.optimize, 
                 ocr=args.ocr, 
                 ocr_lang=args.lang, 
-                debug_dir=debug_dir
+                debug_dir=debug_dir,
+                passthrough=args.passthrough,
+                max_bytes=args.max_size
             )
             
+        if screening:
+            print(screening)
         print(f"Töötlemine lõpetatud. {len(image_files)} PDF-i loodud kataloogis {args.output}")
     else:
         # OCR töötlus, kui soovitud (teostame enne PDF loomist)
         if args.ocr:
             for i, image_path in enumerate(image_files):
                 print(f"OCR töötlus: {i+1}/{len(image_files)} - {os.path.basename(image_path)}")
-                text = processor.ocr_document(image_path, lang=args.lang)
+                try:
+                    text = processor.ocr_document(image_path, lang=args.lang)
+                except ImageQualityError as e:
+                    print(f"Hoiatus: {e}")
+                    continue
                 
                 # Salvesta OCR tulemus tekstifaili
                 text_file = os.path.splitext(os.path.basename(image_path))[0] + '.txt'
@@ -368,13 +561,21 @@ def main():
         
         # Konverteeri PDF-iks
         print(f"Konverteerin pilte üheks PDF-iks")
-        for i, image_path in enumerate(image_files):
-            print(f"Töötlen: {i+1}/{len(image_files)} - {os.path.basename(image_path)}")
-            # Vahetöötluse etapid salvestatakse debug_dir-i, kui debug režiim on lubatud
-            processor.process_image(image_path, output_dir=debug_dir, optimization_level=args.optimize)
         
-        # Konverteeri kõik töödeldud pildid üheks PDF-iks
-        processor.convert_to_pdf(image_files, args.output, dpi=args.dpi, optimization_level=args.optimize)
+        def show_progress(current, total, image_path):
+            print(f"Töötlen: {current}/{total} - {os.path.basename(image_path)}")
+        
+        # Iga pilt töödeldakse ja kirjutatakse PDF-i kohe, vahetöötluse etapid
+        # salvestatakse debug_dir-i, kui debug režiim on lubatud
+        try:
+            processor.convert_to_pdf(image_files, args.output, dpi=args.dpi, optimization_level=args.optimize,
+                                     output_dir=debug_dir, progress_callback=show_progress,
+                                     passthrough=args.passthrough, max_bytes=args.max_size)
+        except ImageQualityError as e:
+            print(f"Viga: PDF-i ei loodud. {e}")
+            sys.exit(1)
+        if screening:
+            print(screening)
         print(f"PDF loodud: {args.output}")
 
 
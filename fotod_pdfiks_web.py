@@ -26,6 +26,7 @@ import base64
 import pandas as pd
 from pdf2image import convert_from_path, convert_from_bytes
 import pytesseract
+from doc_processor import OCR_PROFILES, DEFAULT_OCR_PROFILE
 
 # Kontrolli, kas rembg on installitud
 REMBG_AVAILABLE = importlib.util.find_spec("rembg") is not None
@@ -144,6 +145,12 @@ def main():
                     index=0,
                     key="data_format_radio"
                 )
+                line_items = st.checkbox(
+                    "Eralda arveread kõigilt PDF-i lehekülgedelt",
+                    value=False,
+                    help="Vaikimisi loetakse mitmeleheküljelisest PDF-ist ainult esimene ja viimane lehekülg",
+                    key="line_items_checkbox"
+                )
                 st.warning("""
                 **NB!** Andmete eraldamise täpsus sõltub dokumendi kvaliteedist ja formaadist.
                 Parimate tulemuste saamiseks veenduge, et dokument on hästi nähtav ja sellel on 
@@ -190,6 +197,20 @@ def main():
         if ocr_enabled or processing_mode in ["Eralda andmed", "Loo PDF ja eralda andmed", "Eralda tekst"]:
             lang_values = ["eng", "est", "rus", "fin", "swe", "ger", "fra"]
             lang = st.selectbox("OCR keel", lang_values, index=1, key="ocr_lang_select")  # Vaikimisi eesti keel
+            
+            # OCR-i kiirus: suurte arhiivide jaoks saab veidi täpsust kiiruse vastu vahetada
+            ocr_profile_options = {
+                "fast": "Kiire (suurte koguste jaoks)",
+                "balanced": "Tasakaalustatud (soovitatav)",
+                "accurate": "Täpne (aeglasem)"
+            }
+            ocr_profile = st.selectbox(
+                "OCR kiirus",
+                options=list(OCR_PROFILES),
+                format_func=lambda x: ocr_profile_options[x],
+                index=list(OCR_PROFILES).index(DEFAULT_OCR_PROFILE),
+                key="ocr_profile_select"
+            )
         
         # Debug režiim
         debug_mode = st.checkbox("Debug režiim (salvesta vaheetapid)", value=False, key="debug_mode_checkbox")
@@ -293,7 +314,8 @@ def main():
                 text_output_dir = os.path.join(temp_dir, "text_output")
                 os.makedirs(text_output_dir, exist_ok=True)
                 
-                args = ["python", "fotod_pdfiks.py", "--input", temp_dir, "--output", text_output_dir + "/", "--text", "--lang", lang]
+                args = ["python", "fotod_pdfiks.py", "--input", temp_dir, "--output", text_output_dir + "/", "--text", "--lang", lang,
+                        "--ocr-profile", ocr_profile, "--ocr-workers", "0"]
                 
                 # Lisa AI-põhine tausta eemaldamine, kui see on lubatud
                 if REMBG_AVAILABLE and use_ai:
@@ -382,7 +404,7 @@ def main():
                 # Lisa OCR, kui see on lubatud
                 if ocr_enabled:
                     args.append("--ocr")
-                    args.extend(["--lang", lang])
+                    args.extend(["--lang", lang, "--ocr-profile", ocr_profile, "--ocr-workers", "0"])
                 
                 # Lisa AI-põhine tausta eemaldamine, kui see on lubatud
                 if REMBG_AVAILABLE and use_ai:
@@ -468,7 +490,12 @@ def main():
                 # Määra formaat
                 format_arg = "csv" if data_format.startswith("CSV") else "json"
                 
-                args = ["python", "fotod_pdfiks.py", "--input", temp_dir, "--output", data_output_dir + "/", "--extract", "--format", format_arg, "--lang", lang]
+                # Kõik arved kirjutatakse ühte koondfaili (CSV korral lisaks arveridade fail)
+                ledger_path = os.path.join(data_output_dir, "arved.jsonl" if format_arg == "json" else "arved.csv")
+                args = ["python", "fotod_pdfiks.py", "--input", temp_dir, "--output", ledger_path, "--extract", "--ledger",
+                        "--format", format_arg, "--lang", lang, "--ocr-profile", ocr_profile, "--ocr-workers", "0"]
+                if line_items:
+                    args.append("--line-items")
                 
                 # Lisa AI-põhine tausta eemaldamine, kui see on lubatud
                 if REMBG_AVAILABLE and use_ai:
@@ -510,59 +537,37 @@ def main():
                 # Oota, kuni protsess lõpetab
                 return_code = process.wait()
                 
-                if return_code == 0:
-                    # Leia kõik eraldatud andmefailid
+                if return_code == 0 and os.path.exists(ledger_path):
+                    # Koondfail ja arveridade fail (kui arveridu leiti) allalaadimiseks
+                    items_path = os.path.splitext(ledger_path)[0] + "_items.csv"
                     if format_arg == "json":
-                        data_paths = glob.glob(os.path.join(data_output_dir, "*_data.json"))
-                        item_paths = glob.glob(os.path.join(data_output_dir, "*_items.json"))
+                        with open(ledger_path, 'rb') as f:
+                            data_files.append(("arved.jsonl", f.read(), "application/jsonl"))
                     else:
-                        data_paths = glob.glob(os.path.join(data_output_dir, "*_data.csv"))
-                        item_paths = glob.glob(os.path.join(data_output_dir, "*_items.csv"))
+                        with open(ledger_path, 'rb') as f:
+                            data_files.append(("arved.csv", f.read(), "text/csv"))
+                        if os.path.exists(items_path):
+                            with open(items_path, 'rb') as f:
+                                items_bytes = f.read()
+                            if items_bytes.count(b"\n") > 1:
+                                data_files.append(("arved_items.csv", items_bytes, "text/csv"))
                     
-                    # Paki andmefailid ZIP-faili
-                    if data_paths:
-                        # Loo ZIP fail mälus
-                        zip_buffer = io.BytesIO()
-                        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                            # Lisa põhiandmed
-                            for data_path in data_paths:
-                                data_name = os.path.basename(data_path)
-                                zip_file.write(data_path, data_name)
-                            
-                            # Lisa ka ridade andmed, kui need on olemas
-                            for item_path in item_paths:
-                                item_name = os.path.basename(item_path)
-                                zip_file.write(item_path, item_name)
-                        
-                        # Valmista ZIP fail allalaadimiseks
-                        zip_buffer.seek(0)
-                        zip_bytes = zip_buffer.getvalue()
-                        
-                        # Määra ZIP-faili nimi
+                    # Näita eraldatud andmete eelvaadet
+                    with st.expander("Eraldatud andmete näide", expanded=True):
                         if format_arg == "json":
-                            data_zip_name = "andmed.zip" if len(output_files) == 0 else "andmed_json.zip"
-                        else:
-                            data_zip_name = "andmed.zip" if len(output_files) == 0 else "andmed_csv.zip"
-                        
-                        data_files.append((data_zip_name, zip_bytes, "application/zip"))
-                        
-                        # Näita eraldatud andmete eelvaadet (esimene fail)
-                        if data_paths:
-                            first_data_path = data_paths[0]
-                            
-                            with st.expander("Eraldatud andmete näide", expanded=True):
-                                if format_arg == "json":
-                                    with open(first_data_path, 'r', encoding='utf-8') as f:
-                                        json_data = json.load(f)
-                                    
-                                    # Kuva JSON-i andmed loetaval kujul
-                                    st.json(json_data)
-                                else:  # CSV
-                                    try:
-                                        df = pd.read_csv(first_data_path, delimiter=';')
-                                        st.dataframe(df, key="data_preview_csv")
-                                    except:
-                                        st.error("CSV andmete lugemine ebaõnnestus")
+                            with open(ledger_path, 'r', encoding='utf-8') as f:
+                                first_line = f.readline()
+                            if first_line.strip():
+                                # Kuva esimese arve JSON-i andmed loetaval kujul
+                                st.json(json.loads(first_line))
+                        else:  # CSV
+                            try:
+                                df = pd.read_csv(ledger_path, delimiter=';')
+                                st.dataframe(df, key="data_preview_csv")
+                            except:
+                                st.error("CSV andmete lugemine ebaõnnestus")
+                elif return_code == 0:
+                    st.error("Andmete eraldamine lõppes, kuid koondfaili ei loodud. Kontrolli, kas üleslaaditud failide hulgas oli töödeldavaid pilte.")
                 else:
                     st.error(f"Andmete eraldamine ebaõnnestus koodiga {return_code}.")
             
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Fotod PDFiks tarnijate mallid - arve väljade asukohad korduvate tarnijate jaoks
+
+Sama tarnija arvetel on arve number, kuupäevad ja summad alati samas kohas. Pärast
+täislehekülje OCR-i salvestatakse tuvastatud väljade piirdekastid (pytesseract.image_to_data
+sõnade koordinaadid) malliks, mille võti on tarnija registrikood. Mall leitakse lehekülje
+päise tajuräsi järgi. Järgmiste sama küljendusega arvete puhul tuvastab DocumentProcessor
+ainult väljade väikesed alad ja kasutab malli ainult siis, kui alast tuvastatud
+registrikood on sama mis mallis (vt DocumentProcessor._extract_with_template).
+
+Kasutamine:
+    templates = SupplierTemplateStore("mallid.json")
+    processor = DocumentProcessor(templates=templates)
+    ...
+    templates.save()
+"""
+
+import os
+import re
+import json
+import numpy as np
+
+# Väljad, mille asukoht mallis salvestatakse, ja nende tuvastamiseks lubatud märgid
+TEMPLATE_FIELDS = {
+    "invoice_number": "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-/",
+    "invoice_date": "0123456789./-",
+    "due_date": "0123456789./-",
+    "total_amount": "0123456789.,",
+    "tax_amount": "0123456789.,",
+    "supplier_reg_number": "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+}
+
+# Väljad, mis peavad mallis olemas olema, et seda tasuks kasutada
+TEMPLATE_REQUIRED_FIELDS = ["invoice_number", "invoice_date", "total_amount", "supplier_reg_number"]
+
+# Väljade väärtuste mustrid. Malli alast tuvastatud tekst peab mustrile vastama
+# tervikuna, et naabersildi või -välja märgid ei jääks väärtusesse
+# (vt DocumentProcessor._extract_with_template)
+TEMPLATE_PATTERNS = {
+    "invoice_number": re.compile(r"[A-Z0-9][A-Z0-9\-\/]*[A-Z0-9]"),
+    "invoice_date": re.compile(r"(\d{1,2})[\.\/\-](\d{1,2})[\.\/\-](\d{2}|\d{4})"),
+    "due_date": re.compile(r"(\d{1,2})[\.\/\-](\d{1,2})[\.\/\-](\d{2}|\d{4})"),
+    "total_amount": re.compile(r"\d+[,\.]\d{2}"),
+    "tax_amount": re.compile(r"\d+[,\.]\d{2}"),
+    "supplier_reg_number": re.compile(r"(?:[A-Z]{2})?\d{6,12}")
+}
+
+# Kuupäevaväljad, mille päev ja kuu peavad olema lubatud vahemikus
+TEMPLATE_DATE_FIELDS = ["invoice_date", "due_date"]
+
+# Summaväljad, mille väärtus teisendatakse arvuks
+TEMPLATE_AMOUNT_FIELDS = ["total_amount", "tax_amount"]
+
+# Malli leidmise tajuräsi arvutatakse lehekülje ülemiselt osalt (tarnija päis ja
+# arve andmed), sest arveridade arv muudab lehekülje alumist osa igal arvel
+TEMPLATE_HEADER_FRACTION = 1 / 3.0
+
+# Maksimaalne päise tajuräsi erinevus (bittides), mille korral lehekülg loetakse malliga
+# sama küljendusega. Sünteetilistel arvetel erinesid sama tarnija eri arvete päised
+# enamasti 12-36 bitti, eri tarnijate ja tavaliste tekstilehekülgede päised vähemalt 48 bitti
+TEMPLATE_MAX_DISTANCE = 36
+
+# Välja ala laiendus piirdekasti laiuse ja kõrguse suhtes: järgmise arve väärtus võib
+# olla veidi pikem või nihkes, kuid suurem varu tooks alasse välja sildi teksti
+TEMPLATE_MARGIN_X = 0.25
+TEMPLATE_MARGIN_Y = 0.5
+
+
+def _normalize_word(text):
+    """Eemalda sõna ümbert kirjavahemärgid ja ühtlusta tähesuurus"""
+    return str(text).strip().strip(":;,.()").upper()
+
+
+def _word_value(field, word):
+    """Teisenda OCR-i sõna välja väärtusega võrreldavaks
+
+    Args:
+        field: Välja nimi
+        word: Tesseracti tuvastatud sõna
+
+    Returns:
+        Võrreldav väärtus või None, kui sõna ei saa välja väärtus olla
+    """
+    if field in TEMPLATE_AMOUNT_FIELDS:
+        match = TEMPLATE_PATTERNS[field].search(str(word))
+        return float(match.group(0).replace(',', '.')) if match else None
+    return _normalize_word(word)
+
+
+def locate_fields(structured_data, ocr_data, width, height):
+    """Leia tuvastatud väljade väärtuste piirdekastid OCR-i sõnade andmetest
+
+    Summad võetakse viimasest esinemisest (kokkuvõte on tavaliselt lehekülje all),
+    teised väljad esimesest veel kasutamata esinemisest.
+
+    Args:
+        structured_data: _parse_invoice_data tulemus
+        ocr_data: pytesseract.image_to_data väljund (Output.DICT)
+        width: OCR-i pildi laius pikslites
+        height: OCR-i pildi kõrgus pikslites
+
+    Returns:
+        Dict välja nimest piirdekastini [x, y, laius, kõrgus] lehekülje suuruse suhtes (0..1)
+    """
+    boxes = {}
+    used = set()
+    for field in TEMPLATE_FIELDS:
+        value = structured_data.get(field)
+        if value is None:
+            continue
+        expected = value if field in TEMPLATE_AMOUNT_FIELDS else _normalize_word(value)
+        matches = [i for i, word in enumerate(ocr_data["text"])
+                   if i not in used and str(word).strip() and _word_value(field, word) == expected]
+        if not matches:
+            continue
+        i = matches[-1] if field in TEMPLATE_AMOUNT_FIELDS else matches[0]
+        used.add(i)
+        boxes[field] = [ocr_data["left"][i] / width, ocr_data["top"][i] / height,
+                        ocr_data["width"][i] / width, ocr_data["height"][i] / height]
+    return boxes
+
+
+def field_region(box, width, height):
+    """Arvuta malli välja ala pikslites koos varuga
+
+    Args:
+        box: Piirdekast [x, y, laius, kõrgus] lehekülje suuruse suhtes
+        width: Pildi laius pikslites
+        height: Pildi kõrgus pikslites
+
+    Returns:
+        Tuple (vasak, ülemine, parem, alumine)
+    """
+    x, y, w, h = box[0] * width, box[1] * height, box[2] * width, box[3] * height
+    left = int(max(0, x - w * TEMPLATE_MARGIN_X))
+    top = int(max(0, y - h * TEMPLATE_MARGIN_Y))
+    right = int(min(width, x + w * (1 + TEMPLATE_MARGIN_X)))
+    bottom = int(min(height, y + h * (1 + TEMPLATE_MARGIN_Y)))
+    return left, top, right, bottom
+
+
+def parse_field(field, text):
+    """Kontrolli ja teisenda malli alast tuvastatud välja väärtus
+
+    Args:
+        field: Välja nimi
+        text: Välja alast tuvastatud tekst
+
+    Returns:
+        Välja väärtus või None, kui tekst tervikuna ei vasta välja mustrile
+    """
+    value = "".join(str(text).split()).upper()
+    match = TEMPLATE_PATTERNS[field].fullmatch(value)
+    if not match:
+        return None
+    if field in TEMPLATE_DATE_FIELDS:
+        day, month = int(match.group(1)), int(match.group(2))
+        if not (1 <= day <= 31 and 1 <= month <= 12):
+            return None
+    if field in TEMPLATE_AMOUNT_FIELDS:
+        return float(value.replace(',', '.'))
+    return value
+
+
+class SupplierTemplateStore:
+    """Tarnijate arvemallide hoidla JSON-failis"""
+
+    def __init__(self, path):
+        """Laadi mallid failist (kui fail puudub, alustatakse tühjast hoidlast)
+
+        Args:
+            path: JSON-faili tee
+        """
+        self.path = path
+        self.templates = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.templates = json.load(f)
+
+    @staticmethod
+    def _distance(first, second):
+        """Kahe kuueteistkümnendkujul tajuräsi erinevate bittide arv"""
+        first = np.unpackbits(np.frombuffer(bytes.fromhex(first), dtype=np.uint8))
+        second = np.unpackbits(np.frombuffer(bytes.fromhex(second), dtype=np.uint8))
+        return int(np.count_nonzero(first != second))
+
+    @staticmethod
+    def encode_hash(phash):
+        """Teisenda tajuräsi bitimassiiv kuueteistkümnendkujule"""
+        return np.packbits(phash).tobytes().hex()
+
+    def find(self, phash):
+        """Leia lehekülje küljendusele lähim mall
+
+        Args:
+            phash: Lehekülje päise tajuräsi (vt TEMPLATE_HEADER_FRACTION)
+
+        Returns:
+            Tuple (malli võti, mall) või (None, None), kui sobivat malli pole
+        """
+        fingerprint = self.encode_hash(phash)
+        best_key, best_distance = None, TEMPLATE_MAX_DISTANCE + 1
+        for key, template in self.templates.items():
+            distance = self._distance(fingerprint, template["fingerprint"])
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+        if best_key is None:
+            return None, None
+        return best_key, self.templates[best_key]
+
+    def learn(self, structured_data, ocr_data, phash, width, height):
+        """Salvesta täislehekülje OCR-i põhjal tarnija mall
+
+        Mall salvestatakse ainult siis, kui kõigi kohustuslike väljade
+        (TEMPLATE_REQUIRED_FIELDS), sh registrikoodi asukoht leiti.
+
+        Args:
+            structured_data: _parse_invoice_data tulemus
+            ocr_data: pytesseract.image_to_data väljund (Output.DICT)
+            phash: Lehekülje päise tajuräsi
+            width: OCR-i pildi laius pikslites
+            height: OCR-i pildi kõrgus pikslites
+
+        Returns:
+            Malli võti või None, kui malli ei salvestatud
+        """
+        boxes = locate_fields(structured_data, ocr_data, width, height)
+        if not all(field in boxes for field in TEMPLATE_REQUIRED_FIELDS):
+            return None
+        # Malli kasutamisel kontrollitakse registrikoodi, seega peab see vastama mustrile
+        if parse_field("supplier_reg_number", structured_data["supplier_reg_number"]) is None:
+            return None
+
+        key = _normalize_word(structured_data["supplier_reg_number"])
+        self.templates[key] = {
+            "supplier_name": structured_data.get("supplier_name"),
+            "supplier_reg_number": key,
+            "fingerprint": self.encode_hash(phash),
+            "fields": boxes
+        }
+        return key
+
+    def save(self):
+        """Kirjuta mallid JSON-faili"""
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.templates, f, ensure_ascii=False, indent=2)
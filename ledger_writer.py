@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Fotod PDFiks arvete koondfail - kõigi arvete andmed ühte faili järkjärguliselt
+
+Erinevalt DocumentProcessor.export_invoice_data_to_csv() ja export_invoice_data_to_json()
+meetoditest, mis kirjutavad iga dokumendi kohta eraldi andme- ja arveridade faili,
+lisab InvoiceLedgerWriter iga arve kohe pärast eraldamist ühte Dolibarr'i impordiks
+sobivasse CSV-faili (arveread eraldi _items.csv faili) või JSON Lines faili. Korduvad
+arved (sama tarnija registrikood ja arve number) jäetakse mälus hoitava indeksi abil
+välja. Olemasolevale failile lisatakse read lõppu ja selle arved loetakse indeksisse.
+
+Kasutamine:
+    with InvoiceLedgerWriter("arved.csv") as ledger:
+        for image_path in image_paths:
+            ledger.add(processor.extract_structured_data(image_path), source=image_path)
+"""
+
+import os
+import csv
+import json
+
+# Koondfaili vormingud
+LEDGER_FORMATS = ["csv", "jsonl"]
+
+# CSV päised vastavalt Dolibarr'i impordi nõuetele
+# NB! Täpne formaat võib sõltuda Dolibarr'i versioonist ja seadistusest
+INVOICE_CSV_HEADERS = [
+    "invoice_ref", "invoice_date", "due_date",
+    "total_ttc", "total_vat", "supplier_name", "supplier_vat"
+]
+ITEM_CSV_HEADERS = ["description", "quantity", "unit_price", "total"]
+
+# Koondfaili arveridade faili päis: arve number ja tarnija registrikood seovad rea arvega
+# samamoodi nagu invoice_key (eri tarnijatel võib olla sama numbriga arve)
+LEDGER_ITEM_CSV_HEADERS = ["invoice_ref", "supplier_vat"] + ITEM_CSV_HEADERS
+
+# CSV eraldaja
+CSV_DELIMITER = ';'
+
+
+def invoice_csv_row(structured_data):
+    """Koosta arve andmetest CSV rida (vt INVOICE_CSV_HEADERS)
+
+    Args:
+        structured_data: Struktureeritud andmed (sõnastik)
+
+    Returns:
+        List veergude väärtustega
+    """
+    return [
+        structured_data["invoice_number"] or "",
+        structured_data["invoice_date"] or "",
+        structured_data["due_date"] or "",
+        str(structured_data["total_amount"] or ""),
+        str(structured_data["tax_amount"] or ""),
+        structured_data["supplier_name"] or "",
+        structured_data["supplier_reg_number"] or ""
+    ]
+
+
+def item_csv_row(item):
+    """Koosta arverea CSV rida (vt ITEM_CSV_HEADERS)
+
+    Args:
+        item: Arverea andmed (sõnastik)
+
+    Returns:
+        List veergude väärtustega
+    """
+    return [
+        item["description"] or "",
+        str(item["quantity"] or ""),
+        str(item["unit_price"] or ""),
+        str(item["total"] or "")
+    ]
+
+
+def invoice_key(supplier_reg_number, invoice_number):
+    """Arve võti korduste tuvastamiseks
+
+    Args:
+        supplier_reg_number: Tarnija registrikood
+        invoice_number: Arve number
+
+    Returns:
+        Tuple (registrikood, arve number) või None, kui kumbki puudub
+    """
+    if not supplier_reg_number or not invoice_number:
+        return None
+    return (str(supplier_reg_number).strip().upper(), str(invoice_number).strip().upper())
+
+
+class InvoiceLedgerWriter:
+    """Kirjutab arvete andmed järkjärguliselt ühte koondfaili"""
+
+    def __init__(self, output_path, ledger_format=None):
+        """Ava koondfail (olemasolevale failile lisatakse read lõppu)
+
+        Args:
+            output_path: Koondfaili tee
+            ledger_format: "csv" või "jsonl"; vaikimisi määratakse faililaiendi järgi
+        """
+        if ledger_format is None:
+            ledger_format = "jsonl" if output_path.lower().endswith((".jsonl", ".json")) else "csv"
+        if ledger_format not in LEDGER_FORMATS:
+            raise ValueError(f"Tundmatu koondfaili vorming: {ledger_format}")
+
+        self.output_path = output_path
+        self.ledger_format = ledger_format
+        self.items_path = os.path.splitext(output_path)[0] + "_items.csv" if ledger_format == "csv" else None
+        self.written = 0
+        self.duplicates = 0
+        self._keys = set()
+        self._load_index()
+
+        self._file = self._open(output_path, INVOICE_CSV_HEADERS)
+        try:
+            self._items_file = self._open(self.items_path, LEDGER_ITEM_CSV_HEADERS) if self.items_path else None
+        except ValueError:
+            self._file.close()
+            raise
+        self._writer = csv.writer(self._file, delimiter=CSV_DELIMITER) if ledger_format == "csv" else None
+        self._items_writer = csv.writer(self._items_file, delimiter=CSV_DELIMITER) if self._items_file else None
+
+    def _open(self, path, headers):
+        """Ava fail lisamiseks ja kirjuta uue CSV-faili algusesse päis
+
+        Raises:
+            ValueError: Kui olemasoleva CSV-faili päis erineb, st veerud ei klapiks
+        """
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new and self.ledger_format == "csv":
+            with open(path, 'r', newline='', encoding='utf-8') as f:
+                existing = next(csv.reader(f, delimiter=CSV_DELIMITER), [])
+            if existing != headers:
+                raise ValueError(f"Faili {path} veerud ei vasta koondfaili vormingule: {CSV_DELIMITER.join(existing)}")
+        f = open(path, 'a', newline='', encoding='utf-8')
+        if is_new and self.ledger_format == "csv":
+            csv.writer(f, delimiter=CSV_DELIMITER).writerow(headers)
+        return f
+
+    def _load_index(self):
+        """Loe olemasoleva koondfaili arved korduste indeksisse"""
+        if not os.path.exists(self.output_path):
+            return
+        with open(self.output_path, 'r', newline='', encoding='utf-8') as f:
+            if self.ledger_format == "csv":
+                for row in csv.DictReader(f, delimiter=CSV_DELIMITER):
+                    key = invoice_key(row.get("supplier_vat"), row.get("invoice_ref"))
+                    if key is not None:
+                        self._keys.add(key)
+            else:
+                for line in f:
+                    if line.strip():
+                        data = json.loads(line)
+                        key = invoice_key(data.get("supplier_reg_number"), data.get("invoice_number"))
+                        if key is not None:
+                            self._keys.add(key)
+
+    def add(self, structured_data, source=None):
+        """Lisa arve koondfaili, kui see pole korduv
+
+        Args:
+            structured_data: Struktureeritud andmed (vt DocumentProcessor.extract_structured_data)
+            source: Valikuline lähtefaili tee (salvestatakse JSON Lines väljale source)
+
+        Returns:
+            True, kui arve lisati, False, kui sama tarnija sama numbriga arve oli juba olemas
+        """
+        key = invoice_key(structured_data.get("supplier_reg_number"), structured_data.get("invoice_number"))
+        if key is not None and key in self._keys:
+            self.duplicates += 1
+            return False
+        if key is not None:
+            self._keys.add(key)
+
+        if self.ledger_format == "csv":
+            self._writer.writerow(invoice_csv_row(structured_data))
+            invoice_ref = [structured_data["invoice_number"] or "", structured_data["supplier_reg_number"] or ""]
+            for item in structured_data.get("line_items") or []:
+                self._items_writer.writerow(invoice_ref + item_csv_row(item))
+            self._items_file.flush()
+        else:
+            record = dict(structured_data)
+            if source is not None:
+                record["source"] = source
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        # Tulemus on failis kohe, isegi kui töötlus hiljem katkeb
+        self._file.flush()
+        self.written += 1
+        return True
+
+    def close(self):
+        """Sulge koondfail"""
+        self._file.close()
+        if self._items_file is not None:
+            self._items_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
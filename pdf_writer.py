@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Fotod PDFiks PDF kirjutaja - lehekülgede järkjärguline kirjutamine konstantse mäluga
+
+Erinevalt img2pdf.convert() funktsioonist, mis koostab kogu PDF-i ühe baidijadana
+ja vajab kõiki lehekülgi korraga, kirjutab StreamingPdfWriter iga lehekülje pildi
+faili kohe, kui see on valmis. Mällu jääb ainult lehekülgede objektinumbrite ja
+nihete loend, seega on mälukasutus ühe lehekülje suurune sõltumata dokumendi pikkusest.
+Viitetabel (xref) ja lehekülgede puu kirjutatakse faili lõppu.
+
+Kasutamine:
+    with StreamingPdfWriter("dokument.pdf") as writer:
+        for jpeg_bytes, width, height in pages:
+            writer.add_jpeg_page(jpeg_bytes, width, height, components=3, dpi=300)
+"""
+
+import os
+
+# JPEG komponentide arvule vastav PDF-i värviruum
+JPEG_COLORSPACES = {
+    1: "/DeviceGray",
+    3: "/DeviceRGB"
+}
+
+# Objektinumbrid, mis on reserveeritud kataloogile ja lehekülgede puule
+CATALOG_OBJECT = 1
+PAGES_OBJECT = 2
+
+# Ligikaudsed lisakulud baitides, et mahupiirangut ette hinnata:
+# lehekülje objektid pildiandmete kõrval, lehekülje osa viitetabelis ja
+# lehekülgede puus ning päis koos lõpuosaga
+PAGE_OBJECT_BYTES = 600
+PAGE_CLOSING_BYTES = 70
+TRAILER_BYTES = 300
+
+
+def _format_number(value):
+    """Vorminda arv PDF-i jaoks ilma liigsete komakohtadeta"""
+    text = f"{value:.4f}".rstrip("0").rstrip(".")
+    return text or "0"
+
+
+class StreamingPdfWriter:
+    """Kirjutab pildilehekülgedega PDF-i järkjärguliselt otse faili"""
+
+    def __init__(self, output_path):
+        """Ava väljundfail ja kirjuta PDF-i päis
+
+        Args:
+            output_path: PDF-faili väljundtee
+        """
+        self.output_path = output_path
+        self._file = open(output_path, "wb")
+        self._offsets = {}
+        self._page_objects = []
+        self._next_object = PAGES_OBJECT + 1
+        self._closed = False
+
+        # Binaarsed märgid teises reas annavad teada, et fail sisaldab binaarandmeid
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_object(CATALOG_OBJECT, f"<< /Type /Catalog /Pages {PAGES_OBJECT} 0 R >>".encode("ascii"))
+
+    @property
+    def page_count(self):
+        """Kirjutatud lehekülgede arv"""
+        return len(self._page_objects)
+
+    @property
+    def bytes_written(self):
+        """Seni faili kirjutatud baitide arv"""
+        return self._file.tell()
+
+    def _allocate(self):
+        """Reserveeri järgmine objektinumber"""
+        number = self._next_object
+        self._next_object += 1
+        return number
+
+    def _write_object(self, number, body):
+        """Kirjuta üks kaudne objekt
+
+        Args:
+            number: Objekti number
+            body: Objekti sisu baitidena
+        """
+        self._offsets[number] = self._file.tell()
+        self._file.write(f"{number} 0 obj\n".encode("ascii"))
+        self._file.write(body)
+        self._file.write(b"\nendobj\n")
+
+    def _write_stream(self, number, dictionary, data):
+        """Kirjuta voo objekt
+
+        Args:
+            number: Objekti number
+            dictionary: Voo sõnastiku sisu (ilma /Length väljata)
+            data: Voo andmed (bytes või puhvriprotokolli toetav objekt)
+        """
+        data = memoryview(data).cast("B")
+        self._offsets[number] = self._file.tell()
+        self._file.write(f"{number} 0 obj\n<< {dictionary} /Length {len(data)} >>\nstream\n".encode("ascii"))
+        self._file.write(data)
+        self._file.write(b"\nendstream\nendobj\n")
+
+    def add_image_page(self, data, width, height, colorspace, bits_per_component=8,
+                       filter_name="/DCTDecode", decode_parms=None, dpi=300):
+        """Lisa lehekülg, mis koosneb ühest pildist
+
+        Args:
+            data: Pildi kodeeritud andmed
+            width: Pildi laius pikslites
+            height: Pildi kõrgus pikslites
+            colorspace: PDF-i värviruum (nt "/DeviceRGB")
+            bits_per_component: Bitte komponendi kohta
+            filter_name: PDF-i filter (nt "/DCTDecode" või "/FlateDecode")
+            decode_parms: Valikuline /DecodeParms sõnastiku sisu
+            dpi: Pildi resolutsioon (arv või paar (x, y)), määrab lehekülje suuruse
+        """
+        if self._closed:
+            raise ValueError("PDF on juba suletud")
+
+        dpi_x, dpi_y = dpi if isinstance(dpi, (tuple, list)) else (dpi, dpi)
+        page_width = width * 72.0 / dpi_x
+        page_height = height * 72.0 / dpi_y
+
+        image_object = self._allocate()
+        content_object = self._allocate()
+        page_object = self._allocate()
+
+        image_dict = (f"/Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                      f"/ColorSpace {colorspace} /BitsPerComponent {bits_per_component} /Filter {filter_name}")
+        if decode_parms:
+            image_dict += f" /DecodeParms << {decode_parms} >>"
+        self._write_stream(image_object, image_dict, data)
+
+        content = (f"q {_format_number(page_width)} 0 0 {_format_number(page_height)} 0 0 cm "
+                   f"/Im0 Do Q").encode("ascii")
+        self._write_stream(content_object, "", content)
+
+        self._write_object(page_object, (
+            f"<< /Type /Page /Parent {PAGES_OBJECT} 0 R "
+            f"/MediaBox [0 0 {_format_number(page_width)} {_format_number(page_height)}] "
+            f"/Resources << /XObject << /Im0 {image_object} 0 R >> >> "
+            f"/Contents {content_object} 0 R >>"
+        ).encode("ascii"))
+        self._page_objects.append(page_object)
+
+        # Ära hoia kirjutatud andmeid Pythoni puhvris
+        self._file.flush()
+
+    def add_jpeg_page(self, jpeg_data, width, height, components=3, dpi=300):
+        """Lisa JPEG-pildist lehekülg (JPEG bitivoog kirjutatakse muutmata kujul)
+
+        Args:
+            jpeg_data: JPEG faili sisu
+            width: Pildi laius pikslites
+            height: Pildi kõrgus pikslites
+            components: Värvikomponentide arv (1 = hallskaala, 3 = värviline)
+            dpi: Pildi resolutsioon
+        """
+        if components not in JPEG_COLORSPACES:
+            raise ValueError(f"Toetamata JPEG komponentide arv: {components}")
+        self.add_image_page(jpeg_data, width, height, JPEG_COLORSPACES[components], dpi=dpi)
+
+    def close(self):
+        """Kirjuta lehekülgede puu, viitetabel ja lõpuosa ning sulge fail"""
+        if self._closed:
+            return
+
+        kids = " ".join(f"{number} 0 R" for number in self._page_objects)
+        self._write_object(PAGES_OBJECT, f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_objects)} >>".encode("ascii"))
+
+        xref_offset = self._file.tell()
+        size = self._next_object
+        self._file.write(f"xref\n0 {size}\n".encode("ascii"))
+        self._file.write(b"0000000000 65535 f \n")
+        for number in range(1, size):
+            self._file.write(f"{self._offsets[number]:010d} 00000 n \n".encode("ascii"))
+        self._file.write((
+            f"trailer\n<< /Size {size} /Root {CATALOG_OBJECT} 0 R >>\n"
+            f"startxref\n{xref_offset}\n%%EOF\n"
+        ).encode("ascii"))
+
+        self._file.close()
+        self._closed = True
+
+    def abort(self):
+        """Sulge fail ja kustuta poolik PDF"""
+        if not self._closed:
+            self._file.close()
+            self._closed = True
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Fotod PDFiks mõõdikud - töötlusetappide aja- ja mälukasutuse mõõtmine
+
+See moodul kogub DocumentProcessor'i töötlusetappide (tühjade ja korduvate
+lehekülgede kontroll, dekodeerimine, lehekülje tüübi tuvastus, kontuuri otsing, perspektiivi korrigeerimine, müra eemaldamine,
+parandamine, optimeerimine, kodeerimine, PDF kirjutamine, OCR) mõõdikud
+iga lehekülje kohta:
+- seinaaeg (wall time)
+- protsessori aeg (CPU time)
+- protsessi RSS mälu etapi lõpus ja selle kasv etapi jooksul
+- Pythoni mälukasutuse tipp (tracemalloc, kui see on lubatud)
+
+Tulemused saab eksportida JSON-aruandena ja Prometheus'e tekstiformaadis.
+
+Kasutamine:
+    metrics = StageMetrics()
+    processor = DocumentProcessor(metrics=metrics)
+    ...
+    metrics.write_json("metrics.json")
+    metrics.write_prometheus("metrics.prom")
+"""
+
+import os
+import time
+import json
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# Prometheus'e mõõdikute nimede eesliide
+PROMETHEUS_PREFIX = "fotod_pdfiks"
+
+
+def _current_rss_mb():
+    """Tagasta protsessi praegune RSS megabaitides või None, kui pole teada
+
+    Protsessi eluaegne maksimum (ru_maxrss) ei näita üksiku etapi mälukasutust,
+    seega loetakse praegune RSS failist /proc/self/statm (Linux).
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StageMetrics:
+    """Kogub iga lehekülje iga töötlusetapi aja- ja mälunäitajad"""
+
+    def __init__(self, trace_memory=False):
+        """Initsialiseeri mõõdikute kogumine
+
+        Args:
+            trace_memory (bool): Kui True, mõõdetakse ka Pythoni mälutippu tracemalloc abil
+                (aeglustab töötlust märgatavalt)
+        """
+        self.trace_memory = trace_memory
+        self.records = []
+        self.page_info = {}
+        self.current_page = None
+        # Pesastatud etappide tracemalloc tippude kogumiseks
+        self._peak_stack = []
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def set_page(self, page):
+        """Määra lehekülg, millega järgmised etapid seotakse
+
+        Args:
+            page: Lehekülje tunnus (tavaliselt pildi tee)
+        """
+        self.current_page = page
+
+    def add_page_info(self, page, key, value):
+        """Lisa leheküljele aruandes kuvatav lisainfo
+
+        Args:
+            page: Lehekülje tunnus
+            key: Info nimi
+            value: JSON-iks teisendatav väärtus
+        """
+        self.page_info.setdefault(page, {})[key] = value
+
+    def _trace_enter(self):
+        """Alusta pesastatud etapi tracemalloc tipu mõõtmist"""
+        if not self.trace_memory:
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        # Kanna senine tipp üle välimisele etapile enne nullimist
+        if self._peak_stack:
+            self._peak_stack[-1] = max(self._peak_stack[-1], peak)
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        self._peak_stack.append(current)
+
+    def _trace_exit(self):
+        """Lõpeta pesastatud etapi tracemalloc tipu mõõtmine
+
+        Returns:
+            Etapi Pythoni mälutipp megabaitides või None
+        """
+        if not self.trace_memory:
+            return None
+        _, peak = tracemalloc.get_traced_memory()
+        stage_peak = max(self._peak_stack.pop(), peak)
+        if self._peak_stack:
+            self._peak_stack[-1] = max(self._peak_stack[-1], stage_peak)
+        return stage_peak / (1024 * 1024)
+
+    @contextmanager
+    def stage(self, name, page=None):
+        """Mõõda ühe töötlusetapi kestust ja mälukasutust
+
+        Args:
+            name: Etapi nimi (nt "decode", "contour", "denoise")
+            page: Lehekülje tunnus; vaikimisi viimati set_page() abil määratud lehekülg
+        """
+        if page is None:
+            page = self.current_page
+
+        rss_before = _current_rss_mb()
+        self._trace_enter()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            py_peak = self._trace_exit()
+            rss_after = _current_rss_mb()
+
+            record = {
+                "page": page,
+                "stage": name,
+                "wall_s": wall,
+                "cpu_s": cpu,
+                "rss_mb": rss_after,
+                "rss_growth_mb": (rss_after - rss_before) if None not in (rss_before, rss_after) else None,
+                "py_peak_mb": py_peak
+            }
+            self.records.append(record)
+
+    def summary(self):
+        """Koonda mõõdikud etappide kaupa
+
+        Returns:
+            Dict, kus võtmeks on etapi nimi ja väärtuseks koondnäitajad
+        """
+        stages = {}
+        for record in self.records:
+            item = stages.setdefault(record["stage"], {
+                "count": 0,
+                "wall_total_s": 0.0,
+                "wall_max_s": 0.0,
+                "cpu_total_s": 0.0,
+                "rss_growth_max_mb": None,
+                "py_peak_mb": None
+            })
+            item["count"] += 1
+            item["wall_total_s"] += record["wall_s"]
+            item["wall_max_s"] = max(item["wall_max_s"], record["wall_s"])
+            item["cpu_total_s"] += record["cpu_s"]
+            if record["rss_growth_mb"] is not None:
+                item["rss_growth_max_mb"] = max(item["rss_growth_max_mb"] or 0.0, record["rss_growth_mb"])
+            if record["py_peak_mb"] is not None:
+                item["py_peak_mb"] = max(item["py_peak_mb"] or 0.0, record["py_peak_mb"])
+
+        for item in stages.values():
+            item["wall_mean_s"] = item["wall_total_s"] / item["count"]
+            item["cpu_mean_s"] = item["cpu_total_s"] / item["count"]
+
+        return stages
+
+    def pages(self):
+        """Koonda mõõdikud lehekülgede ja etappide kaupa
+
+        Returns:
+            Dict kujul {lehekülg: {etapp: koondnäitajad}}
+        """
+        pages = {}
+        for record in self.records:
+            page_key = str(record["page"])
+            stage = pages.setdefault(page_key, {}).setdefault(record["stage"], {
+                "count": 0,
+                "wall_s": 0.0,
+                "cpu_s": 0.0,
+                "rss_growth_max_mb": None,
+                "py_peak_mb": None
+            })
+            stage["count"] += 1
+            stage["wall_s"] += record["wall_s"]
+            stage["cpu_s"] += record["cpu_s"]
+            if record["rss_growth_mb"] is not None:
+                stage["rss_growth_max_mb"] = max(stage["rss_growth_max_mb"] or 0.0, record["rss_growth_mb"])
+            if record["py_peak_mb"] is not None:
+                stage["py_peak_mb"] = max(stage["py_peak_mb"] or 0.0, record["py_peak_mb"])
+        return pages
+
+    def to_dict(self):
+        """Tagasta kogu aruanne JSON-iks teisendatava sõnastikuna"""
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "trace_memory": self.trace_memory,
+            "stages": self.summary(),
+            "pages": self.pages(),
+            "page_info": {str(page): info for page, info in self.page_info.items()},
+            "records": self.records
+        }
+
+    def write_json(self, output_path):
+        """Salvesta mõõdikud JSON-aruandena
+
+        Args:
+            output_path: Väljundfaili tee
+        """
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        """Vorminda etappide koondmõõdikud Prometheus'e tekstiformaati
+
+        Returns:
+            str: Prometheus'e tekstiformaadis mõõdikud
+        """
+        summary = self.summary()
+        lines = []
+
+        def metric(name, metric_type, help_text, values):
+            full_name = f"{PROMETHEUS_PREFIX}_{name}"
+            lines.append(f"# HELP {full_name} {help_text}")
+            lines.append(f"# TYPE {full_name} {metric_type}")
+            for suffix, stage, value in values:
+                if value is not None:
+                    formatted = str(value) if isinstance(value, int) else f"{value:.6f}"
+                    lines.append(f'{full_name}{suffix}{{stage="{stage}"}} {formatted}')
+
+        metric("stage_wall_seconds", "summary", "Stage wall time in seconds",
+               [(s, stage, v) for stage, item in summary.items()
+                for s, v in (("_sum", item["wall_total_s"]), ("_count", item["count"]))])
+        metric("stage_cpu_seconds", "summary", "Stage CPU time in seconds",
+               [(s, stage, v) for stage, item in summary.items()
+                for s, v in (("_sum", item["cpu_total_s"]), ("_count", item["count"]))])
+        metric("stage_wall_max_seconds", "gauge", "Slowest single run of the stage in seconds",
+               [("", stage, item["wall_max_s"]) for stage, item in summary.items()])
+        metric("stage_rss_growth_max_megabytes", "gauge", "Largest process RSS growth during a single run of the stage in megabytes",
+               [("", stage, item["rss_growth_max_mb"]) for stage, item in summary.items()])
+        metric("stage_python_peak_megabytes", "gauge", "Peak traced Python memory during the stage in megabytes",
+               [("", stage, item["py_peak_mb"]) for stage, item in summary.items()])
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, output_path):
+        """Salvesta mõõdikud Prometheus'e tekstiformaadis (node_exporter textfile collector)
+
+        Args:
+            output_path: Väljundfaili tee (tavaliselt .prom laiendiga)
+        """
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+
+    def write_reports(self, output_dir):
+        """Salvesta nii JSON-aruanne kui ka Prometheus'e fail antud kausta
+
+        Args:
+            output_dir: Väljundkaust
+
+        Returns:
+            Tuple (JSON faili tee, Prometheus'e faili tee)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        json_path = os.path.join(output_dir, "metrics.json")
+        prom_path = os.path.join(output_dir, "metrics.prom")
+        self.write_json(json_path)
+        self.write_prometheus(prom_path)
+        return json_path, prom_path
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Fotod PDFiks profileerija - kogu käivituse profiil ja flamegraph'i pinud
+
+See moodul salvestab ühe käivituse kohta:
+- cProfile tulemuse (profile.prof), mida saab avada pstats'i, snakeviz'i jms abil
+- loetava kokkuvõtte (profile.txt) kumulatiivse aja järgi sorteerituna
+- kokkuvõetud pinud (stacks.folded) flamegraph.pl / speedscope / inferno jaoks
+- DocumentProcessor'i meetodite kaupa grupeeritud pinud (methods.folded)
+  ja proovide arvud (methods.json)
+
+Pinud kogutakse taustalõimes proovivõtu teel. Kuna OpenCV vabastab oma
+funktsioonide ajal GIL-i, näeb proovivõtja ka pikki C-kutseid (nt
+fastNlMeansDenoisingColored) neid kutsuva Pythoni rea kaudu.
+
+Kasutamine:
+    with RunProfiler("profiil/"):
+        processor.convert_to_pdf(...)
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+
+# DocumentProcessor'i klassi nimi, mille meetodite järgi proove grupeeritakse
+PROCESSOR_CLASS = "DocumentProcessor"
+
+# Vaikimisi proovivõtu intervall sekundites
+DEFAULT_INTERVAL = 0.005
+
+
+def _frame_name(frame):
+    """Tagasta kaadri funktsiooni nimi koos klassiga, kui see on teada
+
+    Args:
+        frame: Pythoni pinukaader
+
+    Returns:
+        str: Nt "DocumentProcessor._enhance_document"
+    """
+    code = frame.f_code
+    qualname = getattr(code, "co_qualname", None)
+    if qualname:
+        return qualname
+    # Python < 3.11: tuletame klassi nime self argumendist
+    self_obj = frame.f_locals.get("self")
+    if self_obj is not None:
+        return f"{type(self_obj).__name__}.{code.co_name}"
+    return code.co_name
+
+
+def _frame_label(frame):
+    """Tagasta kaadri silt flamegraph'i jaoks (py-spy stiilis)
+
+    Args:
+        frame: Pythoni pinukaader
+
+    Returns:
+        str: Nt "DocumentProcessor._enhance_document (doc_processor.py:358)"
+    """
+    filename = os.path.basename(frame.f_code.co_filename)
+    return f"{_frame_name(frame)} ({filename}:{frame.f_lineno})"
+
+
+class RunProfiler:
+    """Profileerib kogu käivituse nii cProfile kui ka proovivõtva pinukogujaga"""
+
+    def __init__(self, output_dir, interval=DEFAULT_INTERVAL):
+        """Initsialiseeri profileerija
+
+        Args:
+            output_dir: Kaust, kuhu profiili failid salvestatakse
+            interval: Pinude proovivõtu intervall sekundites
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.profiler = cProfile.Profile()
+        self.stacks = Counter()
+        self.method_stacks = Counter()
+        self.method_self = Counter()
+        self.method_total = Counter()
+        self.samples = 0
+        self._thread_id = None
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started = None
+
+    def _sample(self):
+        """Võta üks proov profileeritava lõime pinust"""
+        frame = sys._current_frames().get(self._thread_id)
+        if frame is None:
+            return
+
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+
+        # Jäta välja profileerija enda kaadrid
+        frames = [f for f in frames if f.f_code.co_filename != __file__]
+        if not frames:
+            return
+
+        self.samples += 1
+        self.stacks[";".join(_frame_label(f) for f in frames)] += 1
+
+        # Grupeeri DocumentProcessor'i meetodite kaupa: pinu algab välimisest meetodist
+        method_indexes = [i for i, f in enumerate(frames) if _frame_name(f).startswith(PROCESSOR_CLASS + ".")]
+        if not method_indexes:
+            self.method_stacks["[väljaspool DocumentProcessor'it]"] += 1
+            return
+
+        grouped = frames[method_indexes[0]:]
+        self.method_stacks[";".join(_frame_label(f) for f in grouped)] += 1
+
+        methods = [_frame_name(frames[i]) for i in method_indexes]
+        self.method_self[methods[-1]] += 1
+        for method in set(methods):
+            self.method_total[method] += 1
+
+    def _run_sampler(self):
+        """Proovivõtu lõime põhitsükkel"""
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        """Alusta profileerimist praeguses lõimes"""
+        self._thread_id = threading.get_ident()
+        self._started = time.perf_counter()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._run_sampler, name="fotod-pdfiks-profiler", daemon=True)
+        self._sampler.start()
+        self.profiler.enable()
+
+    def stop(self):
+        """Lõpeta profileerimine ja salvesta tulemused
+
+        Returns:
+            List loodud failide teedega
+        """
+        self.profiler.disable()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        return self.write_reports()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+    def write_reports(self):
+        """Salvesta cProfile tulemus ja kokkuvõetud pinud väljundkausta
+
+        Returns:
+            List loodud failide teedega
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        prof_path = os.path.join(self.output_dir, "profile.prof")
+        self.profiler.dump_stats(prof_path)
+
+        txt_path = os.path.join(self.output_dir, "profile.txt")
+        with open(txt_path, 'w', encoding='utf-8') as f:
+            stats = pstats.Stats(self.profiler, stream=f)
+            stats.sort_stats("cumulative").print_stats(60)
+            stats.sort_stats("tottime").print_stats(30)
+
+        stacks_path = os.path.join(self.output_dir, "stacks.folded")
+        self._write_folded(stacks_path, self.stacks)
+
+        methods_folded_path = os.path.join(self.output_dir, "methods.folded")
+        self._write_folded(methods_folded_path, self.method_stacks)
+
+        methods_path = os.path.join(self.output_dir, "methods.json")
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        with open(methods_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "interval_s": self.interval,
+                "elapsed_s": elapsed,
+                "samples": self.samples,
+                "methods": {
+                    method: {
+                        "self_samples": self.method_self.get(method, 0),
+                        "total_samples": total,
+                        "total_share": total / self.samples if self.samples else 0.0
+                    }
+                    for method, total in self.method_total.most_common()
+                }
+            }, f, indent=2, ensure_ascii=False)
+
+        return [prof_path, txt_path, stacks_path, methods_folded_path, methods_path]
+
+    @staticmethod
+    def _write_folded(output_path, stacks):
+        """Salvesta pinud kokkuvõetud kujul ("kaader;kaader;kaader arv")
+
+        Args:
+            output_path: Väljundfaili tee
+            stacks: Counter pinude ja proovide arvuga
+        """
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(stacks.items()):
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Fotod PDFiks sünteetilised dokumendid - deterministlikud testpildid mõõtmisteks
+
+See moodul genereerib korratavaid dokumendifotosid jõudlustestide jaoks:
+- text: tasane tekstilehekülg (nagu skanner või ülaltvõte), mis täidab kogu kaadri
+- receipt: kitsas ja pikk kviitung tekstuursel taustal
+- skewed: perspektiivis tekstilehekülg tekstuursel taustal (telefonifoto)
+- photo: tekstilehekülg suure värvilise foto või joonisega
+- blank: tühi lehekülg (nt lehe tagakülg) tekstuursel taustal
+
+Sama seemne (seed), tüübi ja suurusega genereeritakse alati sama pilt, seega
+saab tulemusi võrrelda eri commit'ide vahel ilma pildikogu hoidlasse lisamata.
+
+Kasutamine:
+    python synthetic_docs.py --output korpus/ --kinds text,receipt,skewed --sizes 2,8,12
+"""
+
+import os
+import argparse
+import cv2
+import numpy as np
+
+# Toetatud dokumenditüübid
+DOCUMENT_KINDS = ["text", "receipt", "skewed", "photo", "blank"]
+
+# Dokumenditüübile vastav lehekülje tüüp (vt doc_processor.PAGE_TYPES)
+KIND_PAGE_TYPES = {
+    "text": "text",
+    "receipt": "receipt",
+    "skewed": "text",
+    "photo": "photo",
+    "blank": "blank"
+}
+
+# Sõnavara juhusliku teksti jaoks (arvetele sarnane sisu)
+# NB! OpenCV Hershey fondid toetavad ainult ASCII märke, seega ilma täpitähtedeta
+WORDS = [
+    "arve", "kuupaev", "tasuda", "summa", "kokku", "kaibemaks", "muuja", "ostja",
+    "kogus", "hind", "teenus", "kaup", "tellimus", "makse", "viitenumber", "konto",
+    "aadress", "telefon", "tallinn", "tartu", "parnu", "osauhing", "aktsiaselts",
+    "invoice", "total", "date", "supplier", "price", "quantity", "payment"
+]
+
+# Sünteetilise OCR teksti rea maksimaalne pikkus märkides (vt generate_invoice_text)
+TEXT_LINE_CHARS = 80
+
+# A4 lehekülje kõrguse ja laiuse suhe
+A4_ASPECT = 297.0 / 210.0
+
+
+def _dimensions(megapixels, aspect):
+    """Arvuta pildi mõõtmed megapikslite ja kõrgus/laius suhte järgi
+
+    Args:
+        megapixels: Pildi suurus megapikslites
+        aspect: Kõrguse ja laiuse suhe
+
+    Returns:
+        Tuple (laius, kõrgus)
+    """
+    pixels = megapixels * 1000000.0
+    width = int(round(np.sqrt(pixels / aspect)))
+    height = int(round(width * aspect))
+    return width, height
+
+
+def _text_lines(rng, count, fits):
+    """Genereeri juhuslikud arvelaadsed tekstiread
+
+    Args:
+        rng: numpy RandomState
+        count: Ridade arv
+        fits: Funktsioon, mis kontrollib, kas tekstirida mahub lehekülje laiusesse
+
+    Returns:
+        List tekstiridadega
+    """
+    lines = [
+        f"Arve nr: {rng.randint(1000, 99999)}",
+        f"Kuupaev: {rng.randint(1, 29):02d}.{rng.randint(1, 13):02d}.20{rng.randint(20, 26)}",
+        f"Muuja: OU {WORDS[rng.randint(len(WORDS))].capitalize()}",
+        f"Reg. nr: {rng.randint(10000000, 99999999)}"
+    ]
+    while len(lines) < count - 1:
+        line = []
+        if rng.rand() < 0.3:
+            suffix = f"  {rng.randint(1, 20)} tk  {rng.randint(1, 500)},{rng.randint(0, 100):02d}"
+        else:
+            suffix = ""
+        while True:
+            word = WORDS[rng.randint(len(WORDS))]
+            if line and not fits(" ".join(line + [word]) + suffix):
+                break
+            line.append(word)
+        lines.append(" ".join(line) + suffix)
+    lines.append(f"Kokku: {rng.randint(10, 5000)},{rng.randint(0, 100):02d}")
+    return lines
+
+
+def _render_page(rng, width, height, margin_ratio=0.08, font_scale=None):
+    """Joonista valge lehekülg tekstiga
+
+    Args:
+        rng: numpy RandomState
+        width: Lehekülje laius pikslites
+        height: Lehekülje kõrgus pikslites
+        margin_ratio: Veeriste laius lehekülje laiuse suhtes
+        font_scale: OpenCV fondi skaala (vaikimisi lehekülje laiuse järgi)
+
+    Returns:
+        Tuple (BGR pilt, list tekstiridadega)
+    """
+    page = np.full((height, width, 3), 250, dtype=np.uint8)
+    if font_scale is None:
+        font_scale = width / 1400.0
+    thickness = max(1, int(round(font_scale * 2)))
+    (_, line_height), _ = cv2.getTextSize("Ag", cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+    line_step = int(line_height * 2.0)
+
+    margin = int(width * margin_ratio)
+    line_count = max(3, (height - 2 * margin) // line_step)
+
+    def fits(line):
+        text_width = cv2.getTextSize(line, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)[0][0]
+        return text_width <= width - 2 * margin
+
+    lines = _text_lines(rng, line_count, fits)
+    y = margin + line_height
+    for line in lines:
+        cv2.putText(page, line, (margin, y), cv2.FONT_HERSHEY_SIMPLEX, font_scale,
+                    (30, 30, 30), thickness, cv2.LINE_AA)
+        y += line_step
+    return page, lines
+
+
+def _textured_background(rng, width, height):
+    """Genereeri laua- või kangalaadne tekstuurne taust
+
+    Args:
+        rng: numpy RandomState
+        width: Laius pikslites
+        height: Kõrgus pikslites
+
+    Returns:
+        BGR pilt
+    """
+    # Madalsageduslik värviline gradient
+    base_color = rng.randint(60, 160, size=3).astype(np.float32)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    gradient = (xx / width - 0.5) * 40 + (yy / height - 0.5) * 25
+    background = base_color[None, None, :] + gradient[:, :, None]
+
+    # Puidusüüd meenutavad triibud
+    stripes = np.sin(yy / max(1.0, height / 60.0) + np.sin(xx / max(1.0, width / 8.0)) * 2) * 12
+    background += stripes[:, :, None]
+
+    # Kõrgsageduslik müra
+    noise = rng.normal(0, 8, size=(height // 4 + 1, width // 4 + 1, 3)).astype(np.float32)
+    noise = cv2.resize(noise, (width, height), interpolation=cv2.INTER_LINEAR)
+    background += noise
+
+    return np.clip(background, 0, 255).astype(np.uint8)
+
+
+def _photo_region(rng, width, height):
+    """Genereeri fotolaadne sujuvate värvipindade ja detailidega pilt
+
+    Args:
+        rng: numpy RandomState
+        width: Laius pikslites
+        height: Kõrgus pikslites
+
+    Returns:
+        BGR pilt
+    """
+    # Madalsageduslik värviväli (taevas, maastik, toode vms)
+    coarse = rng.uniform(30, 230, size=(6, 8, 3)).astype(np.float32)
+    photo = cv2.resize(coarse, (width, height), interpolation=cv2.INTER_CUBIC)
+
+    # Kujundid erineva tooniga
+    for _ in range(12):
+        center = (int(rng.randint(width)), int(rng.randint(height)))
+        axes = (int(rng.randint(width // 20 + 1, width // 5 + 2)), int(rng.randint(height // 20 + 1, height // 5 + 2)))
+        color = tuple(float(c) for c in rng.randint(20, 235, size=3))
+        cv2.ellipse(photo, center, axes, float(rng.randint(180)), 0, 360, color, -1, cv2.LINE_AA)
+
+    photo = cv2.GaussianBlur(photo, (0, 0), max(1.0, width / 300.0))
+    photo += rng.normal(0, 6, size=photo.shape).astype(np.float32)
+    return np.clip(photo, 0, 255).astype(np.uint8)
+
+
+def _place_on_background(rng, page, width, height, skew):
+    """Aseta lehekülg perspektiivis tekstuursele taustale
+
+    Args:
+        rng: numpy RandomState
+        page: Lehekülje pilt
+        width: Foto laius
+        height: Foto kõrgus
+        skew: Nurkade juhusliku nihke suurus foto mõõtmete suhtes
+
+    Returns:
+        BGR pilt
+    """
+    background = _textured_background(rng, width, height)
+    ph, pw = page.shape[:2]
+
+    # Lehekülg katab ligikaudu 60-75% fotost
+    scale = min(width * 0.8 / pw, height * 0.85 / ph)
+    cx, cy = width / 2.0, height / 2.0
+    half_w, half_h = pw * scale / 2.0, ph * scale / 2.0
+    corners = np.array([
+        [cx - half_w, cy - half_h],
+        [cx + half_w, cy - half_h],
+        [cx + half_w, cy + half_h],
+        [cx - half_w, cy + half_h]
+    ], dtype=np.float32)
+    jitter = rng.uniform(-skew, skew, size=(4, 2)) * np.array([width, height])
+    corners += jitter.astype(np.float32)
+
+    src = np.array([[0, 0], [pw - 1, 0], [pw - 1, ph - 1], [0, ph - 1]], dtype=np.float32)
+    M = cv2.getPerspectiveTransform(src, corners)
+    warped = cv2.warpPerspective(page, M, (width, height))
+    mask = cv2.warpPerspective(np.full((ph, pw), 255, dtype=np.uint8), M, (width, height))
+
+    # Kerge valgustuse ebaühtlus
+    shade = np.linspace(0.92, 1.0, width, dtype=np.float32)[None, :, None]
+    warped = np.clip(warped.astype(np.float32) * shade, 0, 255).astype(np.uint8)
+
+    result = background.copy()
+    result[mask > 127] = warped[mask > 127]
+    return result
+
+
+def generate_invoice_text(line_count=60, seed=0):
+    """Genereeri arvelaadne tekst, nagu OCR selle tagastaks (arve parsimise mõõtmiseks)
+
+    Args:
+        line_count: Ridade arv
+        seed: Juhuslikkuse seeme
+
+    Returns:
+        Tekst ridadena
+    """
+    rng = np.random.RandomState(seed)
+    return "\n".join(_text_lines(rng, line_count, lambda line: len(line) <= TEXT_LINE_CHARS)) + "\n"
+
+
+def generate_document(kind, megapixels, seed=0):
+    """Genereeri deterministlik sünteetiline dokumendifoto
+
+    Args:
+        kind: Dokumendi tüüp ("text", "receipt" või "skewed")
+        megapixels: Pildi suurus megapikslites
+        seed: Juhuslikkuse seeme
+
+    Returns:
+        Tuple (BGR pilt, dokumendi tekst)
+    """
+    if kind not in DOCUMENT_KINDS:
+        raise ValueError(f"Tundmatu dokumendi tüüp: {kind}")
+
+    rng = np.random.RandomState(seed * 1009 + DOCUMENT_KINDS.index(kind) * 97 + int(megapixels * 10))
+
+    if kind == "text":
+        width, height = _dimensions(megapixels, A4_ASPECT)
+        page, lines = _render_page(rng, width, height)
+        image = page
+    elif kind == "receipt":
+        # Telefonifoto 3:4 portreeformaadis, kviitung kitsas ja pikk
+        width, height = _dimensions(megapixels, 4.0 / 3.0)
+        receipt_w = int(width * 0.4)
+        receipt_h = int(height * 0.9)
+        page, lines = _render_page(rng, receipt_w, receipt_h, margin_ratio=0.06,
+                                   font_scale=receipt_w / 700.0)
+        image = _place_on_background(rng, page, width, height, skew=0.02)
+    elif kind == "skewed":
+        width, height = _dimensions(megapixels, 4.0 / 3.0)
+        page_w = int(width * 0.8)
+        page, lines = _render_page(rng, page_w, int(page_w * A4_ASPECT))
+        image = _place_on_background(rng, page, width, height, skew=0.06)
+    elif kind == "photo":
+        # Tekst ülaosas, foto katab suurema osa leheküljest
+        width, height = _dimensions(megapixels, A4_ASPECT)
+        page, lines = _render_page(rng, width, height)
+        margin = int(width * 0.08)
+        top = int(height * 0.25)
+        page[top:height - margin, margin:width - margin] = _photo_region(rng, width - 2 * margin, height - margin - top)
+        lines = lines[:max(1, (top - margin) * len(lines) // (height - 2 * margin))]
+        image = page
+    else:
+        # Tühi paber: kerge müra ja varjuga, ilma tekstita
+        width, height = _dimensions(megapixels, 4.0 / 3.0)
+        page_w = int(width * 0.75)
+        page_h = int(page_w * A4_ASPECT)
+        if page_h > height * 0.95:
+            page_h = int(height * 0.9)
+            page_w = int(page_h / A4_ASPECT)
+        page = np.full((page_h, page_w, 3), 248, dtype=np.uint8)
+        page = np.clip(page.astype(np.float32) + rng.normal(0, 3, size=page.shape), 0, 255).astype(np.uint8)
+        lines = []
+        image = _place_on_background(rng, page, width, height, skew=0.04)
+
+    return image, "\n".join(lines)
+
+
+def write_corpus(output_dir, kinds=None, sizes=(2, 8), seed=0, jpeg_quality=90):
+    """Salvesta sünteetiliste dokumentide kogum JPEG-failidena
+
+    Iga pildi kõrvale salvestatakse ka tegelik tekst (<nimi>.gt.txt),
+    mida saab kasutada OCR-i täpsuse hindamiseks.
+
+    Args:
+        output_dir: Väljundkaust
+        kinds: Dokumenditüüpide list (vaikimisi kõik)
+        sizes: Pildi suurused megapikslites
+        seed: Juhuslikkuse seeme
+        jpeg_quality: JPEG kvaliteet
+
+    Returns:
+        List loodud pildifailide teedega
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for kind in kinds or DOCUMENT_KINDS:
+        for megapixels in sizes:
+            image, text = generate_document(kind, megapixels, seed=seed)
+            name = f"{kind}_{megapixels:g}mp_s{seed}"
+            image_path = os.path.join(output_dir, f"{name}.jpg")
+            cv2.imwrite(image_path, image, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+            with open(os.path.join(output_dir, f"{name}.gt.txt"), 'w', encoding='utf-8') as f:
+                f.write(text + "\n")
+            paths.append(image_path)
+    return paths
+
+
+def main():
+    """Põhifunktsioon"""
+    parser = argparse.ArgumentParser(description='Genereeri sünteetilised dokumendifotod jõudlustestide jaoks')
+    parser.add_argument('--output', required=True, help='Väljundkaust')
+    parser.add_argument('--kinds', default=",".join(DOCUMENT_KINDS),
+                        help=f'Dokumenditüübid komaga eraldatult (vaikimisi: {",".join(DOCUMENT_KINDS)})')
+    parser.add_argument('--sizes', default='2,8', help='Pildi suurused megapikslites (vaikimisi: 2,8)')
+    parser.add_argument('--seed', type=int, default=0, help='Juhuslikkuse seeme (vaikimisi: 0)')
+    args = parser.parse_args()
+
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+    sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+    paths = write_corpus(args.output, kinds=kinds, sizes=sizes, seed=args.seed)
+    print(f"Loodud {len(paths)} sünteetilist dokumenti kaustas {args.output}")
+
+
+if __name__ == '__main__':
+    main()